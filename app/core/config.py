@@ -1,3 +1,6 @@
+import typing as tp
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -35,11 +38,122 @@ class Settings(BaseSettings):
     CDEK_ACCOUNT: str
     CDEK_SECURE_PASSWORD: str
 
+    CDEK_HTTP_MAX_CONNECTIONS: int = 20
+    CDEK_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    CDEK_HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    CDEK_HTTP_CONNECT_TIMEOUT: float = 3.0
+    CDEK_HTTP_READ_TIMEOUT: float = 10.0
+    CDEK_HTTP_WRITE_TIMEOUT: float = 10.0
+    CDEK_HTTP_POOL_TIMEOUT: float = 2.0
+    CDEK_HTTP2: bool = True
+    # Время жизни микрокэша одинаковых GET-запросов к CDEK, 0 - только схлопывание
+    CDEK_HTTP_MICRO_CACHE_TTL: float = 3.0
+    CDEK_HTTP_MICRO_CACHE_MAXSIZE: int = 1000
+
+    # Circuit breaker: ошибок подряд до размыкания, порог медленного ответа (с),
+    # пауза до пробного запроса (с)
+    CDEK_BREAKER_FAILURE_THRESHOLD: int = 5
+    CDEK_BREAKER_SLOW_CALL_THRESHOLD: float = 3.0
+    CDEK_BREAKER_RESET_TIMEOUT: float = 30.0
+    CDEK_BREAKER_HALF_OPEN_MAX_CALLS: int = 1
+    # Отдельная цепь фоновых запросов (синхронизация справочников, создание
+    # заказов из outbox): страница всех ПВЗ страны легально идет дольше
+    # CDEK_BREAKER_SLOW_CALL_THRESHOLD и не должна размыкать цепь оформления
+    CDEK_BACKGROUND_BREAKER_SLOW_CALL_THRESHOLD: float = 60.0
+
+    CDEK_TOKEN_REFRESH_MARGIN: float = 60.0
+
+    CDEK_PVZ_CACHE_TTL: float = 6 * 60 * 60
+    CDEK_PVZ_CACHE_STALE_TTL: float = 3 * 24 * 60 * 60
+    CDEK_PVZ_CACHE_MAXSIZE: int = 5000
+    CDEK_PVZ_CACHE_DB_TIER: bool = False
+
+    # "api" - проксировать справочники в CDEK, "local" - отдавать из локальных таблиц
+    CDEK_DIRECTORY_SOURCE: str = "api"
+    CDEK_DIRECTORY_SYNC_INTERVAL: float = 24 * 60 * 60
+    CDEK_DIRECTORY_SYNC_PAGE_SIZE: int = 1000
+
+    # Секрет в query-параметре token вебхука статусов CDEK
+    CDEK_WEBHOOK_TOKEN: str | None = None
+    CDEK_STATUS_REFRESH_POLL_INTERVAL: float = 60
+    CDEK_STATUS_REFRESH_BATCH: int = 50
+    CDEK_STATUS_REFRESH_CONCURRENCY: int = 4
+    CDEK_STATUS_REFRESH_RATE: float = 5.0
+
+    # Кэш готовых страниц каталога: TTL ограничивает рассинхрон между воркерами
+    CATALOG_CACHE_TTL: float = 60.0
+    CATALOG_CACHE_MAXSIZE: int = 256
+
+    # "local" - файлы в MEDIA_ROOT, "s3" - бакет S3-совместимого хранилища (MinIO)
+    MEDIA_STORAGE: tp.Literal["local", "s3"] = "local"
+    MEDIA_ROOT: str = "media"
+    MEDIA_MAX_UPLOAD_SIZE: int = 20 * 1024 * 1024
+    MEDIA_PRESIGN_EXPIRES: int = 15 * 60
+    MEDIA_IMMUTABLE_MAX_AGE: int = 365 * 24 * 60 * 60
+    # Отдавать файлы через ASGI pathsend (sendfile), если сервер его поддерживает
+    MEDIA_PATHSEND: bool = True
+
+    S3_ENDPOINT_URL: str = "http://minio:9000"
+    S3_BUCKET: str = "media"
+    S3_ACCESS_KEY: str | None = None
+    S3_SECRET_KEY: str | None = None
+    S3_REGION: str = "us-east-1"
+    # Публичный адрес объектов (CDN/прокси), по умолчанию S3_ENDPOINT_URL/S3_BUCKET
+    S3_PUBLIC_URL: str | None = None
+    # Адрес бакета, доступный клиентам для прямой загрузки (presigned POST):
+    # S3_ENDPOINT_URL обычно внутренний (minio:9000). По умолчанию S3_PUBLIC_URL
+    S3_UPLOAD_URL: str | None = None
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+
+    IMAGE_VARIANT_WIDTHS: list[int] = [320, 640, 1280]
+    IMAGE_QUALITY: int = 80
+    IMAGE_AVIF: bool = True
+    IMAGE_PROCESS_WORKERS: int = 2
+
+    # Резерв остатков под неоплаченный заказ (с) и параметры sweeper'а
+    STOCK_RESERVATION_TTL: float = 30 * 60
+    STOCK_RESERVATION_SWEEP_INTERVAL: float = 60
+    STOCK_RESERVATION_SWEEP_BATCH: int = 500
+
+    # Ключи идемпотентности: срок хранения ответа, срок захвата ключа
+    # выполняющимся запросом и сколько дубль ждет его завершения (с)
+    IDEMPOTENCY_TTL: float = 24 * 60 * 60
+    IDEMPOTENCY_LOCK_TTL: float = 60
+    IDEMPOTENCY_WAIT: float = 10
+    IDEMPOTENCY_CACHE_MAXSIZE: int = 10000
+    IDEMPOTENCY_DB_TIER: bool = True
+    IDEMPOTENCY_PURGE_INTERVAL: float = 60 * 60
+
+    # Outbox: опрос очереди, аренда сообщения воркером и повторы с backoff (с)
+    OUTBOX_POLL_INTERVAL: float = 5
+    OUTBOX_BATCH: int = 50
+    OUTBOX_CONCURRENCY: int = 4
+    OUTBOX_LEASE: float = 5 * 60
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE_DELAY: float = 30
+    OUTBOX_RETRY_MAX_DELAY: float = 60 * 60
+
+    # Обработка журнала уведомлений об оплате (payment_events); задержка
+    # повтора после ошибки - как у outbox
+    PAYMENT_EVENTS_BATCH: int = 100
+    PAYMENT_EVENTS_POLL_INTERVAL: float = 5
+    PAYMENT_EVENTS_MAX_ATTEMPTS: int = 10
+
+    ORDERS_ENRICHMENT_CONCURRENCY: int = 8
+    ORDERS_ENRICHMENT_TIMEOUT: float = 5.0
+
     TEMPLATES: str
 
     YOOKASSA: YookassaSettings
     CLOUDPAYMENTS: CloudPaymentSettings
 
+    @model_validator(mode="after")
+    def check_media_storage(self) -> "Settings":
+        # Без ключей S3MediaStorage падает только на первой загрузке
+        if self.MEDIA_STORAGE == "s3" and not (self.S3_ACCESS_KEY and self.S3_SECRET_KEY):
+            raise ValueError("MEDIA_STORAGE=s3 requires S3_ACCESS_KEY and S3_SECRET_KEY")
+        return self
+
     @property
     def async_database_url(self):
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}/{self.POSTGRES_DB}"
@@ -0,0 +1,13 @@
+from fastapi import HTTPException
+from fastapi.params import Depends
+from starlette import status
+
+from app.core.dependencies.get_current_user import get_current_user
+from app.modules.users.entities import UserEntity
+
+
+async def get_current_admin(current_user: UserEntity = Depends(get_current_user)):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Admin access required')
+
+    return current_user
@@ -0,0 +1,329 @@
+import asyncio
+import datetime
+import hashlib
+import logging
+import time
+import typing as tp
+
+from fastapi import Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import DateTime, Integer, String, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.config import settings
+from app.core.db.session import AsyncSessionLocal, Base
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyEntity(Base):
+    """Результат запроса с заголовком Idempotency-Key (response NULL - запрос выполняется)"""
+
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String, nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    response: Mapped[tp.Any] = mapped_column(JSONB(none_as_null=True), nullable=True)
+    # До какого момента ключ занят выполняющимся запросом
+    locked_until: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+
+class StoredResponse(tp.NamedTuple):
+    fingerprint: str
+    status_code: int
+    content: tp.Any
+
+
+class IdempotencyStore:
+    """
+    Хранилище результатов запросов по ключу идемпотентности.
+
+    Первый уровень - LRU в памяти процесса: повтор на том же воркере
+    отвечает без обращения к БД, а параллельный дубль ждет завершения
+    оригинала на asyncio.Event. Второй (опционально) - таблица
+    idempotency_keys, общая для всех воркеров: ключ захватывается одним
+    INSERT ... ON CONFLICT, поэтому выполнить запрос может только один.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        lock_ttl: float,
+        wait: float,
+        maxsize: int,
+        db_tier: bool = True,
+    ):
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait = wait
+        self.db_tier = db_tier
+        self.memory: TTLCache[str, StoredResponse] = TTLCache(maxsize, ttl)
+        self._inflight: tp.Dict[str, asyncio.Event] = {}
+
+    @staticmethod
+    def fingerprint(request: Request, body: bytes) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{request.method} {request.url.path}\n".encode())
+        digest.update(body)
+        return digest.hexdigest()
+
+    async def acquire(self, key: str, fingerprint: str) -> tp.Optional[StoredResponse]:
+        """
+        Захватывает ключ или возвращает сохраненный ответ.
+
+        :return: None, если запрос нужно выполнить (затем complete/release)
+        :raise HTTPException: 409 - запрос с этим ключом еще выполняется,
+            422 - ключ уже использован с другим телом запроса
+        """
+        deadline = time.monotonic() + self.wait
+        while True:
+            found, stored, _ = self.memory.get(key)
+            if found:
+                return self._check(stored, fingerprint)
+
+            event = self._inflight.get(key)
+            if event is not None:
+                if not await self._wait_event(event, deadline):
+                    raise HTTPException(
+                        status_code=409,
+                        detail="A request with this Idempotency-Key is in progress",
+                    )
+                continue
+
+            self._inflight[key] = asyncio.Event()
+            if not self.db_tier:
+                return None
+
+            try:
+                stored = await self._db_acquire(key, fingerprint, deadline)
+            except BaseException:
+                self._inflight.pop(key).set()
+                raise
+            if stored is not None:
+                self._inflight.pop(key).set()
+                self.memory.set(key, stored)
+                return self._check(stored, fingerprint)
+            return None
+
+    async def complete(
+        self, key: str, fingerprint: str, status_code: int, content: tp.Any
+    ):
+        stored = StoredResponse(fingerprint, status_code, content)
+        try:
+            if self.db_tier:
+                await self._db_complete(key, stored)
+            self.memory.set(key, stored)
+        finally:
+            self._release_local(key)
+
+    async def release(self, key: str):
+        """Освобождает ключ без сохранения ответа: повтор выполнит запрос заново"""
+        try:
+            if self.db_tier:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        delete(IdempotencyKeyEntity).where(
+                            IdempotencyKeyEntity.key == key,
+                            IdempotencyKeyEntity.response.is_(None),
+                        )
+                    )
+                    await db.commit()
+        finally:
+            self._release_local(key)
+
+    async def purge_expired(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(IdempotencyKeyEntity).where(
+                    IdempotencyKeyEntity.expires_at < func.now()
+                )
+            )
+            await db.commit()
+        return result.rowcount
+
+    def _release_local(self, key: str):
+        event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    @staticmethod
+    def _check(stored: StoredResponse, fingerprint: str) -> StoredResponse:
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        return stored
+
+    @staticmethod
+    async def _wait_event(event: asyncio.Event, deadline: float) -> bool:
+        try:
+            await asyncio.wait_for(event.wait(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _db_acquire(
+        self, key: str, fingerprint: str, deadline: float
+    ) -> tp.Optional[StoredResponse]:
+        while True:
+            now = datetime.datetime.now(datetime.UTC)
+            stmt = insert(IdempotencyKeyEntity).values(
+                key=key,
+                fingerprint=fingerprint,
+                status_code=None,
+                response=None,
+                locked_until=now + datetime.timedelta(seconds=self.lock_ttl),
+                expires_at=now + datetime.timedelta(seconds=self.ttl),
+            )
+            # Занять можно новый ключ, истекший или брошенный упавшим воркером
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[IdempotencyKeyEntity.key],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in (
+                        "fingerprint",
+                        "status_code",
+                        "response",
+                        "locked_until",
+                        "expires_at",
+                    )
+                },
+                where=or_(
+                    IdempotencyKeyEntity.expires_at < now,
+                    IdempotencyKeyEntity.response.is_(None)
+                    & (IdempotencyKeyEntity.locked_until < now),
+                ),
+            ).returning(IdempotencyKeyEntity.key)
+
+            async with AsyncSessionLocal() as db:
+                claimed = (await db.execute(stmt)).scalar_one_or_none()
+                await db.commit()
+                if claimed is not None:
+                    return None
+
+                row = (
+                    await db.execute(
+                        select(IdempotencyKeyEntity).where(
+                            IdempotencyKeyEntity.key == key
+                        )
+                    )
+                ).scalar_one_or_none()
+
+            if row is not None and row.response is not None:
+                return StoredResponse(row.fingerprint, row.status_code, row.response)
+
+            # Запрос выполняется на другом воркере
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is in progress",
+                )
+            await asyncio.sleep(0.1)
+
+    async def _db_complete(self, key: str, stored: StoredResponse):
+        async with AsyncSessionLocal() as db:
+            row = await db.get(IdempotencyKeyEntity, key)
+            if row is None:
+                return
+            row.status_code = stored.status_code
+            row.response = stored.content
+            await db.commit()
+
+
+class IdempotencyGuard:
+    """
+    Выполняет тело обработчика не больше одного раза на ключ:
+
+        async with IdempotencyGuard(scope, key, request) as guard:
+            if guard.replay is not None:
+                return guard.replay
+            ...
+            return guard.save(result)
+
+    Сохраняется только результат, переданный в save(); при исключении или
+    ответе без save() ключ освобождается и повтор выполнит запрос заново.
+    Без заголовка Idempotency-Key guard ничего не делает.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        key: tp.Optional[str],
+        request: Request,
+        store: tp.Optional[IdempotencyStore] = None,
+    ):
+        self.key = f"{scope}:{key}" if key else None
+        self.request = request
+        self.store = store or idempotency_store
+        self.replay: tp.Optional[JSONResponse] = None
+        self._saved: tp.Optional[tp.Tuple[int, tp.Any]] = None
+        self._fingerprint: tp.Optional[str] = None
+
+    async def __aenter__(self) -> "IdempotencyGuard":
+        if self.key is None:
+            return self
+
+        fingerprint = self.store.fingerprint(self.request, await self.request.body())
+        stored = await self.store.acquire(self.key, fingerprint)
+        if stored is not None:
+            self.replay = JSONResponse(
+                stored.content,
+                status_code=stored.status_code,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        else:
+            self._fingerprint = fingerprint
+        return self
+
+    def save(self, content: tp.Any, status_code: int = 200) -> tp.Any:
+        self._saved = (status_code, jsonable_encoder(content))
+        return content
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._fingerprint is None:
+            return
+        if exc_type is None and self._saved is not None:
+            await self.store.complete(self.key, self._fingerprint, *self._saved)
+        else:
+            await self.store.release(self.key)
+
+
+async def get_idempotency_key(
+    idempotency_key: tp.Optional[str] = Header(None, alias="Idempotency-Key"),
+) -> tp.Optional[str]:
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+    return idempotency_key
+
+
+idempotency_store = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL,
+    lock_ttl=settings.IDEMPOTENCY_LOCK_TTL,
+    wait=settings.IDEMPOTENCY_WAIT,
+    maxsize=settings.IDEMPOTENCY_CACHE_MAXSIZE,
+    db_tier=settings.IDEMPOTENCY_DB_TIER,
+)
+
+
+async def run_idempotency_purge_loop():
+    """Удаление истекших ключей из idempotency_keys"""
+    while True:
+        try:
+            await idempotency_store.purge_expired()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Idempotency keys purge failed: %s", e)
+        await asyncio.sleep(settings.IDEMPOTENCY_PURGE_INTERVAL)
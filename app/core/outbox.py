@@ -0,0 +1,273 @@
+import asyncio
+import datetime
+import enum
+import logging
+import random
+import typing as tp
+import uuid
+
+from sqlalchemy import DateTime, Enum, Index, Integer, String, select, text, update
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.config import settings
+from app.core.db.session import AsyncSessionLocal, Base
+
+logger = logging.getLogger(__name__)
+
+OutboxHandler = tp.Callable[[AsyncSession, dict, int], tp.Awaitable[None]]
+
+
+class OutboxStatuses(str, enum.Enum):
+    # Ждет обработки (или повтора после ошибки) не раньше next_attempt_at
+    PENDING = "PENDING"
+    DONE = "DONE"
+    # Попытки исчерпаны, нужен ручной разбор
+    DEAD = "DEAD"
+
+
+class OutboxMessageEntity(Base):
+    """Задача для фонового воркера, записанная в одной транзакции с бизнес-данными"""
+
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        # Очередь воркера: только ожидающие сообщения в порядке готовности
+        Index(
+            "ix_outbox_messages_pending_next_attempt_at",
+            "next_attempt_at",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    topic: Mapped[str] = mapped_column(String, nullable=False)
+    # Ключ дедупликации: повторная постановка той же задачи игнорируется
+    key: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    status: Mapped[OutboxStatuses] = mapped_column(
+        Enum(OutboxStatuses, name="outbox_status_enum", native_enum=False),
+        nullable=False,
+        default=OutboxStatuses.PENDING,
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC),
+    )
+    next_attempt_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    processed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class ClaimedMessage(tp.NamedTuple):
+    id: str
+    topic: str
+    payload: dict
+    attempts: int
+
+
+_handlers: tp.Dict[str, OutboxHandler] = {}
+
+
+def outbox_handler(topic: str) -> tp.Callable[[OutboxHandler], OutboxHandler]:
+    """
+    Регистрирует обработчик сообщений topic.
+
+    Обработчик получает собственную сессию, payload и номер попытки (с 1)
+    и должен быть идемпотентным: после падения воркера сообщение
+    обрабатывается повторно. Коммит - забота обработчика.
+    """
+
+    def decorator(handler: OutboxHandler) -> OutboxHandler:
+        _handlers[topic] = handler
+        return handler
+
+    return decorator
+
+
+async def enqueue(db: AsyncSession, topic: str, key: str, payload: dict):
+    """
+    Добавляет сообщение в outbox в текущей транзакции (без коммита).
+
+    Сообщение станет видно воркеру только вместе с остальными изменениями
+    транзакции; сообщение с уже существующим key не добавляется.
+    """
+    now = datetime.datetime.now(datetime.UTC)
+    await db.execute(
+        insert(OutboxMessageEntity)
+        .values(
+            id=str(uuid.uuid4()),
+            topic=topic,
+            key=key,
+            payload=payload,
+            status=OutboxStatuses.PENDING,
+            attempts=0,
+            created_at=now,
+            next_attempt_at=now,
+        )
+        .on_conflict_do_nothing(index_elements=[OutboxMessageEntity.key])
+    )
+
+
+def get_retry_delay(attempts: int) -> float:
+    """Экспоненциальная задержка перед повтором с джиттером ±20%"""
+    delay = min(
+        settings.OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.OUTBOX_RETRY_MAX_DELAY,
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+class OutboxWorker:
+    """
+    Фоновый воркер, разбирающий outbox.
+
+    Сообщения захватываются пачкой через SKIP LOCKED и откладываются на
+    OUTBOX_LEASE секунд, поэтому несколько процессов не берут одно сообщение,
+    а сообщение упавшего воркера будет обработано после истечения аренды.
+    Ошибка обработчика переносит сообщение на более позднее время; после
+    OUTBOX_MAX_ATTEMPTS попыток оно переходит в DEAD.
+    """
+
+    def __init__(self):
+        self.batch_size = settings.OUTBOX_BATCH
+        self.semaphore = asyncio.Semaphore(settings.OUTBOX_CONCURRENCY)
+        self._wakeup = asyncio.Event()
+
+    def notify(self):
+        """Разбудить воркер этого процесса, не дожидаясь OUTBOX_POLL_INTERVAL"""
+        self._wakeup.set()
+
+    async def claim(self) -> tp.List[ClaimedMessage]:
+        now = datetime.datetime.now(datetime.UTC)
+        due_ids = (
+            select(OutboxMessageEntity.id)
+            .where(
+                OutboxMessageEntity.status == OutboxStatuses.PENDING,
+                OutboxMessageEntity.next_attempt_at <= now,
+            )
+            .order_by(OutboxMessageEntity.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(OutboxMessageEntity)
+                .where(OutboxMessageEntity.id.in_(due_ids))
+                .values(
+                    attempts=OutboxMessageEntity.attempts + 1,
+                    next_attempt_at=now
+                    + datetime.timedelta(seconds=settings.OUTBOX_LEASE),
+                )
+                .returning(
+                    OutboxMessageEntity.id,
+                    OutboxMessageEntity.topic,
+                    OutboxMessageEntity.payload,
+                    OutboxMessageEntity.attempts,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            claimed = [ClaimedMessage(*row) for row in result.all()]
+            await db.commit()
+        return claimed
+
+    async def process_batch(self) -> int:
+        """
+        :return: количество захваченных сообщений
+        """
+        claimed = await self.claim()
+        await asyncio.gather(*(self._process_one(message) for message in claimed))
+        return len(claimed)
+
+    async def _process_one(self, message: ClaimedMessage):
+        async with self.semaphore:
+            handler = _handlers.get(message.topic)
+            # У каждого сообщения своя сессия: AsyncSession нельзя делить между задачами
+            async with AsyncSessionLocal() as db:
+                try:
+                    if handler is None:
+                        raise LookupError(f"No outbox handler for topic {message.topic}")
+                    await handler(db, message.payload, message.attempts)
+                except Exception as e:
+                    await db.rollback()
+                    await self._fail(db, message, e)
+                    return
+
+                await db.execute(
+                    update(OutboxMessageEntity)
+                    .where(OutboxMessageEntity.id == message.id)
+                    .values(
+                        status=OutboxStatuses.DONE,
+                        last_error=None,
+                        processed_at=datetime.datetime.now(datetime.UTC),
+                    )
+                )
+                await db.commit()
+
+    async def _fail(self, db: AsyncSession, message: ClaimedMessage, error: Exception):
+        now = datetime.datetime.now(datetime.UTC)
+        values = {"last_error": f"{type(error).__name__}: {error}"[:1000]}
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            logger.error(
+                "Outbox message %s (%s) moved to dead letters after %s attempts: %s",
+                message.id,
+                message.topic,
+                message.attempts,
+                error,
+            )
+            values.update(status=OutboxStatuses.DEAD, processed_at=now)
+        else:
+            logger.warning(
+                "Outbox message %s (%s) failed, attempt %s: %s",
+                message.id,
+                message.topic,
+                message.attempts,
+                error,
+            )
+            values.update(
+                next_attempt_at=now
+                + datetime.timedelta(seconds=get_retry_delay(message.attempts))
+            )
+
+        await db.execute(
+            update(OutboxMessageEntity)
+            .where(OutboxMessageEntity.id == message.id)
+            .values(**values)
+        )
+        await db.commit()
+
+    async def run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Outbox processing failed: %s", e)
+                processed = 0
+
+            # Полная пачка - в очереди есть еще сообщения, продолжаем без паузы
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), settings.OUTBOX_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+
+outbox_worker = OutboxWorker()
+
+
+async def run_outbox_worker_loop():
+    await outbox_worker.run()
@@ -0,0 +1,575 @@
+import asyncio
+import base64
+import contextlib
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import os
+import shutil
+import tempfile
+import typing as tp
+import uuid
+from abc import ABC, abstractmethod
+from urllib.parse import quote, unquote
+from xml.etree import ElementTree
+
+import aiofiles
+import aiofiles.os
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Chunks = tp.AsyncIterable[bytes]
+
+CHUNK_SIZE = 64 * 1024
+# Минимальный размер части multipart upload в S3 (кроме последней)
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class StorageError(ValueError):
+    pass
+
+
+class DirectUploadNotSupportedError(StorageError):
+    pass
+
+
+class PresignedUpload(tp.NamedTuple):
+    """Форма для загрузки файла клиентом напрямую в хранилище (POST multipart/form-data)"""
+
+    url: str
+    fields: tp.Dict[str, str]
+    key: str
+    expires_in: int
+
+
+async def iter_file(path: str, chunk_size: int = CHUNK_SIZE) -> tp.AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as f:
+        while chunk := await f.read(chunk_size):
+            yield chunk
+
+
+class MediaStorage(ABC):
+    """
+    Хранилище медиафайлов. Ключ - относительный путь вида photos/ab/cdef.jpg,
+    в БД сохраняется публичный URL, полученный из url(key).
+    """
+
+    # Каталог, из которого файлы доступны напрямую; None для удаленных хранилищ
+    local_root: tp.Optional[str] = None
+
+    def __init__(self):
+        self._tasks: tp.Set[asyncio.Task] = set()
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        pass
+
+    @abstractmethod
+    def key_for_url(self, url: str) -> tp.Optional[str]:
+        """Ключ файла по его URL; None, если URL не принадлежит хранилищу"""
+        pass
+
+    @abstractmethod
+    async def save(
+        self, key: str, chunks: Chunks, content_type: tp.Optional[str] = None
+    ) -> str:
+        """Потоково сохраняет файл и возвращает его URL"""
+        pass
+
+    async def save_file(
+        self,
+        key: str,
+        path: str,
+        content_type: tp.Optional[str] = None,
+        move: bool = False,
+    ) -> str:
+        """Сохраняет локальный файл; move=True удаляет исходный файл после загрузки"""
+        url = await self.save(key, iter_file(path), content_type)
+        if move:
+            with contextlib.suppress(FileNotFoundError):
+                await aiofiles.os.remove(path)
+        return url
+
+    @property
+    def upload_dir(self) -> str:
+        """Каталог для временных файлов принимаемых загрузок"""
+        return os.path.join(tempfile.gettempdir(), "media-uploads")
+
+    @abstractmethod
+    async def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def local_copy(self, key: str) -> tp.AsyncContextManager[str]:
+        """Путь к локальной копии файла на время обработки"""
+        pass
+
+    def presign_upload(
+        self, key: str, content_type: str, max_size: int, expires_in: int
+    ) -> PresignedUpload:
+        raise DirectUploadNotSupportedError(
+            f"{type(self).__name__} does not support direct uploads"
+        )
+
+    async def close(self):
+        pass
+
+    def schedule_delete(self, keys: tp.Iterable[str]):
+        """Удалить файлы в фоне, не задерживая ответ"""
+        for key in keys:
+            task = asyncio.create_task(self.delete(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Media delete failed: %s", task.exception())
+
+
+class LocalMediaStorage(MediaStorage):
+    """Файлы на диске в root, раздаются приложением по base_url (см. /media в main.py)"""
+
+    def __init__(self, root: str, base_url: str = "/media/"):
+        super().__init__()
+        self.root = root
+        self.local_root = root
+        self.base_url = base_url
+
+    def path(self, key: str) -> str:
+        relative = os.path.normpath(key)
+        if relative.startswith("..") or os.path.isabs(relative):
+            raise StorageError(f"Invalid media key {key}")
+        return os.path.join(self.root, relative)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}{key}"
+
+    def key_for_url(self, url: str) -> tp.Optional[str]:
+        if not url.startswith(self.base_url):
+            return None
+        key = url[len(self.base_url) :]
+        relative = os.path.normpath(key)
+        if relative.startswith("..") or os.path.isabs(relative):
+            return None
+        return key
+
+    async def save(
+        self, key: str, chunks: Chunks, content_type: tp.Optional[str] = None
+    ) -> str:
+        path = self.path(key)
+        await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Запись во временный файл и rename: читатели не видят недописанный файл
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            async with aiofiles.open(tmp, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+            await aiofiles.os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                await aiofiles.os.remove(tmp)
+            raise
+        return self.url(key)
+
+    @property
+    def upload_dir(self) -> str:
+        # Рядом с root, а не внутри: недописанные загрузки не раздаются по /media,
+        # а перенос в хранилище остается rename в пределах одной файловой системы
+        return f"{os.path.normpath(self.root)}.uploads"
+
+    async def save_file(
+        self,
+        key: str,
+        path: str,
+        content_type: tp.Optional[str] = None,
+        move: bool = False,
+    ) -> str:
+        if not move:
+            return await super().save_file(key, path, content_type)
+
+        target = self.path(key)
+        await aiofiles.os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            await aiofiles.os.replace(path, target)
+        except OSError:
+            # Разные файловые системы: копирование
+            return await super().save_file(key, path, content_type, move=True)
+        return self.url(key)
+
+    async def delete(self, key: str):
+        with contextlib.suppress(FileNotFoundError):
+            await aiofiles.os.remove(self.path(key))
+
+    @contextlib.asynccontextmanager
+    async def local_copy(self, key: str) -> tp.AsyncIterator[str]:
+        path = self.path(key)
+        if not await aiofiles.os.path.isfile(path):
+            raise StorageError(f"Media file {key} not found")
+        yield path
+
+
+class S3Signer:
+    """Подпись запросов AWS Signature V4 для S3-совместимых хранилищ (MinIO)"""
+
+    algorithm = "AWS4-HMAC-SHA256"
+
+    def __init__(self, access_key: str, secret_key: str, region: str):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+
+    @staticmethod
+    def _hmac(key: bytes, msg: str) -> bytes:
+        return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+    def _signing_key(self, date: str) -> bytes:
+        key = self._hmac(f"AWS4{self.secret_key}".encode(), date)
+        key = self._hmac(key, self.region)
+        key = self._hmac(key, "s3")
+        return self._hmac(key, "aws4_request")
+
+    def _scope(self, date: str) -> str:
+        return f"{date}/{self.region}/s3/aws4_request"
+
+    @staticmethod
+    def _timestamps(now: tp.Optional[datetime.datetime]) -> tp.Tuple[str, str]:
+        now = now or datetime.datetime.now(datetime.UTC)
+        return now.strftime("%Y%m%dT%H%M%SZ"), now.strftime("%Y%m%d")
+
+    @staticmethod
+    def canonical_query(params: tp.Mapping[str, str]) -> str:
+        return "&".join(
+            f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+            for k, v in sorted(params.items())
+        )
+
+    def _signature(
+        self,
+        method: str,
+        path: str,
+        params: tp.Mapping[str, str],
+        headers: tp.Mapping[str, str],
+        payload_hash: str,
+        amz_date: str,
+        date: str,
+    ) -> tp.Tuple[str, str]:
+        signed = sorted(k.lower() for k in headers)
+        lowered = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+        canonical_request = "\n".join(
+            [
+                method,
+                quote(path, safe="/-_.~"),
+                self.canonical_query(params),
+                "".join(f"{k}:{lowered[k]}\n" for k in signed),
+                ";".join(signed),
+                payload_hash,
+            ]
+        )
+        string_to_sign = "\n".join(
+            [
+                self.algorithm,
+                amz_date,
+                self._scope(date),
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+        signature = hmac.new(
+            self._signing_key(date), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        return signature, ";".join(signed)
+
+    def sign_headers(
+        self,
+        method: str,
+        host: str,
+        path: str,
+        params: tp.Mapping[str, str],
+        headers: tp.Optional[tp.Mapping[str, str]] = None,
+        now: tp.Optional[datetime.datetime] = None,
+        payload_hash: str = "UNSIGNED-PAYLOAD",
+    ) -> tp.Dict[str, str]:
+        """
+        Заголовки Authorization/x-amz-* для запроса.
+
+        По умолчанию тело не хэшируется (UNSIGNED-PAYLOAD), иначе
+        payload_hash - sha256 тела в hex.
+        """
+        amz_date, date = self._timestamps(now)
+        headers = {
+            **(headers or {}),
+            "host": host,
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+        }
+        signature, signed_headers = self._signature(
+            method, path, params, headers, payload_hash, amz_date, date
+        )
+        headers["Authorization"] = (
+            f"{self.algorithm} Credential={self.access_key}/{self._scope(date)}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del headers["host"]
+        return headers
+
+    def presign_post(
+        self,
+        bucket: str,
+        key: str,
+        conditions: tp.List[tp.Any],
+        expires_in: int,
+        now: tp.Optional[datetime.datetime] = None,
+    ) -> tp.Dict[str, str]:
+        """Поля формы POST Object с политикой, ограничивающей ключ, тип и размер"""
+        now = now or datetime.datetime.now(datetime.UTC)
+        amz_date, date = self._timestamps(now)
+        credential = f"{self.access_key}/{self._scope(date)}"
+        fields = {
+            "key": key,
+            "x-amz-algorithm": self.algorithm,
+            "x-amz-credential": credential,
+            "x-amz-date": amz_date,
+        }
+        expiration = now + datetime.timedelta(seconds=expires_in)
+        policy = {
+            "expiration": expiration.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "conditions": [
+                {"bucket": bucket},
+                *({k: v} for k, v in fields.items()),
+                *conditions,
+            ],
+        }
+        fields["policy"] = base64.b64encode(json.dumps(policy).encode()).decode()
+        fields["x-amz-signature"] = hmac.new(
+            self._signing_key(date), fields["policy"].encode(), hashlib.sha256
+        ).hexdigest()
+        return fields
+
+
+class S3MediaStorage(MediaStorage):
+    """
+    Бакет S3-совместимого хранилища (MinIO из docker-compose).
+
+    Файлы больше part_size загружаются через multipart upload: в памяти
+    держится не больше одной части. Клиенты могут загружать файлы напрямую
+    в бакет по presigned POST, не передавая байты через API.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        public_url: tp.Optional[str] = None,
+        upload_url: tp.Optional[str] = None,
+        part_size: int = 8 * 1024 * 1024,
+    ):
+        super().__init__()
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.public_url = (public_url or f"{self.endpoint_url}/{bucket}").rstrip("/")
+        # Форма presigned POST отправляется браузером, а не приложением
+        self.upload_url = (upload_url or self.public_url).rstrip("/")
+        self.part_size = max(part_size, S3_MIN_PART_SIZE)
+        self.signer = S3Signer(access_key, secret_key, region)
+        self._client: tp.Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.endpoint_url,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _path(self, key: str) -> str:
+        return f"/{self.bucket}/{key}"
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{quote(key)}"
+
+    def key_for_url(self, url: str) -> tp.Optional[str]:
+        prefix = f"{self.public_url}/"
+        if not url.startswith(prefix):
+            return None
+        return unquote(url[len(prefix) :])
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        params: tp.Optional[tp.Dict[str, str]] = None,
+        headers: tp.Optional[tp.Dict[str, str]] = None,
+        content: tp.Optional[bytes] = None,
+    ) -> httpx.Response:
+        params = params or {}
+        path = self._path(key)
+        signed = self.signer.sign_headers(
+            method, self.client.base_url.netloc.decode(), path, params, headers
+        )
+        # Строка запроса собирается так же, как при подписи: httpx кодирует иначе
+        url = quote(path, safe="/-_.~")
+        if params:
+            url = f"{url}?{self.signer.canonical_query(params)}"
+        try:
+            response = await self.client.request(
+                method, url, headers=signed, content=content
+            )
+        except httpx.HTTPError as e:
+            raise StorageError(f"S3 {method} {key} failed: {e}") from e
+        if response.status_code >= 300:
+            raise StorageError(
+                f"S3 {method} {key} failed: {response.status_code} {response.text}"
+            )
+        return response
+
+    async def save(
+        self, key: str, chunks: Chunks, content_type: tp.Optional[str] = None
+    ) -> str:
+        headers = {"content-type": content_type} if content_type else {}
+        buffer = bytearray()
+        upload_id: tp.Optional[str] = None
+        parts: tp.List[tp.Tuple[int, str]] = []
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                if len(buffer) < self.part_size:
+                    continue
+                if upload_id is None:
+                    upload_id = await self._create_multipart(key, headers)
+                parts.append(await self._upload_part(key, upload_id, len(parts) + 1, buffer))
+                buffer = bytearray()
+
+            if upload_id is None:
+                # Файл меньше одной части: обычный PUT
+                await self._request("PUT", key, headers=headers, content=bytes(buffer))
+                return self.url(key)
+
+            if buffer or not parts:
+                parts.append(
+                    await self._upload_part(key, upload_id, len(parts) + 1, buffer)
+                )
+            await self._complete_multipart(key, upload_id, parts)
+        except BaseException:
+            if upload_id is not None:
+                with contextlib.suppress(Exception):
+                    await self._request("DELETE", key, params={"uploadId": upload_id})
+            raise
+        return self.url(key)
+
+    async def _create_multipart(self, key: str, headers: tp.Dict[str, str]) -> str:
+        response = await self._request("POST", key, params={"uploads": ""}, headers=headers)
+        root = ElementTree.fromstring(response.content)
+        upload_id = next(
+            (el.text for el in root.iter() if el.tag.endswith("UploadId")), None
+        )
+        if not upload_id:
+            raise StorageError(f"S3 did not return UploadId for {key}")
+        return upload_id
+
+    async def _upload_part(
+        self, key: str, upload_id: str, number: int, data: bytearray
+    ) -> tp.Tuple[int, str]:
+        response = await self._request(
+            "PUT",
+            key,
+            params={"partNumber": str(number), "uploadId": upload_id},
+            content=bytes(data),
+        )
+        return number, response.headers["etag"]
+
+    async def _complete_multipart(
+        self, key: str, upload_id: str, parts: tp.List[tp.Tuple[int, str]]
+    ):
+        body = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in parts
+        )
+        response = await self._request(
+            "POST",
+            key,
+            params={"uploadId": upload_id},
+            headers={"content-type": "application/xml"},
+            content=f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode(),
+        )
+        # S3 может вернуть 200 с ошибкой в теле
+        if b"<Error>" in response.content:
+            raise StorageError(f"S3 multipart upload {key} failed: {response.text}")
+
+    async def delete(self, key: str):
+        await self._request("DELETE", key)
+
+    @contextlib.asynccontextmanager
+    async def local_copy(self, key: str) -> tp.AsyncIterator[str]:
+        directory = tempfile.mkdtemp(prefix="media-")
+        path = os.path.join(directory, os.path.basename(key) or "file")
+        try:
+            signed = self.signer.sign_headers(
+                "GET", self.client.base_url.netloc.decode(), self._path(key), {}
+            )
+            async with self.client.stream(
+                "GET", quote(self._path(key), safe="/-_.~"), headers=signed
+            ) as response:
+                if response.status_code >= 300:
+                    raise StorageError(
+                        f"S3 GET {key} failed: {response.status_code}"
+                    )
+                async with aiofiles.open(path, "wb") as f:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        await f.write(chunk)
+            yield path
+        finally:
+            await asyncio.to_thread(shutil.rmtree, directory, True)
+
+    def presign_upload(
+        self, key: str, content_type: str, max_size: int, expires_in: int
+    ) -> PresignedUpload:
+        fields = self.signer.presign_post(
+            self.bucket,
+            key,
+            [
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+            ],
+            expires_in,
+        )
+        fields["Content-Type"] = content_type
+        return PresignedUpload(
+            url=self.upload_url,
+            fields=fields,
+            key=key,
+            expires_in=expires_in,
+        )
+
+
+def create_media_storage() -> MediaStorage:
+    if settings.MEDIA_STORAGE == "s3":
+        return S3MediaStorage(
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            bucket=settings.S3_BUCKET,
+            access_key=settings.S3_ACCESS_KEY,
+            secret_key=settings.S3_SECRET_KEY,
+            region=settings.S3_REGION,
+            public_url=settings.S3_PUBLIC_URL,
+            upload_url=settings.S3_UPLOAD_URL,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+        )
+    return LocalMediaStorage(settings.MEDIA_ROOT)
+
+
+media_storage = create_media_storage()
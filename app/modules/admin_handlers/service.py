@@ -103,6 +103,7 @@ class ExcelService:
         stmt = (
             select(
                 OrderEntity.id,
+                OrderEntity.stock_shortage_at,
                 UserEntity.first_name,
                 UserEntity.last_name,
                 UserEntity.phone,
@@ -148,6 +149,7 @@ class ExcelService:
             "Цена",
             "Количество",
             "Сумма",
+            "Нет остатка (возврат/дозаказ)",
         ]
 
         ws.append(headers)
@@ -170,11 +172,12 @@ class ExcelService:
                     order.price,
                     order.quantity,
                     order.amount,
+                    "да" if order.stock_shortage_at else "",
                 ]
             )
 
         total_amount = sum(order.amount for order in orders_data)
-        ws.append(["ИТОГО:", "", "", "", "", "", "", "", "", "", "", total_amount])
+        ws.append(["ИТОГО:", "", "", "", "", "", "", "", "", "", "", total_amount, ""])
         ws[f"L{ws.max_row}"].font = Font(bold=True)
 
         output = BytesIO()
@@ -76,10 +76,15 @@ class CartService:
         result = await self.db.execute(stmt)
         return result.scalars().all()
 
-    async def clear_cart(self, user: UserEntity):
+    async def clear_cart(self, user: UserEntity, commit: bool = True):
+        """
+        :param commit: False - удаление остается в текущей транзакции
+            (например, создания заказа)
+        """
         stmt = (
             delete(GoodsInCart)
-            .where(GoodsInCart.user == user)
+            .where(GoodsInCart.user_id == user.id)
         )
         await self.db.execute(stmt)
-        await self.db.commit()
+        if commit:
+            await self.db.commit()
@@ -0,0 +1,109 @@
+import datetime
+import typing as tp
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.db.session import AsyncSessionLocal
+from app.modules.delivery.entities import DeliveryCacheEntity
+from app.utils.cache import TTLCache
+
+Fetch = tp.Callable[[], tp.Awaitable[list]]
+
+
+class DeliveryPointCache:
+    """
+    Кэш сырых записей ПВЗ CDEK по коду пункта и по коду города.
+
+    Первый уровень - LRU в памяти процесса со stale-while-revalidate,
+    второй (опционально) - таблица delivery_cache в Postgres, общая для всех
+    воркеров и переживающая рестарт. Если CDEK недоступен, отдается
+    последняя сохраненная во втором уровне копия.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float,
+        maxsize: int,
+        db_tier: bool = False,
+    ):
+        self.ttl = ttl
+        self.memory: TTLCache[str, list] = TTLCache(maxsize, ttl, stale_ttl)
+        self.db_tier = db_tier
+
+    @staticmethod
+    def code_key(code: str) -> str:
+        return f"cdek:pvz:code:{code}"
+
+    @staticmethod
+    def city_key(city_code: tp.Union[int, str]) -> str:
+        return f"cdek:pvz:city:{city_code}"
+
+    async def get_by_code(self, code: str, fetch: Fetch) -> list:
+        key = self.code_key(code)
+        return await self.memory.get_or_load(key, lambda: self._load(key, fetch))
+
+    async def get_by_city(self, city_code: tp.Union[int, str], fetch: Fetch) -> list:
+        key = self.city_key(city_code)
+
+        async def fetch_and_warm() -> list:
+            points = await fetch()
+            # Список города содержит те же записи, что и запрос по коду
+            for point in points:
+                if point.get("code"):
+                    self.memory.set(self.code_key(point["code"]), [point])
+            return points
+
+        return await self.memory.get_or_load(
+            key, lambda: self._load(key, fetch_and_warm)
+        )
+
+    async def _load(self, key: str, fetch: Fetch) -> list:
+        if not self.db_tier:
+            return await fetch()
+
+        stored = await self._db_get(key)
+        if stored is not None:
+            age = datetime.datetime.now(datetime.UTC) - stored.updated_at
+            if age.total_seconds() <= self.ttl:
+                return stored.value
+
+        try:
+            value = await fetch()
+        except Exception:
+            if stored is not None:
+                return stored.value
+            raise
+
+        await self._db_set(key, value)
+        return value
+
+    @staticmethod
+    async def _db_get(key: str) -> tp.Optional[DeliveryCacheEntity]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DeliveryCacheEntity).where(DeliveryCacheEntity.key == key)
+            )
+            return result.scalars().first()
+
+    @staticmethod
+    async def _db_set(key: str, value: list):
+        now = datetime.datetime.now(datetime.UTC)
+        stmt = insert(DeliveryCacheEntity).values(key=key, value=value, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DeliveryCacheEntity.key],
+            set_={"value": stmt.excluded.value, "updated_at": now},
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+
+delivery_point_cache = DeliveryPointCache(
+    ttl=settings.CDEK_PVZ_CACHE_TTL,
+    stale_ttl=settings.CDEK_PVZ_CACHE_STALE_TTL,
+    maxsize=settings.CDEK_PVZ_CACHE_MAXSIZE,
+    db_tier=settings.CDEK_PVZ_CACHE_DB_TIER,
+)
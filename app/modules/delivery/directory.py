@@ -0,0 +1,186 @@
+import asyncio
+import datetime
+import logging
+import typing as tp
+
+from sqlalchemy import delete, select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.db.session import engine
+from app.modules.delivery.entities import CDEKCityEntity, CDEKDeliveryPointEntity
+from app.modules.delivery.methods.cdek import CDEKDeliveryMethod
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg_advisory_lock: синхронизацию выполняет только один воркер
+SYNC_LOCK_KEY = 734_201
+
+
+class CDEKDirectorySync:
+    """Выгрузка справочников городов и ПВЗ CDEK в локальные таблицы"""
+
+    def __init__(self, method: tp.Optional[CDEKDeliveryMethod] = None):
+        self.method = method or CDEKDeliveryMethod()
+        self.page_size = settings.CDEK_DIRECTORY_SYNC_PAGE_SIZE
+
+    async def sync_all(self) -> bool:
+        """
+        Синхронизирует справочники всех стран из CDEKDeliveryMethod._get_countries().
+
+        :return: False, если синхронизация уже идет в другом процессе
+        """
+        async with engine.connect() as conn:
+            locked = await conn.scalar(
+                select(func.pg_try_advisory_lock(SYNC_LOCK_KEY))
+            )
+            await conn.commit()
+            if not locked:
+                return False
+
+            try:
+                for country in self.method._get_countries().values():
+                    await self.sync_country(conn, country.code)
+            finally:
+                await conn.rollback()
+                await conn.execute(select(func.pg_advisory_unlock(SYNC_LOCK_KEY)))
+                await conn.commit()
+        return True
+
+    async def sync_country(self, conn: AsyncConnection, country_code: str):
+        """
+        Выгружает справочники страны одной транзакцией: клиенты не видят
+        наполовину обновленный справочник, а ETag (max synced_at) меняется
+        ровно в момент коммита.
+        """
+        synced_at = datetime.datetime.now(datetime.UTC)
+
+        page = 0
+        while True:
+            cities = await self.method.fetch_cities_page(
+                country_code, page, self.page_size
+            )
+            if cities:
+                await self._upsert_cities(conn, cities, country_code, synced_at)
+            if len(cities) < self.page_size:
+                break
+            page += 1
+
+        page = 0
+        while True:
+            points = await self.method.fetch_delivery_points_page(
+                country_code, page, self.page_size
+            )
+            if points:
+                await self._upsert_points(conn, points, country_code, synced_at)
+            if len(points) < self.page_size:
+                break
+            page += 1
+
+        # Записи, не пришедшие в этой выгрузке, удалены в CDEK
+        await conn.execute(
+            delete(CDEKCityEntity).where(
+                CDEKCityEntity.country_code == country_code,
+                CDEKCityEntity.synced_at < synced_at,
+            )
+        )
+        await conn.execute(
+            delete(CDEKDeliveryPointEntity).where(
+                CDEKDeliveryPointEntity.country_code == country_code,
+                CDEKDeliveryPointEntity.synced_at < synced_at,
+            )
+        )
+        await conn.commit()
+
+    @staticmethod
+    async def _upsert_cities(
+        conn: AsyncConnection,
+        cities: tp.List[dict],
+        country_code: str,
+        synced_at: datetime.datetime,
+    ):
+        rows = {
+            city["code"]: {
+                "code": city["code"],
+                "city": city.get("city", ""),
+                "city_uuid": city.get("city_uuid"),
+                "country_code": city.get("country_code", country_code),
+                "region": city.get("region"),
+                "longitude": city.get("longitude"),
+                "latitude": city.get("latitude"),
+                "synced_at": synced_at,
+            }
+            for city in cities
+            if city.get("code") is not None
+        }
+        if not rows:
+            return
+
+        stmt = insert(CDEKCityEntity).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CDEKCityEntity.code],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "city",
+                    "city_uuid",
+                    "country_code",
+                    "region",
+                    "longitude",
+                    "latitude",
+                    "synced_at",
+                )
+            },
+        )
+        await conn.execute(stmt)
+
+    @staticmethod
+    async def _upsert_points(
+        conn: AsyncConnection,
+        points: tp.List[dict],
+        country_code: str,
+        synced_at: datetime.datetime,
+    ):
+        rows = {
+            point["code"]: {
+                "code": point["code"],
+                "city_code": point.get("location", {}).get("city_code"),
+                "country_code": country_code,
+                "name": point.get("name"),
+                "data": point,
+                "synced_at": synced_at,
+            }
+            for point in points
+            if point.get("code")
+        }
+        if not rows:
+            return
+
+        stmt = insert(CDEKDeliveryPointEntity).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CDEKDeliveryPointEntity.code],
+            set_={
+                column: stmt.excluded[column]
+                for column in ("city_code", "country_code", "name", "data", "synced_at")
+            },
+        )
+        await conn.execute(stmt)
+
+
+async def run_directory_sync_loop():
+    """Фоновая задача периодической синхронизации справочников"""
+    sync = CDEKDirectorySync()
+    while True:
+        try:
+            await sync.sync_all()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("CDEK directory sync failed: %s", e)
+        await asyncio.sleep(settings.CDEK_DIRECTORY_SYNC_INTERVAL)
+
+
+if __name__ == "__main__":
+    # Разовая синхронизация: python -m app.modules.delivery.directory
+    asyncio.run(CDEKDirectorySync().sync_all())
@@ -1,6 +1,171 @@
+import datetime
+import uuid
+
 from pydantic import BaseModel
+from sqlalchemy import (
+    String,
+    DateTime,
+    Integer,
+    Float,
+    Index,
+    Enum,
+    ForeignKey,
+    UniqueConstraint,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db.session import Base
+from app.modules.delivery.enums.delivery_statuses import DeliveryStatusesEnum
 
 
 class CountryEntity(BaseModel):
     name: str
-    code: str
\ No newline at end of file
+    code: str
+
+
+class DeliveryCacheEntity(Base):
+    """Второй уровень кэша справочников службы доставки"""
+
+    __tablename__ = "delivery_cache"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[list] = mapped_column(JSONB, nullable=False)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC),
+    )
+
+
+class CDEKCityEntity(Base):
+    """Локальная копия справочника городов CDEK"""
+
+    __tablename__ = "cdek_cities"
+    __table_args__ = (
+        Index(
+            "ix_cdek_cities_country_city_prefix",
+            "country_code",
+            func.lower(text("city")).label("city_lower"),
+            postgresql_ops={"city_lower": "text_pattern_ops"},
+        ),
+        # ETag справочника страны и удаление записей, не пришедших в выгрузке
+        Index("ix_cdek_cities_country_synced_at", "country_code", "synced_at"),
+    )
+
+    code: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    city: Mapped[str] = mapped_column(String, nullable=False)
+    city_uuid: Mapped[str] = mapped_column(String, nullable=True)
+    country_code: Mapped[str] = mapped_column(String, nullable=False)
+    region: Mapped[str] = mapped_column(String, nullable=True)
+    longitude: Mapped[float] = mapped_column(Float, nullable=True)
+    latitude: Mapped[float] = mapped_column(Float, nullable=True)
+    synced_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "code": self.code,
+            "city": self.city,
+            "city_uuid": self.city_uuid,
+            "country_code": self.country_code,
+            "region": self.region,
+            "longitude": self.longitude,
+            "latitude": self.latitude,
+        }
+
+
+class CDEKDeliveryPointEntity(Base):
+    """Локальная копия справочника ПВЗ CDEK (исходная запись хранится в data)"""
+
+    __tablename__ = "cdek_delivery_points"
+    __table_args__ = (
+        Index(
+            "ix_cdek_delivery_points_city_name_prefix",
+            "city_code",
+            func.lower(text("name")).label("name_lower"),
+            postgresql_ops={"name_lower": "text_pattern_ops"},
+        ),
+    )
+
+    code: Mapped[str] = mapped_column(String, primary_key=True)
+    city_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    country_code: Mapped[str] = mapped_column(String, nullable=False)
+    name: Mapped[str] = mapped_column(String, nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    synced_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
+class OrderDeliveryStatusEntity(Base):
+    """Последний известный статус доставки заказа (обновляется вебхуками CDEK)"""
+
+    __tablename__ = "order_delivery_status"
+
+    order_id: Mapped[str] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True
+    )
+    cdek_order_uuid: Mapped[str] = mapped_column(String, nullable=True, index=True)
+    status_code: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[DeliveryStatusesEnum] = mapped_column(
+        Enum(DeliveryStatusesEnum, name="delivery_status_enum", native_enum=False),
+        nullable=False,
+    )
+    status_date: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC),
+    )
+    # Когда фоновому воркеру следует опросить CDEK (None - статус терминальный)
+    next_check_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+
+    def to_order_data(self) -> dict:
+        """Данные в формате ответа CDEK /orders/{uuid}"""
+        return {
+            "state": self.status_code,
+            "date_updated": self.status_date.isoformat() if self.status_date else None,
+        }
+
+
+class OrderDeliveryStatusHistoryEntity(Base):
+    """История статусов доставки заказа"""
+
+    __tablename__ = "order_delivery_status_history"
+    __table_args__ = (
+        UniqueConstraint(
+            "order_id",
+            "status_code",
+            "status_date",
+            name="uq_order_delivery_status_history_event",
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    order_id: Mapped[str] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    status_code: Mapped[str] = mapped_column(String, nullable=False)
+    status: Mapped[DeliveryStatusesEnum] = mapped_column(
+        Enum(DeliveryStatusesEnum, name="delivery_status_enum", native_enum=False),
+        nullable=False,
+    )
+    status_date: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    city: Mapped[str] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC),
+    )
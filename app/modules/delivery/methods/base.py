@@ -16,6 +16,10 @@ from app.modules.users.entities import UserEntity
 
 
 class BaseDeliveryMethod:
+    def is_available(self) -> bool:
+        """False, если служба доставки сейчас недоступна (circuit breaker разомкнут)"""
+        return True
+
     @abc.abstractmethod
     async def get_cities(self, filter: CityFilter):
         pass
@@ -47,17 +51,27 @@ class BaseDeliveryMethod:
         pass
 
     @abc.abstractmethod
-    async def fill_schema(self, schema: OrderSchema) -> OrderSchema:
-        """Заполнить схему заказа информацией о доставке"""
+    async def fill_schema(
+        self, schema: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> OrderSchema:
+        """
+        Заполнить схему заказа информацией о доставке
+
+        :param order_data: уже известные данные заказа в службе доставки
+        """
         pass
 
     @abc.abstractmethod
-    async def get_delivery_info(self, order: OrderSchema) -> tp.Optional[DeliveryInfo]:
+    async def get_delivery_info(
+        self, order: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> tp.Optional[DeliveryInfo]:
         """Получить информацию о доставке"""
         pass
 
     @abc.abstractmethod
-    async def get_tracking_info(self, order: OrderSchema) -> tp.Optional[TrackingInfo]:
+    async def get_tracking_info(
+        self, order: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> tp.Optional[TrackingInfo]:
         """Получить информацию для отслеживания"""
         pass
 
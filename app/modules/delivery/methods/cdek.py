@@ -1,12 +1,17 @@
+import asyncio
 import typing as tp
 
 import httpx
+from pydantic import BaseModel
 
 from app.core.config import settings
+from app.modules.delivery.cache import DeliveryPointCache, delivery_point_cache
 from app.modules.delivery.entities import CountryEntity
 from app.modules.delivery.enums.countries import Countries
 from app.modules.delivery.enums.delivery_statuses import DeliveryStatusesEnum
 from app.modules.delivery.methods.base import BaseDeliveryMethod
+from app.modules.delivery.methods.cdek_auth import CDEKTokenManager
+from app.modules.delivery.methods.cdek_http import CDEKHttpClient, cdek_http_client
 from app.modules.delivery.schemas.create_order import (
     CdekPackageItem,
     CdekPackage,
@@ -29,13 +34,81 @@ from app.modules.orders.entities import OrderEntity
 from app.modules.orders.schemas.create import CreateOrderSchema
 from app.modules.orders.schemas.order_schema import OrderSchema
 from app.modules.users.entities import UserEntity
+from app.utils.circuit_breaker import CircuitOpenError
 
 
 class CDEKError(ValueError):
     pass
 
 
+class CDEKUnavailableError(CDEKError):
+    """CDEK временно недоступен: circuit breaker разомкнут"""
+
+
+class CDEKOrderSnapshot(BaseModel):
+    """Снимок доставки заказа: сырой заказ CDEK и ПВЗ, полученные один раз"""
+
+    order_data: tp.Optional[dict] = None
+    delivery_point: tp.Optional[DeliveryPoint] = None
+
+
+cdek_token_manager = CDEKTokenManager(settings.CDEK_TOKEN_REFRESH_MARGIN)
+
+
 class CDEKDeliveryMethod(BaseDeliveryMethod):
+    http_client: CDEKHttpClient = cdek_http_client
+    token_manager: CDEKTokenManager = cdek_token_manager
+    delivery_point_cache: DeliveryPointCache = delivery_point_cache
+
+    @staticmethod
+    def _get_base_url() -> str:
+        if settings.CDEK_DEBUG:
+            return settings.CDEK_TEST_API_URL
+        return settings.CDEK_API_URL
+
+    def is_available(self) -> bool:
+        return self.http_client.breaker.allows_request()
+
+    async def _send(
+        self, method: str, url: str, *, endpoint: str, **kwargs
+    ) -> httpx.Response:
+        try:
+            return await self.http_client.request(
+                method, url, endpoint=endpoint, **kwargs
+            )
+        except CircuitOpenError as e:
+            raise CDEKUnavailableError(str(e))
+
+    async def _request(
+        self, method: str, path: str, endpoint: str, **kwargs
+    ) -> httpx.Response:
+        """
+        Выполнить авторизованный запрос к CDEK API через общий пул соединений.
+
+        При 401 токен сбрасывается и запрос повторяется один раз.
+        background=True - запрос фоновой задачи, идет через отдельный
+        circuit breaker.
+        """
+        extra_headers = kwargs.pop("headers", {})
+        response = None
+        for _ in range(2):
+            token = await self.get_cdek_auth_token()
+            response = await self._send(
+                method,
+                f"{self._get_base_url()}{path}",
+                endpoint=endpoint,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Accept": "application/json",
+                    **extra_headers,
+                },
+                **kwargs,
+            )
+            if response.status_code != 401:
+                break
+            self.token_manager.invalidate(token)
+        return response
+
     async def prepare_cdek_data(
         self, order_data: OrderEntity, order_id: str, current_user: UserEntity
     ):
@@ -96,76 +169,97 @@ class CDEKDeliveryMethod(BaseDeliveryMethod):
             "recipient": recipient.model_dump(),
         }
 
-        if settings.CDEK_DEBUG:
-            base_url = settings.CDEK_TEST_API_URL
-        else:
-            base_url = settings.CDEK_API_URL
+        try:
+            response = await self._request(
+                "POST", "/orders", "orders", json=body, background=True
+            )
+            response.raise_for_status()
+            data = response.json()
 
-        token = await self.get_cdek_auth_token()
+            cdek_entity = data.get("entity", None)
+            if cdek_entity is None:
+                raise CDEKError("CDEK entity not found in response")
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    f"{base_url}/orders",
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Accept": "application/json",
-                    },
-                    json=body,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                cdek_entity = data.get("entity", None)
-                if cdek_entity is None:
-                    raise CDEKError("CDEK entity not found in response")
-
-                cdek_uuid = cdek_entity.get("uuid", None)
-                if cdek_uuid is None:
-                    raise CDEKError("CDEK UUID not found in response")
-                order_data.cdek_order_uuid = cdek_uuid
-
-                return data
-            except (httpx.HTTPStatusError, KeyError) as e:
-                raise CDEKError(f"Ошибка при создании заказа в СДЕК: {str(e)}")
+            cdek_uuid = cdek_entity.get("uuid", None)
+            if cdek_uuid is None:
+                raise CDEKError("CDEK UUID not found in response")
+            order_data.cdek_order_uuid = cdek_uuid
 
-    async def get_delivery_point(self, code: str):
+            return data
+        except (httpx.HTTPError, KeyError) as e:
+            raise CDEKError(f"Ошибка при создании заказа в СДЕК: {str(e)}")
 
-        token = await self.get_cdek_auth_token()
-        print(token)
+    async def _fetch_delivery_points(
+        self, params: dict, background: bool = False
+    ) -> list:
+        """Запросить список ПВЗ напрямую из CDEK API"""
+        try:
+            response = await self._request(
+                "GET",
+                "/deliverypoints",
+                "deliverypoints",
+                params=params,
+                background=background,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            raise CDEKError(f"Ошибка получения ПВЗ СДЕК: {str(e)}")
+
+        if not isinstance(data, list):
+            raise CDEKError("Invalid response format from CDEK API")
+        return data
+
+    async def fetch_delivery_points_page(
+        self, country_code: str, page: int, size: int
+    ) -> list:
+        return await self._fetch_delivery_points(
+            {"country_code": country_code, "page": page, "size": size},
+            background=True,
+        )
 
-        if settings.CDEK_DEBUG:
-            base_url = settings.CDEK_TEST_API_URL
-        else:
-            base_url = settings.CDEK_API_URL
+    async def fetch_cities_page(self, country_code: str, page: int, size: int) -> list:
+        return await self._fetch_cities(
+            {"country_codes": country_code, "page": page, "size": size},
+            background=True,
+        )
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{base_url}/deliverypoints",
-                    params={"code": code},
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Accept": "application/json",
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-                if not data or not isinstance(data, list):
-                    raise CDEKError("Invalid response format from CDEK API")
-
-                if len(data) == 0:
-                    raise CDEKError(f"PVZ with code {code} not found")
-
-                pvz = data[0]
-
-                return {
-                    "code": pvz.get("location", {}).get("city_code"),
-                    "city": pvz.get("location", {}).get("city"),
-                    "address": pvz.get("location", {}).get("address_full"),
-                }
-            except (httpx.HTTPStatusError, KeyError) as e:
-                raise CDEKError(f"Ошибка получения ПВЗ СДЕК: {str(e)}")
+    async def _fetch_cities(self, params: dict, background: bool = False) -> list:
+        """Запросить список городов напрямую из CDEK API"""
+        try:
+            response = await self._request(
+                "GET",
+                "/location/cities",
+                "location_cities",
+                params=params,
+                background=background,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            raise CDEKError(f"CDEK API error: {str(e)}")
+
+        if not isinstance(data, list):
+            raise CDEKError("Invalid response format from CDEK API")
+        return data
+
+    async def _get_pvz(self, code: str) -> tp.Optional[dict]:
+        """Сырая запись ПВЗ по коду (из кэша, либо из CDEK API)"""
+        points = await self.delivery_point_cache.get_by_code(
+            code, lambda: self._fetch_delivery_points({"code": code})
+        )
+        return points[0] if points else None
+
+    async def get_delivery_point(self, code: str):
+        pvz = await self._get_pvz(code)
+        if pvz is None:
+            raise CDEKError(f"PVZ with code {code} not found")
+
+        return {
+            "code": pvz.get("location", {}).get("city_code"),
+            "city": pvz.get("location", {}).get("city"),
+            "address": pvz.get("location", {}).get("address_full"),
+        }
 
     @staticmethod
     def _get_countries():
@@ -175,7 +269,10 @@ class CDEKDeliveryMethod(BaseDeliveryMethod):
             Countries.KZ: CountryEntity(name="Казахстан", code="KZ"),
         }
 
-    async def get_cdek_auth_token(self):
+    async def get_cdek_auth_token(self) -> str:
+        return await self.token_manager.get_token(self._fetch_cdek_auth_token)
+
+    async def _fetch_cdek_auth_token(self) -> dict:
         if settings.CDEK_DEBUG:
             base_url = settings.CDEK_TEST_API_URL
             account = settings.CDEK_TEST_ACCOUNT
@@ -187,15 +284,16 @@ class CDEKDeliveryMethod(BaseDeliveryMethod):
 
         auth_url = f"{base_url}/oauth/token?grant_type=client_credentials&client_id={account}&client_secret={secret}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(auth_url)
-                response.raise_for_status()
-                token_data = response.json()
-            except (httpx.HTTPStatusError, KeyError) as e:
-                raise CDEKError(f"Ошибка авторизации в CDEK API: {str(e)}")
+        try:
+            response = await self._send("POST", auth_url, endpoint="oauth_token")
+            response.raise_for_status()
+            token_data = response.json()
+            if "access_token" not in token_data:
+                raise KeyError("access_token")
+        except (httpx.HTTPError, KeyError) as e:
+            raise CDEKError(f"Ошибка авторизации в CDEK API: {str(e)}")
 
-        return token_data["access_token"]
+        return token_data
 
     async def get_countries(self):
         """
@@ -209,56 +307,19 @@ class CDEKDeliveryMethod(BaseDeliveryMethod):
         Returns list of cities basing on provided country
         :return:
         """
-        token = await self.get_cdek_auth_token()
-        headers = {"Authorization": f"Bearer {token}"}
-        params = {
-            "country_codes": filters.country_code,
-        }
-
-        if settings.CDEK_DEBUG:
-            base_url = settings.CDEK_TEST_API_URL
-        else:
-            base_url = settings.CDEK_API_URL
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{base_url}/location/cities", headers=headers, params=params
-                )
-                response.raise_for_status()
-                cities = response.json()
-                return ListResponse[CityResponse](data=cities, count=len(cities))
-            except httpx.HTTPStatusError as e:
-                raise CDEKError(f"CDEK API error: {str(e)}")
+        cities = await self._fetch_cities({"country_codes": filters.country_code})
+        return ListResponse[CityResponse](data=cities, count=len(cities))
 
     async def get_addresses(self, filters: DeliveryPointFilter):
         """
         Returns list of addresses basing on provided city_code
         :return:
         """
-        if settings.CDEK_DEBUG:
-            base_url = settings.CDEK_TEST_API_URL
-        else:
-            base_url = settings.CDEK_API_URL
-
-        token = await self.get_cdek_auth_token()
-        headers = {"Authorization": f"Bearer {token}"}
-        params = {
-            "city_code": str(filters.city_code),
-        }
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{base_url}/deliverypoints", headers=headers, params=params
-                )
-                response.raise_for_status()
-                points = response.json()
-                return ListResponse[DeliveryPointResponse](
-                    data=points, count=len(points)
-                )
-            except httpx.HTTPStatusError as e:
-                raise CDEKError(f"CDEK API error: {str(e)}")
+        city_code = str(filters.city_code)
+        points = await self.delivery_point_cache.get_by_city(
+            city_code, lambda: self._fetch_delivery_points({"city_code": city_code})
+        )
+        return ListResponse[DeliveryPointResponse](data=points, count=len(points))
 
     async def map_delivery_status(self, status: str) -> DeliveryStatusesEnum:
         mapping = {
@@ -338,233 +399,193 @@ class CDEKDeliveryMethod(BaseDeliveryMethod):
         if not order.track_number:
             return DeliveryStatusesEnum.WAITING_FOR_PAYMENT
 
-        token = await self.get_cdek_auth_token()
+        order_data = await self._get_cdek_order_data(order.track_number)
+        status = order_data.get("state", None)
+        if status is None:
+            raise CDEKError("CDEK order status not found in response")
 
-        if settings.CDEK_DEBUG:
-            base_url = settings.CDEK_TEST_API_URL
-        else:
-            base_url = settings.CDEK_API_URL
+        return await self.map_delivery_status(status)
 
-        async with httpx.AsyncClient() as client:
+    @staticmethod
+    def extract_status(order_data: dict) -> tp.Tuple[tp.Optional[str], tp.Optional[str]]:
+        """Код и дата текущего статуса из ответа CDEK /orders/{uuid}"""
+        if order_data.get("state"):
+            return order_data["state"], order_data.get("date_updated")
+
+        statuses = (order_data.get("entity") or {}).get("statuses") or []
+        if statuses:
+            return statuses[0].get("code"), statuses[0].get("date_time")
+        return None, None
+
+    async def get_snapshot(
+        self, order: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> CDEKOrderSnapshot:
+        """
+        Получить данные заказа и ПВЗ из CDEK ровно по одному разу.
+
+        Если данные заказа уже известны (например, сохраненный статус),
+        заказ в CDEK не запрашивается; пустой словарь означает, что данных нет
+        и запрашивать их не нужно. Ошибки CDEK не пробрасываются:
+        соответствующая часть снимка остается пустой.
+        """
+
+        async def fetch_point():
             try:
-                response = await client.get(
-                    f"{base_url}/orders/{order.track_number}",
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Accept": "application/json",
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                status = data.get("state", None)
-                if status is None:
-                    raise CDEKError("CDEK order status not found in response")
-
-                return await self.map_delivery_status(status)
-            except (httpx.HTTPStatusError, KeyError) as e:
-                raise CDEKError(f"Ошибка получения статуса заказа в СДЕК: {str(e)}")
-
-    async def fill_schema(self, schema: OrderSchema) -> OrderSchema:
-        """Заполняет схему заказа полной информацией о доставке CDEK"""
-        try:
-            # Всегда пытаемся получить информацию о пункте выдачи (код ПВЗ есть всегда)
-            delivery_point_info = await self.get_delivery_point_info(
-                schema.delivery_point
-            )
-            schema.delivery_point_info = delivery_point_info
-
-            # Получаем информацию о доставке и отслеживании только если есть трек-номер
-            if schema.track_number:
-                delivery_info = await self.get_delivery_info(schema)
-                tracking_info = await self.get_tracking_info(schema)
-                schema.delivery_info = delivery_info
-                schema.tracking_info = tracking_info
-            else:
-                # Если нет трек-номера, создаем базовую информацию о доставке с ПВЗ
-                schema.delivery_info = DeliveryInfo(
-                    track_number=None,
-                    delivery_point_code=schema.delivery_point,
-                    delivery_point_address=(
-                        delivery_point_info.address if delivery_point_info else None
-                    ),
-                    delivery_point_name=(
-                        delivery_point_info.name if delivery_point_info else None
-                    ),
-                    delivery_point_working_hours=(
-                        delivery_point_info.working_hours
-                        if delivery_point_info
-                        else None
-                    ),
-                    delivery_point_phone=(
-                        delivery_point_info.phone if delivery_point_info else None
-                    ),
-                    estimated_delivery_date=None,
-                )
-                schema.tracking_info = None
-
-            return schema
-        except CDEKError:
-            # При ошибке все равно пытаемся получить хотя бы информацию о ПВЗ
+                return await self.get_delivery_point_info(order.delivery_point)
+            except CDEKError:
+                return None
+
+        async def fetch_order():
+            if order_data is not None:
+                return order_data
+            if not order.track_number:
+                return None
             try:
-                delivery_point_info = await self.get_delivery_point_info(
-                    schema.delivery_point
-                )
-                schema.delivery_point_info = delivery_point_info
-
-                # Создаем минимальную информацию о доставке
-                schema.delivery_info = DeliveryInfo(
-                    track_number=schema.track_number,
-                    delivery_point_code=schema.delivery_point,
-                    delivery_point_address=(
-                        delivery_point_info.address if delivery_point_info else None
-                    ),
-                    delivery_point_name=(
-                        delivery_point_info.name if delivery_point_info else None
-                    ),
-                    delivery_point_working_hours=(
-                        delivery_point_info.working_hours
-                        if delivery_point_info
-                        else None
-                    ),
-                    delivery_point_phone=(
-                        delivery_point_info.phone if delivery_point_info else None
-                    ),
-                    estimated_delivery_date=None,
-                )
+                return await self._get_cdek_order_data(order.track_number)
             except CDEKError:
-                pass
+                return None
 
-            return schema
+        delivery_point, data = await asyncio.gather(fetch_point(), fetch_order())
+        return CDEKOrderSnapshot(order_data=data, delivery_point=delivery_point)
 
-    async def get_delivery_info(self, order: OrderSchema) -> tp.Optional[DeliveryInfo]:
-        """Получить базовую информацию о доставке"""
-        try:
-            # Получаем детальную информацию о пункте (код ПВЗ есть всегда)
-            delivery_point = await self.get_delivery_point_info(order.delivery_point)
-
-            # Если есть трек-номер, пытаемся получить информацию о заказе из CDEK API
-            order_data = {}
-            if order.track_number:
-                try:
-                    order_data = await self._get_cdek_order_data(order.track_number)
-                except CDEKError:
-                    # Если не удалось получить данные заказа, продолжаем без них
-                    pass
-
-            return DeliveryInfo(
-                track_number=order.track_number,
-                delivery_point_code=order.delivery_point,
-                delivery_point_address=(
-                    delivery_point.address if delivery_point else None
-                ),
-                delivery_point_name=delivery_point.name if delivery_point else None,
-                delivery_point_working_hours=(
-                    delivery_point.working_hours if delivery_point else None
-                ),
-                delivery_point_phone=delivery_point.phone if delivery_point else None,
-                estimated_delivery_date=order_data.get("estimated_delivery_date"),
+    async def fill_schema(
+        self, schema: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> OrderSchema:
+        """Заполняет схему заказа полной информацией о доставке CDEK"""
+        snapshot = await self.get_snapshot(schema, order_data)
+
+        schema.delivery_point_info = snapshot.delivery_point
+        schema.delivery_info = self._build_delivery_info(schema, snapshot)
+        schema.tracking_info = self._build_tracking_info(schema, snapshot)
+
+        if not schema.track_number:
+            schema.status = DeliveryStatusesEnum.WAITING_FOR_PAYMENT
+        elif snapshot.order_data and snapshot.order_data.get("state"):
+            schema.status = await self.map_delivery_status(
+                snapshot.order_data["state"]
             )
-        except CDEKError:
+
+        return schema
+
+    async def get_delivery_info(
+        self, order: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> tp.Optional[DeliveryInfo]:
+        """Получить базовую информацию о доставке"""
+        snapshot = await self.get_snapshot(order, order_data)
+        if snapshot.delivery_point is None and not snapshot.order_data:
             return None
+        return self._build_delivery_info(order, snapshot)
 
-    async def get_tracking_info(self, order: OrderSchema) -> tp.Optional[TrackingInfo]:
+    async def get_tracking_info(
+        self, order: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> tp.Optional[TrackingInfo]:
         if not order.track_number:
             return None
 
-        try:
-            order_data = await self._get_cdek_order_data(order.track_number)
+        if order_data is None:
+            try:
+                order_data = await self._get_cdek_order_data(order.track_number)
+            except CDEKError:
+                return None
+        return self._build_tracking_info(
+            order, CDEKOrderSnapshot(order_data=order_data)
+        )
 
-            # Формируем URL для отслеживания
-            track_url = f"https://www.cdek.ru/track.html?order_id={order.track_number}"
-
-            # Получаем читаемое описание статуса
-            status = order_data.get("state", "")
-            status_description = self._get_status_description(status)
-
-            return TrackingInfo(
-                track_number=order.track_number,
-                track_url=track_url,
-                delivery_service="CDEK",
-                current_status=status,
-                status_description=status_description,
-                last_updated=order_data.get("date_updated"),
-            )
-        except CDEKError:
+    @staticmethod
+    def _build_delivery_info(
+        order: OrderSchema, snapshot: CDEKOrderSnapshot
+    ) -> DeliveryInfo:
+        delivery_point = snapshot.delivery_point
+        order_data = snapshot.order_data or {}
+        return DeliveryInfo(
+            track_number=order.track_number,
+            delivery_point_code=order.delivery_point,
+            delivery_point_address=delivery_point.address if delivery_point else None,
+            delivery_point_name=delivery_point.name if delivery_point else None,
+            delivery_point_working_hours=(
+                delivery_point.working_hours if delivery_point else None
+            ),
+            delivery_point_phone=delivery_point.phone if delivery_point else None,
+            estimated_delivery_date=order_data.get("estimated_delivery_date"),
+        )
+
+    def _build_tracking_info(
+        self, order: OrderSchema, snapshot: CDEKOrderSnapshot
+    ) -> tp.Optional[TrackingInfo]:
+        if not order.track_number or not snapshot.order_data:
             return None
 
+        # Получаем читаемое описание статуса
+        status = snapshot.order_data.get("state", "")
+        return TrackingInfo(
+            track_number=order.track_number,
+            # Формируем URL для отслеживания
+            track_url=f"https://www.cdek.ru/track.html?order_id={order.track_number}",
+            delivery_service="CDEK",
+            current_status=status,
+            status_description=self._get_status_description(status),
+            last_updated=snapshot.order_data.get("date_updated"),
+        )
+
     async def get_delivery_point_info(
         self, delivery_point_code: str
     ) -> tp.Optional[DeliveryPoint]:
         try:
-            token = await self.get_cdek_auth_token()
+            pvz = await self._get_pvz(delivery_point_code)
+            if pvz is None:
+                return None
+
+            location = pvz.get("location", {})
+            # Формируем координаты если есть
+            coordinates = None
+            if location.get("latitude") and location.get("longitude"):
+                coordinates = {
+                    "latitude": location.get("latitude"),
+                    "longitude": location.get("longitude"),
+                }
 
-            if settings.CDEK_DEBUG:
-                base_url = settings.CDEK_TEST_API_URL
-            else:
-                base_url = settings.CDEK_API_URL
-
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{base_url}/deliverypoints",
-                    params={"code": delivery_point_code},
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "Accept": "application/json",
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                if not data or not isinstance(data, list) or len(data) == 0:
-                    return None
-
-                pvz = data[0]
-                location = pvz.get("location", {})
-                # Формируем координаты если есть
-                coordinates = None
-                if location.get("latitude") and location.get("longitude"):
-                    coordinates = {
-                        "latitude": location.get("latitude"),
-                        "longitude": location.get("longitude"),
-                    }
-
-                # Формируем режим работы
-                working_hours = None
-                working_hours = pvz.get("work_time")
-
-                return DeliveryPoint(
-                    code=delivery_point_code,
-                    name=pvz.get("name", ""),
-                    address=location.get("address_full", ""),
-                    city=location.get("city", ""),
-                    working_hours=working_hours,
-                    phone=pvz.get("phone"),
-                    coordinates=coordinates,
-                    additional_info=pvz.get("note"),
-                )
-        except (httpx.HTTPStatusError, KeyError) as e:
+            # Формируем режим работы
+            working_hours = None
+            working_hours = pvz.get("work_time")
+
+            return DeliveryPoint(
+                code=delivery_point_code,
+                name=pvz.get("name", ""),
+                address=location.get("address_full", ""),
+                city=location.get("city", ""),
+                working_hours=working_hours,
+                phone=pvz.get("phone"),
+                coordinates=coordinates,
+                additional_info=pvz.get("note"),
+            )
+        except KeyError as e:
             raise CDEKError(f"Ошибка получения информации о ПВЗ СДЕК: {str(e)}")
 
     async def _get_cdek_order_data(self, track_number: str) -> dict:
         """Получить данные заказа из CDEK API"""
-        token = await self.get_cdek_auth_token()
-
-        if settings.CDEK_DEBUG:
-            base_url = settings.CDEK_TEST_API_URL
-        else:
-            base_url = settings.CDEK_API_URL
+        try:
+            response = await self._request("GET", f"/orders/{track_number}", "orders_get")
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            raise CDEKError(f"Ошибка получения заказа СДЕК: {str(e)}")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{base_url}/orders/{track_number}",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Accept": "application/json",
-                },
+    async def find_order_uuid(self, number: str) -> tp.Optional[str]:
+        """Найти заказ в CDEK по номеру в ИМ (None, если заказа нет)"""
+        try:
+            response = await self._request(
+                "GET",
+                "/orders",
+                "orders_get",
+                params={"im_number": number},
+                background=True,
             )
+            if response.status_code in (400, 404):
+                return None
             response.raise_for_status()
-            return response.json()
+            return (response.json().get("entity") or {}).get("uuid")
+        except httpx.HTTPError as e:
+            raise CDEKError(f"Ошибка поиска заказа СДЕК: {str(e)}")
 
     def _get_status_description(self, status: str) -> str:
         """Получить человекочитаемое описание статуса"""
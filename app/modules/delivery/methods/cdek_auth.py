@@ -0,0 +1,60 @@
+import asyncio
+import time
+import typing as tp
+
+
+class CDEKTokenManager:
+    """
+    Процессный кэш OAuth-токена CDEK.
+
+    Токен хранится до момента `expires_in - refresh_margin`. Одновременные
+    обновления схлопываются в один запрос: все ожидающие получают его результат.
+    """
+
+    def __init__(self, refresh_margin: float = 60.0):
+        self.refresh_margin = refresh_margin
+        self._token: tp.Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh: tp.Optional[asyncio.Future] = None
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    async def get_token(self, fetch: tp.Callable[[], tp.Awaitable[dict]]) -> str:
+        """
+        Возвращает закэшированный токен или обновляет его через `fetch`.
+
+        :param fetch: корутина, возвращающая ответ /oauth/token
+        :return: access_token
+        """
+        if self._is_valid():
+            return self._token
+
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._do_refresh(fetch))
+
+        # shield: отмена одного ожидающего не должна отменять общий запрос
+        return await asyncio.shield(self._refresh)
+
+    async def _do_refresh(self, fetch: tp.Callable[[], tp.Awaitable[dict]]) -> str:
+        try:
+            token_data = await fetch()
+            expires_in = float(token_data.get("expires_in", 0))
+            self._token = token_data["access_token"]
+            self._expires_at = time.monotonic() + max(
+                expires_in - self.refresh_margin, 0
+            )
+            return self._token
+        finally:
+            self._refresh = None
+
+    def invalidate(self, token: tp.Optional[str] = None):
+        """
+        Сбрасывает токен (например, после 401).
+
+        Если передан `token`, сбрасывает только его, чтобы не затереть
+        уже обновленный другим запросом токен.
+        """
+        if token is None or token == self._token:
+            self._token = None
+            self._expires_at = 0.0
@@ -0,0 +1,211 @@
+import asyncio
+import time
+import typing as tp
+
+import httpx
+
+from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.utils.circuit_breaker import CircuitBreaker
+
+RequestKey = tp.Tuple[str, str, tp.Tuple[tp.Tuple[str, str], ...]]
+
+
+class CDEKHttpStats:
+    """Счетчики переиспользования соединений и задержек по эндпоинтам CDEK"""
+
+    def __init__(self):
+        self.pool_hits = 0
+        self.pool_misses = 0
+        # Чтения, не дошедшие до CDEK: присоединились к запросу в полете / из микрокэша
+        self.coalesced = 0
+        self.micro_cache_hits = 0
+        self.endpoints: tp.Dict[str, tp.Dict[str, float]] = {}
+
+    def record(self, endpoint: str, elapsed_ms: float, failed: bool):
+        stats = self.endpoints.setdefault(
+            endpoint, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if failed:
+            stats["errors"] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "pool_hits": self.pool_hits,
+            "pool_misses": self.pool_misses,
+            "coalesced": self.coalesced,
+            "micro_cache_hits": self.micro_cache_hits,
+            "endpoints": {
+                endpoint: {
+                    **stats,
+                    "avg_ms": stats["total_ms"] / stats["count"] if stats["count"] else 0,
+                }
+                for endpoint, stats in self.endpoints.items()
+            },
+        }
+
+
+class CDEKHttpClient:
+    """
+    Долгоживущий httpx.AsyncClient с пулом соединений для всех запросов к CDEK.
+
+    Открывается при старте приложения и закрывается при его остановке,
+    поэтому запросы переиспользуют уже установленные TCP+TLS соединения.
+
+    Одинаковые GET-запросы (метод, URL, параметры) схлопываются: параллельные
+    вызовы ждут один запрос в полете, а успешный ответ еще несколько секунд
+    отдается из микрокэша.
+
+    Все запросы проходят через circuit breaker: при серии ошибок (сетевые,
+    5xx, 429) или медленных ответов CDEK новые запросы сразу получают
+    CircuitOpenError, не занимая соединения и не дожидаясь таймаутов.
+    Фоновые запросы (background=True) идут через отдельную цепь со своим
+    порогом медленного ответа и не влияют на запросы покупателей.
+    """
+
+    def __init__(self):
+        self._client: tp.Optional[httpx.AsyncClient] = None
+        self.stats = CDEKHttpStats()
+        self.breaker = self._build_breaker(
+            "cdek", settings.CDEK_BREAKER_SLOW_CALL_THRESHOLD
+        )
+        self.background_breaker = self._build_breaker(
+            "cdek_background", settings.CDEK_BACKGROUND_BREAKER_SLOW_CALL_THRESHOLD
+        )
+        self._inflight: tp.Dict[RequestKey, asyncio.Future] = {}
+        self._micro_cache: TTLCache[RequestKey, httpx.Response] = TTLCache(
+            maxsize=settings.CDEK_HTTP_MICRO_CACHE_MAXSIZE,
+            ttl=settings.CDEK_HTTP_MICRO_CACHE_TTL,
+        )
+
+    @staticmethod
+    def _build_breaker(name: str, slow_call_threshold: float) -> CircuitBreaker:
+        return CircuitBreaker(
+            name,
+            failure_threshold=settings.CDEK_BREAKER_FAILURE_THRESHOLD,
+            slow_call_threshold=slow_call_threshold,
+            reset_timeout=settings.CDEK_BREAKER_RESET_TIMEOUT,
+            half_open_max_calls=settings.CDEK_BREAKER_HALF_OPEN_MAX_CALLS,
+        )
+
+    @staticmethod
+    def _build_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=settings.CDEK_HTTP2,
+            limits=httpx.Limits(
+                max_connections=settings.CDEK_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.CDEK_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.CDEK_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.CDEK_HTTP_CONNECT_TIMEOUT,
+                read=settings.CDEK_HTTP_READ_TIMEOUT,
+                write=settings.CDEK_HTTP_WRITE_TIMEOUT,
+                pool=settings.CDEK_HTTP_POOL_TIMEOUT,
+            ),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Клиент создается лениво, чтобы скрипты без lifespan тоже работали
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self):
+        _ = self.client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _request_key(method: str, url: str, params: tp.Optional[dict]) -> RequestKey:
+        items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+        return method.upper(), url, items
+
+    async def request(
+        self, method: str, url: str, *, endpoint: str, background: bool = False, **kwargs
+    ) -> httpx.Response:
+        if method.upper() != "GET":
+            return await self._send(
+                method, url, endpoint=endpoint, background=background, **kwargs
+            )
+
+        key = self._request_key(method, url, kwargs.get("params"))
+        found, response, _ = self._micro_cache.get(key)
+        if found:
+            self.stats.micro_cache_hits += 1
+            return response
+
+        future = self._inflight.get(key)
+        if future is None:
+
+            async def run() -> httpx.Response:
+                try:
+                    result = await self._send(
+                        method, url, endpoint=endpoint, background=background, **kwargs
+                    )
+                    if result.is_success and settings.CDEK_HTTP_MICRO_CACHE_TTL > 0:
+                        self._micro_cache.set(key, result)
+                    return result
+                finally:
+                    self._inflight.pop(key, None)
+
+            future = asyncio.ensure_future(run())
+            self._inflight[key] = future
+        else:
+            self.stats.coalesced += 1
+
+        # shield: отмена одного из ожидающих не должна отменять общий запрос
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _is_failure(response: httpx.Response) -> bool:
+        return response.status_code >= 500 or response.status_code == 429
+
+    async def _send(
+        self, method: str, url: str, *, endpoint: str, background: bool, **kwargs
+    ) -> httpx.Response:
+        breaker = self.background_breaker if background else self.breaker
+        return await breaker.call(
+            lambda: self._send_traced(method, url, endpoint=endpoint, **kwargs),
+            is_failure=self._is_failure,
+        )
+
+    async def _send_traced(
+        self, method: str, url: str, *, endpoint: str, **kwargs
+    ) -> httpx.Response:
+        new_connection = False
+
+        async def trace(event_name: str, info: dict):
+            nonlocal new_connection
+            if event_name == "connection.connect_tcp.started":
+                new_connection = True
+
+        extensions = kwargs.pop("extensions", {})
+        extensions["trace"] = trace
+
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await self.client.request(
+                method, url, extensions=extensions, **kwargs
+            )
+            failed = response.is_error
+            return response
+        finally:
+            if new_connection:
+                self.stats.pool_misses += 1
+            else:
+                self.stats.pool_hits += 1
+            self.stats.record(
+                endpoint, (time.perf_counter() - started) * 1000, failed
+            )
+
+
+cdek_http_client = CDEKHttpClient()
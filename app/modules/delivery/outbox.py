@@ -0,0 +1,48 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.outbox import enqueue, outbox_handler
+from app.modules.delivery.methods.cdek import CDEKDeliveryMethod
+from app.modules.orders.entities import OrderEntity, OrderDetailsEntity
+
+CDEK_CREATE_ORDER_TOPIC = "cdek.create_order"
+
+
+async def enqueue_cdek_order(db: AsyncSession, order_id: str):
+    """Поставить создание заказа в CDEK в outbox (в транзакции вызывающего кода)"""
+    await enqueue(
+        db,
+        CDEK_CREATE_ORDER_TOPIC,
+        key=f"{CDEK_CREATE_ORDER_TOPIC}:{order_id}",
+        payload={"order_id": order_id},
+    )
+
+
+@outbox_handler(CDEK_CREATE_ORDER_TOPIC)
+async def create_cdek_order(db: AsyncSession, payload: dict, attempt: int):
+    order_id = payload["order_id"]
+    order = (
+        await db.execute(
+            select(OrderEntity)
+            .where(OrderEntity.id == order_id)
+            .options(
+                selectinload(OrderEntity.user),
+                selectinload(OrderEntity.details).selectinload(
+                    OrderDetailsEntity.variation
+                ),
+            )
+        )
+    ).scalar_one_or_none()
+    if order is None:
+        raise ValueError(f"Order not found with id: {order_id}")
+    if order.cdek_order_uuid:
+        return
+
+    cdek = CDEKDeliveryMethod()
+    # Прошлая попытка могла создать заказ в CDEK, но не успеть сохранить uuid
+    if attempt > 1:
+        order.cdek_order_uuid = await cdek.find_order_uuid(str(order.id))
+    if not order.cdek_order_uuid:
+        await cdek.prepare_cdek_data(order, order.id, order.user)
+    await db.commit()
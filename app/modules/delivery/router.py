@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
+from app.core.dependencies.get_current_admin import get_current_admin
+from app.modules.delivery.methods.cdek_http import cdek_http_client
 from app.modules.delivery.schemas.get_cities import CityFilter, DeliveryPointFilter
 from app.modules.delivery.schemas.get_countries import GetCountriesSchema
 from app.modules.delivery.service import DeliveryService
@@ -21,13 +23,40 @@ async def get_countries(
 
 @router.get("/cities")
 async def get_cities(
-    body: CityFilter = Depends(), service: DeliveryService = Depends()
+    request: Request,
+    response: Response,
+    body: CityFilter = Depends(),
+    service: DeliveryService = Depends(),
 ):
+    etag = await service.get_cities_etag(body)
+    if etag is not None:
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
     return await service.get_cities(body)
 
 
 @router.get("/delivery")
 async def get_delivery(
-    body: DeliveryPointFilter = Depends(), service: DeliveryService = Depends()
+    request: Request,
+    response: Response,
+    body: DeliveryPointFilter = Depends(),
+    service: DeliveryService = Depends(),
 ):
+    etag = await service.get_addresses_etag(body)
+    if etag is not None:
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+
     return await service.get_addresses(body)
+
+
+@router.get("/metrics", dependencies=[Depends(get_current_admin)])
+async def get_metrics():
+    return {
+        "cdek_http": cdek_http_client.stats.snapshot(),
+        "cdek_breaker": cdek_http_client.breaker.snapshot(),
+        "cdek_background_breaker": cdek_http_client.background_breaker.snapshot(),
+    }
@@ -9,7 +9,7 @@ T = TypeVar('T')
 class CityResponse(BaseModel):
     code: int = Field(..., description="Уникальный код города в СДЭК")
     city: str = Field(..., description="Название города")
-    city_uuid: str = Field(..., description="uuid города")
+    city_uuid: Optional[str] = Field(None, description="uuid города")
     country_code: str = Field(..., description="Код страны")
     region: Optional[str] = Field(None, description="Регион")
     longitude: Optional[float] = Field(None, description="Долгота")
@@ -33,8 +33,14 @@ class ListResponse(BaseModel, Generic[T]):
 class DeliveryPointFilter(BaseModel):
     method: DeliveryMethods
     city_code: int
+    q: Optional[str] = Field(None, description="Поиск по началу названия пункта")
+    page: int = Field(1, ge=1)
+    size: Optional[int] = Field(None, ge=1, le=1000, description="Без size - все пункты")
 
 
 class CityFilter(BaseModel):
     method: DeliveryMethods
-    country_code: str
\ No newline at end of file
+    country_code: str
+    q: Optional[str] = Field(None, description="Поиск по началу названия города")
+    page: int = Field(1, ge=1)
+    size: Optional[int] = Field(None, ge=1, le=1000, description="Без size - все города")
@@ -1,8 +1,24 @@
+import datetime
+import hashlib
+
+from fastapi import Depends
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db.session import get_session
+from app.modules.delivery.entities import CDEKCityEntity, CDEKDeliveryPointEntity
 from app.modules.delivery.enums.delivery_statuses import DeliveryStatusesEnum
 from app.modules.delivery.methods.cdek import CDEKDeliveryMethod
 from app.modules.delivery.methods.base import BaseDeliveryMethod
 from app.modules.delivery.enums.delivery_methods import DeliveryMethods
-from app.modules.delivery.schemas.get_cities import CityFilter, DeliveryPointFilter
+from app.modules.delivery.schemas.get_cities import (
+    CityFilter,
+    CityResponse,
+    DeliveryPointFilter,
+    DeliveryPointResponse,
+    ListResponse,
+)
 from app.modules.delivery.schemas.get_countries import GetCountriesSchema
 from app.modules.delivery.schemas.delivery_info import (
     DeliveryInfo,
@@ -17,6 +33,15 @@ from app.modules.orders.schemas.order_schema import OrderSchema
 
 
 class DeliveryService:
+    def __init__(self, db: AsyncSession = Depends(get_session)):
+        self.db = db
+
+    @staticmethod
+    def uses_local_directory(method: DeliveryMethods) -> bool:
+        return (
+            method == DeliveryMethods.CDEK and settings.CDEK_DIRECTORY_SOURCE == "local"
+        )
+
     @staticmethod
     def get_delivery_method(method: DeliveryMethods) -> BaseDeliveryMethod:
         return {DeliveryMethods.CDEK: CDEKDeliveryMethod}[method]()
@@ -26,16 +51,128 @@ class DeliveryService:
         return [method for method in DeliveryMethods]
 
     async def get_cities(self, body: CityFilter):
-        method = self.get_delivery_method(body.method)
-        return await method.get_cities(body)
+        if self.uses_local_directory(body.method):
+            return await self._get_local_cities(body)
 
-    async def get_countries(self, body: GetCountriesSchema):
         method = self.get_delivery_method(body.method)
-        return await method.get_countries()
+        cities = await method.get_cities(body)
+        data, count = self._filter_page(cities.data, body, lambda city: city.city)
+        return ListResponse[CityResponse](data=data, count=count)
+
+    async def _get_local_cities(self, body: CityFilter):
+        stmt = select(CDEKCityEntity).where(
+            CDEKCityEntity.country_code == body.country_code
+        )
+        if body.q:
+            # Префиксный поиск по индексу ix_cdek_cities_country_city_prefix
+            stmt = stmt.where(self._prefix_condition(CDEKCityEntity.city, body.q))
+
+        rows, count = await self._fetch_page(
+            stmt.order_by(CDEKCityEntity.city, CDEKCityEntity.code), body
+        )
+        return ListResponse[CityResponse](
+            data=[city.to_dict() for city in rows], count=count
+        )
 
     async def get_addresses(self, body: DeliveryPointFilter):
+        if self.uses_local_directory(body.method):
+            return await self._get_local_addresses(body)
+
         method = self.get_delivery_method(body.method)
-        return await method.get_addresses(body)
+        points = await method.get_addresses(body)
+        data, count = self._filter_page(points.data, body, lambda point: point.name)
+        return ListResponse[DeliveryPointResponse](data=data, count=count)
+
+    async def _get_local_addresses(self, body: DeliveryPointFilter):
+        stmt = select(CDEKDeliveryPointEntity.data).where(
+            CDEKDeliveryPointEntity.city_code == body.city_code
+        )
+        if body.q:
+            # Префиксный поиск по индексу ix_cdek_delivery_points_city_name_prefix
+            stmt = stmt.where(
+                self._prefix_condition(CDEKDeliveryPointEntity.name, body.q)
+            )
+
+        points, count = await self._fetch_page(
+            stmt.order_by(CDEKDeliveryPointEntity.name, CDEKDeliveryPointEntity.code),
+            body,
+        )
+        return ListResponse[DeliveryPointResponse](data=points, count=count)
+
+    @staticmethod
+    def _prefix_condition(column, q: str):
+        prefix = q.lower().replace("%", r"\%").replace("_", r"\_")
+        return func.lower(column).like(f"{prefix}%")
+
+    async def _fetch_page(
+        self, stmt, body: tp.Union[CityFilter, DeliveryPointFilter]
+    ) -> tp.Tuple[list, int]:
+        """Страница page размера size (без size - все строки) и общее количество"""
+        count = await self.db.scalar(
+            select(func.count()).select_from(stmt.order_by(None).subquery())
+        )
+        if body.size:
+            stmt = stmt.offset((body.page - 1) * body.size).limit(body.size)
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all()), count
+
+    @staticmethod
+    def _filter_page(
+        data: list,
+        body: tp.Union[CityFilter, DeliveryPointFilter],
+        name: tp.Callable[[tp.Any], str],
+    ) -> tp.Tuple[list, int]:
+        """То же, что _fetch_page, для списка из API службы доставки"""
+        if body.q:
+            prefix = body.q.lower()
+            data = [item for item in data if name(item).lower().startswith(prefix)]
+        count = len(data)
+        if body.size:
+            data = data[(body.page - 1) * body.size : body.page * body.size]
+        return data, count
+
+    async def get_cities_etag(self, body: CityFilter) -> tp.Optional[str]:
+        """ETag страницы городов локального справочника (None - режим API)"""
+        if not self.uses_local_directory(body.method):
+            return None
+
+        synced_at = await self.db.scalar(
+            select(func.max(CDEKCityEntity.synced_at)).where(
+                CDEKCityEntity.country_code == body.country_code
+            )
+        )
+        return self._directory_etag(
+            synced_at, "cities", body.country_code, body.q, body.page, body.size
+        )
+
+    async def get_addresses_etag(self, body: DeliveryPointFilter) -> tp.Optional[str]:
+        """ETag страницы ПВЗ локального справочника (None - режим API)"""
+        if not self.uses_local_directory(body.method):
+            return None
+
+        synced_at = await self.db.scalar(
+            select(func.max(CDEKDeliveryPointEntity.synced_at)).where(
+                CDEKDeliveryPointEntity.city_code == body.city_code
+            )
+        )
+        return self._directory_etag(
+            synced_at, "delivery", body.city_code, body.q, body.page, body.size
+        )
+
+    @staticmethod
+    def _directory_etag(synced_at: tp.Optional[datetime.datetime], *parts) -> tp.Optional[str]:
+        """
+        ETag по времени выгрузки отдаваемых записей: страна синхронизируется
+        одной транзакцией, поэтому synced_at меняется вместе с данными.
+        """
+        if synced_at is None:
+            return None
+        key = ":".join(str(part) for part in (synced_at.isoformat(), *parts))
+        return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+    async def get_countries(self, body: GetCountriesSchema):
+        method = self.get_delivery_method(body.method)
+        return await method.get_countries()
 
     async def get_order_status(
         self, order: OrderSchema
@@ -43,49 +180,68 @@ class DeliveryService:
         method = self.get_delivery_method(DeliveryMethods(order.delivery_method))
         return await method.get_status(order)
 
-    async def fill_order_delivery_info(self, order: OrderSchema) -> OrderSchema:
-        """Заполнить заказ полной информацией о доставке"""
+    async def fill_order_delivery_info(
+        self, order: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> OrderSchema:
+        """
+        Заполнить заказ полной информацией о доставке.
+
+        Если служба доставки недоступна, заказ в ней не запрашивается:
+        данные берутся из сохраненного статуса и кэша ПВЗ.
+        """
+        method = self.get_delivery_method(DeliveryMethods(order.delivery_method))
+        if not method.is_available() and order_data is None:
+            order_data = {}
+
         try:
-            method = self.get_delivery_method(DeliveryMethods(order.delivery_method))
-            return await method.fill_schema(order)
-        except Exception as e:
+            return await method.fill_schema(order, order_data)
+        except Exception:
             # Если не удалось получить информацию через основной метод,
-            # пытаемся хотя бы получить информацию о ПВЗ
-            try:
-                method = self.get_delivery_method(
-                    DeliveryMethods(order.delivery_method)
-                )
-                delivery_point_info = await method.get_delivery_point_info(
-                    order.delivery_point
-                )
-                if delivery_point_info:
-                    order.delivery_point_info = delivery_point_info
-                    # Создаем базовую информацию о доставке
-                    order.delivery_info = DeliveryInfo(
-                        track_number=order.track_number,
-                        delivery_point_code=order.delivery_point,
-                        delivery_point_address=delivery_point_info.address,
-                        delivery_point_name=delivery_point_info.name,
-                        delivery_point_working_hours=delivery_point_info.working_hours,
-                        delivery_point_phone=delivery_point_info.phone,
-                        estimated_delivery_date=None,
+            # отдаем хотя бы минимальную информацию о доставке
+            delivery_point_info = None
+            if method.is_available():
+                try:
+                    delivery_point_info = await method.get_delivery_point_info(
+                        order.delivery_point
                     )
-            except Exception:
-                pass  # Не удалось получить даже информацию о ПВЗ
+                except Exception:
+                    pass  # Не удалось получить даже информацию о ПВЗ
 
+            order.delivery_point_info = delivery_point_info
+            order.delivery_info = DeliveryInfo(
+                track_number=order.track_number,
+                delivery_point_code=order.delivery_point,
+                delivery_point_address=(
+                    delivery_point_info.address if delivery_point_info else None
+                ),
+                delivery_point_name=(
+                    delivery_point_info.name if delivery_point_info else None
+                ),
+                delivery_point_working_hours=(
+                    delivery_point_info.working_hours if delivery_point_info else None
+                ),
+                delivery_point_phone=(
+                    delivery_point_info.phone if delivery_point_info else None
+                ),
+                estimated_delivery_date=None,
+            )
             return order
 
-    async def get_delivery_info(self, order: OrderSchema) -> tp.Optional[DeliveryInfo]:
+    async def get_delivery_info(
+        self, order: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> tp.Optional[DeliveryInfo]:
         try:
             method = self.get_delivery_method(DeliveryMethods(order.delivery_method))
-            return await method.get_delivery_info(order)
+            return await method.get_delivery_info(order, order_data)
         except Exception:
             return None
 
-    async def get_tracking_info(self, order: OrderSchema) -> tp.Optional[TrackingInfo]:
+    async def get_tracking_info(
+        self, order: OrderSchema, order_data: tp.Optional[dict] = None
+    ) -> tp.Optional[TrackingInfo]:
         try:
             method = self.get_delivery_method(DeliveryMethods(order.delivery_method))
-            return await method.get_tracking_info(order)
+            return await method.get_tracking_info(order, order_data)
         except Exception:
             return None
 
@@ -0,0 +1,332 @@
+import asyncio
+import datetime
+import logging
+import typing as tp
+
+from fastapi import Depends
+from sqlalchemy import literal, select, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db.session import get_session, AsyncSessionLocal
+from app.modules.delivery.entities import (
+    OrderDeliveryStatusEntity,
+    OrderDeliveryStatusHistoryEntity,
+)
+from app.modules.delivery.enums.delivery_statuses import DeliveryStatusesEnum
+from app.modules.delivery.methods.cdek import CDEKDeliveryMethod, CDEKError
+from app.modules.orders.entities import OrderEntity
+from app.utils.date import parse_datetime
+from app.utils.rate_limit import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (DeliveryStatusesEnum.DELIVERED, DeliveryStatusesEnum.CANCELLED)
+
+# (возраст заказа, интервал опроса): свежие заказы опрашиваются часто, старые - редко
+REFRESH_SCHEDULE = (
+    (datetime.timedelta(days=2), datetime.timedelta(minutes=15)),
+    (datetime.timedelta(days=7), datetime.timedelta(hours=1)),
+    (datetime.timedelta(days=30), datetime.timedelta(hours=6)),
+)
+REFRESH_INTERVAL_MAX = datetime.timedelta(days=1)
+
+# На сколько откладывается заказ, взятый воркером в работу
+REFRESH_LEASE = datetime.timedelta(minutes=5)
+
+# Статус строки-заглушки: заказ только что принят CDEK
+INITIAL_STATUS_CODE = "ACCEPTED"
+
+
+def get_next_check_at(
+    status: DeliveryStatusesEnum,
+    order_created_at: tp.Optional[datetime.datetime],
+    now: datetime.datetime,
+) -> tp.Optional[datetime.datetime]:
+    if status in TERMINAL_STATUSES:
+        return None
+
+    age = now - order_created_at if order_created_at else REFRESH_INTERVAL_MAX
+    for max_age, interval in REFRESH_SCHEDULE:
+        if age < max_age:
+            return now + interval
+    return now + REFRESH_INTERVAL_MAX
+
+
+class UnknownDeliveryOrder(ValueError):
+    pass
+
+
+class DeliveryStatusService:
+    """Хранимые статусы доставки заказов"""
+
+    def __init__(self, db: AsyncSession = Depends(get_session)):
+        self.db = db
+        self.cdek = CDEKDeliveryMethod()
+
+    async def get_statuses(
+        self, order_ids: tp.Iterable[str]
+    ) -> tp.Dict[str, OrderDeliveryStatusEntity]:
+        order_ids = list(order_ids)
+        if not order_ids:
+            return {}
+
+        result = await self.db.execute(
+            select(OrderDeliveryStatusEntity).where(
+                OrderDeliveryStatusEntity.order_id.in_(order_ids)
+            )
+        )
+        return {status.order_id: status for status in result.scalars().all()}
+
+    async def save_status(
+        self,
+        order_id: str,
+        cdek_order_uuid: tp.Optional[str],
+        status_code: str,
+        status_date: tp.Optional[datetime.datetime],
+        city: tp.Optional[str] = None,
+        order_created_at: tp.Optional[datetime.datetime] = None,
+    ) -> DeliveryStatusesEnum:
+        """
+        Сохраняет статус в историю и обновляет последний статус заказа.
+
+        Более старые по status_date события (повторы, доставка не по порядку)
+        попадают только в историю.
+        """
+        status = await self.cdek.map_delivery_status(status_code)
+        now = datetime.datetime.now(datetime.UTC)
+        next_check_at = get_next_check_at(status, order_created_at, now)
+
+        await self.db.execute(
+            insert(OrderDeliveryStatusHistoryEntity)
+            .values(
+                order_id=order_id,
+                status_code=status_code,
+                status=status,
+                status_date=status_date,
+                city=city,
+                created_at=now,
+            )
+            .on_conflict_do_nothing(constraint="uq_order_delivery_status_history_event")
+        )
+
+        stmt = insert(OrderDeliveryStatusEntity).values(
+            order_id=order_id,
+            cdek_order_uuid=cdek_order_uuid,
+            status_code=status_code,
+            status=status,
+            status_date=status_date,
+            updated_at=now,
+            next_check_at=next_check_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrderDeliveryStatusEntity.order_id],
+            set_={
+                "cdek_order_uuid": stmt.excluded.cdek_order_uuid,
+                "status_code": stmt.excluded.status_code,
+                "status": stmt.excluded.status,
+                "status_date": stmt.excluded.status_date,
+                "updated_at": stmt.excluded.updated_at,
+                "next_check_at": stmt.excluded.next_check_at,
+            },
+            where=or_(
+                OrderDeliveryStatusEntity.status_date.is_(None),
+                stmt.excluded.status_date.is_(None),
+                OrderDeliveryStatusEntity.status_date <= stmt.excluded.status_date,
+            ),
+        )
+        await self.db.execute(stmt)
+        await self.db.commit()
+        return status
+
+    async def apply_cdek_webhook(self, payload: dict) -> DeliveryStatusesEnum:
+        """Обработать вебхук CDEK типа ORDER_STATUS"""
+        cdek_order_uuid = payload.get("uuid")
+        attributes = payload.get("attributes") or {}
+        status_code = attributes.get("code")
+        if not cdek_order_uuid or not status_code:
+            raise ValueError("Invalid CDEK ORDER_STATUS payload")
+
+        order = (
+            await self.db.execute(
+                select(OrderEntity.id, OrderEntity.created_at).where(
+                    OrderEntity.cdek_order_uuid == cdek_order_uuid
+                )
+            )
+        ).first()
+        if order is None:
+            raise UnknownDeliveryOrder(f"Order not found for CDEK uuid {cdek_order_uuid}")
+
+        return await self.save_status(
+            order.id,
+            cdek_order_uuid,
+            status_code,
+            parse_datetime(attributes.get("status_date_time")),
+            attributes.get("city_name"),
+            order.created_at,
+        )
+
+    async def refresh_from_cdek(
+        self,
+        order_id: str,
+        cdek_order_uuid: str,
+        order_created_at: tp.Optional[datetime.datetime] = None,
+    ):
+        """Запросить текущий статус заказа напрямую в CDEK и сохранить его"""
+        order_data = await self.cdek._get_cdek_order_data(cdek_order_uuid)
+        status_code, status_date = self.cdek.extract_status(order_data)
+        if status_code is None:
+            raise CDEKError("CDEK order status not found in response")
+
+        return await self.save_status(
+            order_id,
+            cdek_order_uuid,
+            status_code,
+            parse_datetime(status_date),
+            order_created_at=order_created_at,
+        )
+
+    async def claim_due_orders(
+        self, limit: int
+    ) -> tp.List[tp.Tuple[str, str, datetime.datetime]]:
+        """
+        Выбрать заказы, которые пора опросить в CDEK, и отложить их на время
+        обработки, чтобы другие воркеры не взяли те же заказы.
+
+        :return: [(order_id, cdek_order_uuid, created_at)]
+        """
+        now = datetime.datetime.now(datetime.UTC)
+
+        # Заказам без сохраненного статуса (созданы до появления вебхуков или
+        # статус еще не пришел) заводится строка-заглушка, которая сразу
+        # попадает в общую очередь и перезаписывается первым реальным статусом
+        without_status = (
+            select(
+                OrderEntity.id,
+                OrderEntity.cdek_order_uuid,
+                literal(INITIAL_STATUS_CODE),
+                literal(
+                    DeliveryStatusesEnum.CREATED, OrderDeliveryStatusEntity.status.type
+                ),
+                literal(now, OrderDeliveryStatusEntity.updated_at.type),
+                literal(now, OrderDeliveryStatusEntity.next_check_at.type),
+            )
+            .outerjoin(
+                OrderDeliveryStatusEntity,
+                OrderDeliveryStatusEntity.order_id == OrderEntity.id,
+            )
+            .where(
+                OrderEntity.cdek_order_uuid.is_not(None),
+                OrderDeliveryStatusEntity.order_id.is_(None),
+            )
+            .order_by(OrderEntity.created_at, OrderEntity.id)
+            .limit(limit)
+        )
+        await self.db.execute(
+            insert(OrderDeliveryStatusEntity)
+            .from_select(
+                [
+                    "order_id",
+                    "cdek_order_uuid",
+                    "status_code",
+                    "status",
+                    "updated_at",
+                    "next_check_at",
+                ],
+                without_status,
+            )
+            .on_conflict_do_nothing(index_elements=[OrderDeliveryStatusEntity.order_id])
+        )
+
+        due_ids = (
+            select(OrderDeliveryStatusEntity.order_id)
+            .where(OrderDeliveryStatusEntity.next_check_at <= now)
+            .order_by(
+                OrderDeliveryStatusEntity.next_check_at,
+                OrderDeliveryStatusEntity.order_id,
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        claimed = await self.db.execute(
+            update(OrderDeliveryStatusEntity)
+            .where(OrderDeliveryStatusEntity.order_id.in_(due_ids))
+            .values(next_check_at=now + REFRESH_LEASE)
+            .returning(OrderDeliveryStatusEntity.order_id)
+        )
+        claimed_ids = claimed.scalars().all()
+        await self.db.commit()
+
+        if not claimed_ids:
+            return []
+
+        result = await self.db.execute(
+            select(
+                OrderEntity.id, OrderEntity.cdek_order_uuid, OrderEntity.created_at
+            ).where(
+                OrderEntity.id.in_(claimed_ids),
+                OrderEntity.cdek_order_uuid.is_not(None),
+            )
+        )
+        return [tuple(row) for row in result.all()]
+
+
+class DeliveryStatusRefresher:
+    """
+    Фоновый воркер, обновляющий статусы незавершенных доставок.
+
+    Опрашивает CDEK пачками с ограничением частоты запросов, по расписанию,
+    зависящему от возраста заказа. Пользовательские запросы читают только
+    сохраненный результат и не ждут CDEK.
+    """
+
+    def __init__(self):
+        self.batch_size = settings.CDEK_STATUS_REFRESH_BATCH
+        self.rate_limiter = AsyncRateLimiter(settings.CDEK_STATUS_REFRESH_RATE)
+        self.semaphore = asyncio.Semaphore(settings.CDEK_STATUS_REFRESH_CONCURRENCY)
+
+    async def refresh_batch(self) -> int:
+        """
+        :return: количество успешно обновленных заказов
+        """
+        async with AsyncSessionLocal() as db:
+            due = await DeliveryStatusService(db).claim_due_orders(self.batch_size)
+
+        results = await asyncio.gather(*(self._refresh_one(*order) for order in due))
+        return sum(results)
+
+    async def _refresh_one(
+        self, order_id: str, cdek_order_uuid: str, created_at: datetime.datetime
+    ) -> bool:
+        async with self.semaphore:
+            await self.rate_limiter.acquire()
+            # У каждого запроса своя сессия: AsyncSession нельзя делить между задачами
+            async with AsyncSessionLocal() as db:
+                try:
+                    await DeliveryStatusService(db).refresh_from_cdek(
+                        order_id, cdek_order_uuid, created_at
+                    )
+                    return True
+                except CDEKError as e:
+                    logger.warning("CDEK status refresh failed for %s: %s", order_id, e)
+                    return False
+
+    async def run(self):
+        while True:
+            try:
+                refreshed = await self.refresh_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("CDEK status refresh failed: %s", e)
+                refreshed = 0
+
+            # Полная пачка - есть еще просроченные заказы, продолжаем без паузы
+            if refreshed < self.batch_size:
+                await asyncio.sleep(settings.CDEK_STATUS_REFRESH_POLL_INTERVAL)
+
+
+async def run_status_refresher_loop():
+    await DeliveryStatusRefresher().run()
@@ -0,0 +1,100 @@
+import hashlib
+import itertools
+import typing as tp
+
+import pydantic_core
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.modules.goods.entities import (
+    GoodEntity,
+    GoodVariationEntity,
+    GoodVariationPhotoEntity,
+)
+from app.modules.goods.schemas.get_schemas import GetGoodsSchema
+from app.modules.prices.entities import GoodVariationPriceEntity
+from app.utils.cache import TTLCache
+
+# ORM-изменения этих сущностей сбрасывают снимок каталога после коммита
+CATALOG_ENTITIES = (
+    GoodEntity,
+    GoodVariationEntity,
+    GoodVariationPhotoEntity,
+    GoodVariationPriceEntity,
+)
+
+
+class CatalogPage(tp.NamedTuple):
+    etag: str
+    body: bytes
+
+
+class CatalogSnapshot:
+    """
+    Готовые JSON-страницы каталога GET /goods/ в памяти процесса.
+
+    Страница строится один раз на параметры запроса GetGoodsSchema и отдается
+    байтами вместе с ETag. Любое изменение товаров, вариаций, цен, остатков
+    или фото вызывает invalidate(): версия снимка увеличивается, и следующие
+    запросы собирают страницы заново. ORM-изменения (в том числе из админки)
+    отслеживаются событиями сессии, массовые UPDATE вызывают invalidate()
+    явно. Другие воркеры увидят изменения не позже чем через
+    CATALOG_CACHE_TTL секунд.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.version = 0
+        self.pages: TTLCache[tuple, CatalogPage] = TTLCache(maxsize, ttl)
+
+    def invalidate(self):
+        # Страница, собиравшаяся до изменения, сохранится под старой версией
+        # и уже не будет прочитана
+        self.version += 1
+        self.pages.clear()
+
+    @staticmethod
+    def encode(content: tp.Any) -> CatalogPage:
+        # pydantic-core сериализует словари/списки из проекций каталога без
+        # промежуточного jsonable_encoder; ORM-объекты - через него же
+        body = pydantic_core.to_json(content, fallback=jsonable_encoder)
+        return CatalogPage(
+            etag=f'"{hashlib.sha1(body).hexdigest()}"', body=body
+        )
+
+    async def get_page(
+        self,
+        data: GetGoodsSchema,
+        load: tp.Callable[[], tp.Awaitable[tp.Sequence]],
+    ) -> CatalogPage:
+        """
+        :param load: загрузчик со своей сессией БД: он может выполняться в фоне
+            после ответа или для параллельных запросов с теми же параметрами
+        """
+        key = (self.version, tuple(data.model_dump().items()))
+
+        async def build() -> CatalogPage:
+            return self.encode(await load())
+
+        return await self.pages.get_or_load(key, build)
+
+
+catalog_snapshot = CatalogSnapshot(
+    ttl=settings.CATALOG_CACHE_TTL, maxsize=settings.CATALOG_CACHE_MAXSIZE
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_catalog_changes(session: Session, flush_context):
+    if any(
+        isinstance(instance, CATALOG_ENTITIES)
+        for instance in itertools.chain(session.new, session.dirty, session.deleted)
+    ):
+        session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalog_on_commit(session: Session):
+    if session.info.pop("catalog_changed", False):
+        catalog_snapshot.invalidate()
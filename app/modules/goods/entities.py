@@ -1,7 +1,21 @@
+import typing as tp
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Integer, String, ForeignKey, Boolean, Float, DateTime, Enum
+from sqlalchemy import (
+    Integer,
+    String,
+    ForeignKey,
+    Boolean,
+    Float,
+    DateTime,
+    Enum,
+    Index,
+    Computed,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db.session import Base
@@ -11,6 +25,24 @@ from app.modules.goods.schemas.good_variation_schema import GoodVariationSchema
 
 class GoodEntity(Base):
     __tablename__ = "goods"
+    __table_args__ = (
+        # Стабильный порядок каталога и keyset-пагинация по (created_at, id)
+        Index("ix_goods_created_at_id", "created_at", "id"),
+        Index("ix_goods_search_vector", "search_vector", postgresql_using="gin"),
+        # Опечатки в поиске: `q <% title`
+        Index(
+            "ix_goods_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        # Первая ступень поиска: совпадения только по названию товара
+        Index(
+            "ix_goods_title_tsvector",
+            text("to_tsvector('russian'::regconfig, title)"),
+            postgresql_using="gin",
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         String, primary_key=True, default=lambda: str(uuid.uuid4())
@@ -28,12 +60,42 @@ class GoodEntity(Base):
 
     show_in_catalog: Mapped[bool] = mapped_column(Boolean, nullable=True, default=True)
 
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    # Поисковый вектор (russian): заголовок весомее описания. Не загружается
+    # вместе с товаром, чтобы не попадать в ответы API
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
     def __str__(self):
         return self.title
 
 
 class GoodVariationEntity(Base):
     __tablename__ = "goods_variations"
+    __table_args__ = (
+        Index(
+            "ix_goods_variations_search_vector", "search_vector", postgresql_using="gin"
+        ),
+        # Фильтры и фасеты каталога: агрегаты по good_id и диапазоны цены/веса
+        Index("ix_goods_variations_good_id_price", "good_id", "latest_price"),
+        Index("ix_goods_variations_price_good_id", "latest_price", "good_id"),
+        Index("ix_goods_variations_weight_good_id", "weight", "good_id"),
+        Index(
+            "ix_goods_variations_in_stock_good_id",
+            "good_id",
+            postgresql_where=text("coalesce(remaining_stock, 0) > 0"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         String, primary_key=True, default=lambda: str(uuid.uuid4())
@@ -64,6 +126,16 @@ class GoodVariationEntity(Base):
         DateTime(timezone=True), nullable=True
     )
 
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'C')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
     def __str__(self):
         return self.title
 
@@ -88,7 +160,10 @@ class GoodVariationEntity(Base):
             height=self.height,
             remaining_stock=self.remaining_stock,
             remaining_stock_date=self.remaining_stock_date,
-            photos=[{"url": photo.url} for photo in self.photos],
+            photos=[
+                {"url": photo.url, "srcset": photo.srcset, "variants": photo.variants}
+                for photo in self.photos
+            ],
         )
 
 
@@ -104,4 +179,9 @@ class GoodVariationPhotoEntity(Base):
     url: Mapped[str] = mapped_column(String)
     is_main: Mapped[bool] = mapped_column(Boolean)
 
+    # Уменьшенные копии [{"url", "width", "height", "format"}] и srcset (WebP),
+    # заполняются ImagePipeline после загрузки
+    variants: Mapped[tp.Optional[list]] = mapped_column(JSONB, nullable=True)
+    srcset: Mapped[tp.Optional[str]] = mapped_column(String, nullable=True)
+
     variation: Mapped["GoodVariationEntity"] = relationship(back_populates="photos")
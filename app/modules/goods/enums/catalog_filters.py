@@ -0,0 +1,24 @@
+from enum import Enum
+
+
+class GoodsSort(str, Enum):
+    CREATED = "created"
+    NEWEST = "newest"
+    PRICE_ASC = "price_asc"
+    PRICE_DESC = "price_desc"
+
+
+class WeightBucket(str, Enum):
+    """Вес вариации, кг"""
+
+    LIGHT = "light"  # < 0.5
+    MEDIUM = "medium"  # 0.5 - 2
+    HEAVY = "heavy"  # >= 2
+
+
+class DimensionsBucket(str, Enum):
+    """Наибольший из габаритов вариации (длина, ширина, высота), см"""
+
+    SMALL = "small"  # < 20
+    MEDIUM = "medium"  # 20 - 50
+    LARGE = "large"  # >= 50
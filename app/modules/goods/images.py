@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import typing as tp
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.db.session import AsyncSessionLocal
+from app.core.storage import StorageError, media_storage
+from app.modules.goods.catalog import catalog_snapshot
+from app.modules.goods.entities import GoodVariationPhotoEntity
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = "variants"
+
+
+class ImageProcessingError(ValueError):
+    pass
+
+
+def build_variants(
+    path: str,
+    output_dir: str,
+    widths: tp.Sequence[int],
+    quality: int,
+    avif: bool,
+) -> tp.List[dict]:
+    """
+    Уменьшенные копии изображения в WebP (и AVIF, если доступен).
+
+    Выполняется в процессе пула: только stdlib/Pillow и примитивные аргументы.
+    Имена файлов содержат хэш содержимого оригинала, поэтому повторная
+    обработка того же изображения ничего не пересчитывает. Возвращает ключи
+    файлов относительно output_dir.
+    """
+    from PIL import Image, ImageOps, features
+
+    with open(path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()[:16]
+
+    formats = [("webp", "WEBP")]
+    if avif and features.check("avif"):
+        formats.append(("avif", "AVIF"))
+
+    prefix = f"{VARIANTS_DIR}/{digest[:2]}"
+    directory = os.path.join(output_dir, prefix)
+    os.makedirs(directory, exist_ok=True)
+
+    variants = []
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        # Без увеличения: ширины больше оригинала заменяются самим оригиналом
+        targets = sorted({min(width, image.width) for width in widths})
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = None
+            for extension, pil_format in formats:
+                name = f"{digest}-{width}.{extension}"
+                target = os.path.join(directory, name)
+                if not os.path.exists(target):
+                    if resized is None:
+                        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+                    tmp = f"{target}.tmp"
+                    resized.save(tmp, pil_format, quality=quality)
+                    os.replace(tmp, target)
+                variants.append(
+                    {
+                        "key": f"{prefix}/{name}",
+                        "width": width,
+                        "height": height,
+                        "format": extension,
+                    }
+                )
+    return variants
+
+
+def build_srcset(variants: tp.Sequence[dict], image_format: str = "webp") -> str:
+    return ", ".join(
+        f"{variant['url']} {variant['width']}w"
+        for variant in variants
+        if variant["format"] == image_format
+    )
+
+
+class ImagePipeline:
+    """
+    Обработка фото вариаций в пуле процессов.
+
+    Resize/encode занимает CPU на сотни миллисекунд, поэтому выполняется вне
+    event loop; результат (variants и srcset) сохраняется в
+    goods_variation_photos отдельной сессией.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: tp.Optional[ProcessPoolExecutor] = None
+        self._tasks: tp.Set[asyncio.Task] = set()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def build(self, url: str) -> tp.List[dict]:
+        key = media_storage.key_for_url(url)
+        if key is None:
+            raise ImageProcessingError(f"Photo {url} is not stored in media storage")
+
+        # Локальное хранилище получает варианты сразу в своем каталоге,
+        # для удаленного они собираются во временном и затем загружаются
+        output_dir = media_storage.local_root or tempfile.mkdtemp(prefix="variants-")
+        try:
+            async with media_storage.local_copy(key) as path:
+                loop = asyncio.get_running_loop()
+                variants = await loop.run_in_executor(
+                    self.executor,
+                    build_variants,
+                    path,
+                    output_dir,
+                    tuple(settings.IMAGE_VARIANT_WIDTHS),
+                    settings.IMAGE_QUALITY,
+                    settings.IMAGE_AVIF,
+                )
+            if media_storage.local_root is None:
+                await asyncio.gather(
+                    *(
+                        media_storage.save_file(
+                            variant["key"],
+                            os.path.join(output_dir, variant["key"]),
+                            f"image/{variant['format']}",
+                        )
+                        for variant in variants
+                    )
+                )
+        except StorageError as e:
+            raise ImageProcessingError(f"Photo {url}: {e}")
+        finally:
+            if media_storage.local_root is None:
+                await asyncio.to_thread(shutil.rmtree, output_dir, True)
+
+        return [
+            {"url": media_storage.url(variant.pop("key")), **variant}
+            for variant in variants
+        ]
+
+    async def process_photo(self, photo_id: str, url: str) -> bool:
+        try:
+            variants = await self.build(url)
+        except ImageProcessingError as e:
+            logger.info("%s", e)
+            return False
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(GoodVariationPhotoEntity)
+                .where(GoodVariationPhotoEntity.id == photo_id)
+                .values(variants=variants, srcset=build_srcset(variants))
+            )
+            await db.commit()
+
+        catalog_snapshot.invalidate()
+        return True
+
+    def schedule(self, photo_id: str, url: str):
+        """Обработать фото в фоне, не задерживая ответ на загрузку"""
+        task = asyncio.create_task(self.process_photo(photo_id, url))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Photo processing failed: %s", task.exception())
+
+    async def backfill(self, batch: int = 100) -> int:
+        """Обработать все фото без variants; возвращает число обработанных"""
+        processed = 0
+        failed: tp.Set[str] = set()
+        while True:
+            async with AsyncSessionLocal() as db:
+                stmt = (
+                    select(GoodVariationPhotoEntity.id, GoodVariationPhotoEntity.url)
+                    .where(GoodVariationPhotoEntity.variants.is_(None))
+                    .order_by(GoodVariationPhotoEntity.id)
+                    .limit(batch + len(failed))
+                )
+                rows = [
+                    row for row in (await db.execute(stmt)).all() if row.id not in failed
+                ]
+            if not rows:
+                return processed
+
+            results = await asyncio.gather(
+                *(self.process_photo(row.id, row.url) for row in rows),
+                return_exceptions=True,
+            )
+            for row, result in zip(rows, results):
+                if result is True:
+                    processed += 1
+                else:
+                    failed.add(row.id)
+                    if isinstance(result, Exception):
+                        logger.warning("Photo %s processing failed: %s", row.id, result)
+
+
+image_pipeline = ImagePipeline(workers=settings.IMAGE_PROCESS_WORKERS)
+
+
+if __name__ == "__main__":
+    # Обработка уже загруженных фото: python -m app.modules.goods.images
+    async def main():
+        try:
+            processed = await image_pipeline.backfill()
+            print(f"Processed {processed} photos")
+        finally:
+            image_pipeline.shutdown()
+
+    asyncio.run(main())
@@ -1,33 +1,81 @@
-from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
+import typing as tp
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    File,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.exceptions import RequestValidationError
 from fastapi.params import Query
+from pydantic import ValidationError
 
+from app.core.storage import DirectUploadNotSupportedError, StorageError
+from app.modules.goods.catalog import catalog_snapshot
+from app.modules.goods.schemas.catalog_schemas import CatalogGoodSchema
 from app.modules.goods.schemas.create import CreateGoodSchema
 from app.modules.goods.schemas.create_variation_schema import CreateVariationSchema
-from app.modules.goods.schemas.get_schemas import GetGoodsSchema
+from app.modules.goods.schemas.get_schemas import GetGoodsSchema, SearchGoodsSchema
+from app.modules.goods.schemas.get_variations_batch_schema import (
+    GetVariationsBatchSchema,
+)
+from app.modules.goods.schemas.photo_upload_schema import (
+    CreatePhotoUploadSchema,
+    PhotoUploadSchema,
+)
 from app.modules.goods.schemas.set_remaining_stock_schema import SetRemainingStockSchema
 from app.modules.goods.schemas.upload_photo_schema import UploadPhotoSchema
-from app.modules.goods.service import GoodsService
+from app.modules.goods.service import (
+    GoodsService,
+    InvalidCursorError,
+    InvalidFieldsError,
+    VariationNotFoundError,
+)
+from app.utils.uploads import InvalidUploadError, UploadTooLargeError
 
 router = APIRouter()
 
 
 @router.get("/")
 async def get_all(
+    request: Request,
     data: GetGoodsSchema = Depends(),
+):
+    try:
+        page = await catalog_snapshot.get_page(
+            data, lambda: GoodsService.load_catalog(data)
+        )
+    except InvalidCursorError:
+        raise HTTPException(detail="Invalid cursor", status_code=400)
+    except InvalidFieldsError as e:
+        raise HTTPException(detail=str(e), status_code=400)
+
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == page.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(page.body, media_type="application/json", headers=headers)
+
+
+@router.get("/search", response_model=tp.List[CatalogGoodSchema])
+async def search(
+    data: SearchGoodsSchema = Depends(),
     service: GoodsService = Depends(),
 ):
-    goods = await service.get_goods(data)
-    return goods
+    return await service.search(data)
 
 
-@router.get("/{good_id}")
+@router.get("/{good_id}", response_model=CatalogGoodSchema)
 async def get_by_id(good_id: str, service: GoodsService = Depends()):
-    good = await service.get_by_id(good_id)
-    if good is None:
+    goods = await service.load_catalog_goods([good_id])
+    if not goods:
         raise HTTPException(
             detail="Good with provided id can not be found", status_code=404
         )
-    return good
+    return goods[0]
 
 
 @router.put("/update")
@@ -64,6 +112,14 @@ async def delete(good_id: str, service: GoodsService = Depends()):
     return {"detail": "Good deleted successfully"}
 
 
+@router.post("/variations/batch")
+async def get_variations_batch(
+    data: GetVariationsBatchSchema, service: GoodsService = Depends()
+):
+    variations, missing = await service.get_variations_by_ids(data.ids)
+    return {"data": variations, "missing": missing}
+
+
 @router.get("/variation/{variation_id}")
 async def get_variation_by_id(variation_id: str, service: GoodsService = Depends()):
     variation = await service.get_variation_by_id(variation_id)
@@ -105,19 +161,80 @@ async def update_variation(
     return variation
 
 
-@router.post("/variation/{variation_id}/upload-photo")
+@router.post(
+    "/variation/{variation_id}/upload-photo",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                },
+                "application/json": {"schema": UploadPhotoSchema.model_json_schema()},
+            },
+        }
+    },
+)
 async def upload_variation_photo(
-    variation_id: str, data: UploadPhotoSchema, service: GoodsService = Depends()
+    variation_id: str, request: Request, service: GoodsService = Depends()
 ):
+    """
+    multipart/form-data с файлом в поле file - потоковая загрузка в хранилище;
+    JSON {"url": ...} - привязка уже загруженного файла (см. photo-upload-url)
+    """
+    content_type = request.headers.get("content-type", "")
+    content_length = request.headers.get("content-length")
     try:
-        await service.upload_photos(variation_id, data.url)
+        content_length = int(content_length) if content_length else None
     except ValueError:
+        raise HTTPException(detail="Invalid Content-Length header", status_code=400)
+
+    try:
+        if content_type.startswith("multipart/form-data"):
+            await service.upload_photo_file(
+                variation_id, request.stream(), content_type, content_length
+            )
+        else:
+            try:
+                data = UploadPhotoSchema.model_validate_json(await request.body())
+            except ValidationError as e:
+                raise RequestValidationError(e.errors())
+            await service.upload_photos(variation_id, data.url)
+    except UploadTooLargeError as e:
+        raise HTTPException(detail=str(e), status_code=413)
+    except InvalidUploadError as e:
+        raise HTTPException(detail=str(e), status_code=400)
+    except StorageError as e:
+        raise HTTPException(detail=f"Media storage error: {e}", status_code=502)
+    except VariationNotFoundError:
         raise HTTPException(
             detail="Good variation with provided id can not be found", status_code=404
         )
     return {"status": "success"}
 
 
+@router.post(
+    "/variation/{variation_id}/photo-upload-url", response_model=PhotoUploadSchema
+)
+async def create_photo_upload(
+    variation_id: str,
+    data: CreatePhotoUploadSchema,
+    service: GoodsService = Depends(),
+):
+    try:
+        return await service.create_photo_upload(variation_id, data)
+    except DirectUploadNotSupportedError as e:
+        raise HTTPException(detail=str(e), status_code=400)
+    except VariationNotFoundError:
+        raise HTTPException(
+            detail="Good variation with provided id can not be found", status_code=404
+        )
+
+
 @router.delete("/variation/{variation_id}/delete-photo/{id}")
 async def delete_variation_photo(
     variation_id: str, id: str, service: GoodsService = Depends()
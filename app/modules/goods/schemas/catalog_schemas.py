@@ -0,0 +1,72 @@
+import typing as tp
+from datetime import datetime
+
+from typing_extensions import TypedDict
+
+from app.modules.goods.enums.vat_rates import VATRate
+
+# Ответы каталога - TypedDict: строятся прямо из строк select(...) без
+# ORM-объектов и без создания экземпляров моделей, а pydantic использует их
+# для схемы OpenAPI и сериализации. total=False - из-за sparse fieldset (fields=)
+
+
+class CatalogPhotoSchema(TypedDict, total=False):
+    id: str
+    variation_id: str
+    url: str
+    is_main: tp.Optional[bool]
+    srcset: tp.Optional[str]
+    variants: tp.Optional[tp.List[dict]]
+
+
+class CatalogVariationSchema(TypedDict, total=False):
+    id: str
+    good_id: str
+
+    title: str
+    description: str
+
+    latest_price: tp.Optional[float]
+    latest_price_date: tp.Optional[datetime]
+
+    weight: tp.Optional[float]
+    length: tp.Optional[float]
+    width: tp.Optional[float]
+    height: tp.Optional[float]
+
+    remaining_stock: tp.Optional[int]
+    remaining_stock_date: tp.Optional[datetime]
+
+    photos: tp.List[CatalogPhotoSchema]
+
+
+class CatalogGoodSchema(TypedDict, total=False):
+    id: str
+    title: str
+    description: str
+    vat_rate: tp.Optional[VATRate]
+    show_in_catalog: tp.Optional[bool]
+    created_at: tp.Optional[datetime]
+
+    variations: tp.List[CatalogVariationSchema]
+
+
+class CatalogPageSchema(TypedDict, total=False):
+    data: tp.List[CatalogGoodSchema]
+    next_cursor: tp.Optional[str]
+    facets: dict
+
+
+class CatalogFieldSet(tp.NamedTuple):
+    """Запрошенные поля: None - уровень не загружается вовсе"""
+
+    good: tp.FrozenSet[str]
+    variation: tp.Optional[tp.FrozenSet[str]]
+    photo: tp.Optional[tp.FrozenSet[str]]
+
+
+GOOD_FIELDS = frozenset(CatalogGoodSchema.__annotations__) - {"variations"}
+VARIATION_FIELDS = frozenset(CatalogVariationSchema.__annotations__) - {"photos"}
+PHOTO_FIELDS = frozenset(CatalogPhotoSchema.__annotations__)
+
+ALL_CATALOG_FIELDS = CatalogFieldSet(GOOD_FIELDS, VARIATION_FIELDS, PHOTO_FIELDS)
@@ -1,10 +1,53 @@
 import typing as tp
 from fastapi import Query
-from pydantic import BaseModel
+from pydantic import BaseModel, BeforeValidator
+
+from app.modules.goods.enums.catalog_filters import (
+    DimensionsBucket,
+    GoodsSort,
+    WeightBucket,
+)
+from app.modules.goods.enums.vat_rates import VATRate
+
+
+def parse_vat_rate(value: tp.Any) -> tp.Any:
+    """VATRate из query-строки: значение ("3") или имя ("VAT_20")"""
+    if not isinstance(value, str):
+        return value
+    if value.isdigit():
+        return VATRate(int(value))
+    try:
+        return VATRate[value]
+    except KeyError:
+        raise ValueError(f"Unknown VAT rate: {value}")
 
 
 class GetGoodsSchema(BaseModel):
     id: tp.Optional[str] = Query(None)
     page: tp.Optional[int] = Query(1, ge=1)
-    size: tp.Optional[int] = Query(10, le=100)
+    size: tp.Optional[int] = Query(10, ge=1, le=100)
+    show_hidden: tp.Optional[bool] = Query(False)
+    # Keyset-пагинация: пустая строка - первая страница, далее next_cursor из ответа
+    cursor: tp.Optional[str] = Query(None)
+
+    # Фильтры по вариациям: товар попадает в выдачу, если подходит хотя бы одна
+    price_min: tp.Optional[float] = Query(None, ge=0)
+    price_max: tp.Optional[float] = Query(None, ge=0)
+    in_stock: tp.Optional[bool] = Query(None)
+    weight: tp.Optional[WeightBucket] = Query(None)
+    dimensions: tp.Optional[DimensionsBucket] = Query(None)
+
+    vat_rate: tp.Optional[tp.Annotated[VATRate, BeforeValidator(parse_vat_rate)]] = Query(
+        None
+    )
+    sort: GoodsSort = Query(GoodsSort.CREATED)
+    # Вернуть {"data": ..., "facets": ...} со счетчиками по отфильтрованному каталогу
+    facets: bool = Query(False)
+    # Sparse fieldset: "id,title,variations.latest_price,variations.photos.url"
+    fields: tp.Optional[str] = Query(None, max_length=500)
+
+
+class SearchGoodsSchema(BaseModel):
+    q: str = Query(..., min_length=2, max_length=100)
+    size: tp.Optional[int] = Query(20, ge=1, le=50)
     show_hidden: tp.Optional[bool] = Query(False)
@@ -0,0 +1,7 @@
+import typing as tp
+
+from pydantic import BaseModel, Field
+
+
+class GetVariationsBatchSchema(BaseModel):
+    ids: tp.List[str] = Field(..., min_length=1, max_length=100)
@@ -0,0 +1,27 @@
+import typing as tp
+
+from pydantic import BaseModel
+
+PHOTO_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/avif": ".avif",
+}
+
+
+class CreatePhotoUploadSchema(BaseModel):
+    content_type: tp.Literal["image/jpeg", "image/png", "image/webp", "image/avif"]
+
+
+class PhotoUploadSchema(BaseModel):
+    """
+    Форма прямой загрузки в хранилище: клиент отправляет POST multipart/form-data
+    на url с полями fields и файлом в поле file, затем передает photo_url
+    в /variation/{variation_id}/upload-photo.
+    """
+
+    url: str
+    fields: tp.Dict[str, str]
+    photo_url: str
+    expires_in: int
@@ -3,4 +3,5 @@ from pydantic import BaseModel, Field
 
 class SetRemainingStockSchema(BaseModel):
     variation_id: str = Field(...)
-    remaining_stock: int = Field(...)
+    # Фактический остаток на складе, включая товар в активных резервах
+    remaining_stock: int = Field(..., ge=0)
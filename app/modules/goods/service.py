@@ -1,24 +1,81 @@
+import base64
 import datetime
-import os
+import json
+import re
+import typing as tp
 from typing import Sequence
 import uuid
 
-import aiofiles
-from fastapi import Depends, UploadFile
-from sqlalchemy import select
+from fastapi import Depends
+from sqlalchemy import (
+    ARRAY,
+    String,
+    and_,
+    any_,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+    tuple_,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.db.session import get_session
+from app.core.config import settings
+from app.core.db.session import AsyncSessionLocal, get_session
+from app.core.storage import media_storage
+from app.modules.goods.images import image_pipeline
 from app.modules.goods.entities import (
     GoodEntity,
     GoodVariationEntity,
     GoodVariationPhotoEntity,
 )
+from app.modules.goods.enums.catalog_filters import (
+    DimensionsBucket,
+    GoodsSort,
+    WeightBucket,
+)
+from app.modules.goods.enums.vat_rates import VATRate
+from app.modules.goods.schemas.catalog_schemas import (
+    ALL_CATALOG_FIELDS,
+    GOOD_FIELDS,
+    PHOTO_FIELDS,
+    VARIATION_FIELDS,
+    CatalogFieldSet,
+    CatalogGoodSchema,
+    CatalogPageSchema,
+)
 from app.modules.goods.schemas.create import CreateGoodSchema
 from app.modules.goods.schemas.create_variation_schema import CreateVariationSchema
-from app.modules.goods.schemas.get_schemas import GetGoodsSchema
+from app.modules.goods.schemas.get_schemas import GetGoodsSchema, SearchGoodsSchema
+from app.modules.goods.schemas.photo_upload_schema import (
+    PHOTO_EXTENSIONS,
+    CreatePhotoUploadSchema,
+    PhotoUploadSchema,
+)
 from app.modules.goods.schemas.set_remaining_stock_schema import SetRemainingStockSchema
+from app.modules.orders.entities import StockReservationEntity
+from app.modules.orders.enums.reservation_statuses import ReservationStatuses
+from app.utils.uploads import receive_file
+
+# Порог word_similarity для поиска с опечатками (по умолчанию в pg_trgm 0.6):
+# "плотье" -> "Платье красный" дает 0.4
+SEARCH_TYPO_THRESHOLD = 0.4
+SEARCH_TYPO_CANDIDATES = 200
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class InvalidFieldsError(ValueError):
+    pass
+
+
+class VariationNotFoundError(ValueError):
+    pass
 
 
 class GoodsService:
@@ -67,25 +124,526 @@ class GoodsService:
         result = await self.db.execute(stmt)
         return result.scalars().one_or_none()
 
-    async def get_goods(self, data: GetGoodsSchema) -> Sequence[GoodEntity]:
+    async def get_variations_by_ids(
+        self, ids: tp.Sequence[str]
+    ) -> tp.Tuple[tp.List[GoodVariationEntity], tp.List[str]]:
+        """
+        Вариации по списку id: один запрос на вариации и один на фото.
+
+        :return: (вариации в порядке ids без повторов, ненайденные id)
+        """
+        unique_ids = list(dict.fromkeys(ids))
         stmt = (
-            select(GoodEntity)
-            .offset((data.page - 1) * data.size)
-            .limit(data.size)
-            .options(
-                selectinload(GoodEntity.variations).selectinload(
-                    GoodVariationEntity.photos
+            select(GoodVariationEntity)
+            .options(selectinload(GoodVariationEntity.photos))
+            .where(GoodVariationEntity.id.in_(unique_ids))
+        )
+        result = await self.db.execute(stmt)
+        found = {variation.id: variation for variation in result.scalars().all()}
+
+        variations = [found[_id] for _id in unique_ids if _id in found]
+        missing = [_id for _id in unique_ids if _id not in found]
+        return variations, missing
+
+    @staticmethod
+    def _weight_condition(bucket: WeightBucket):
+        weight = func.coalesce(GoodVariationEntity.weight, 0)
+        return {
+            WeightBucket.LIGHT: weight < 0.5,
+            WeightBucket.MEDIUM: and_(weight >= 0.5, weight < 2),
+            WeightBucket.HEAVY: weight >= 2,
+        }[bucket]
+
+    @staticmethod
+    def _dimensions_condition(bucket: DimensionsBucket):
+        largest = func.greatest(
+            func.coalesce(GoodVariationEntity.length, 0),
+            func.coalesce(GoodVariationEntity.width, 0),
+            func.coalesce(GoodVariationEntity.height, 0),
+        )
+        return {
+            DimensionsBucket.SMALL: largest < 20,
+            DimensionsBucket.MEDIUM: and_(largest >= 20, largest < 50),
+            DimensionsBucket.LARGE: largest >= 50,
+        }[bucket]
+
+    @staticmethod
+    def _good_conditions(data: GetGoodsSchema) -> list:
+        conditions = []
+        if data.id:
+            conditions.append(GoodEntity.id == data.id)
+        if not data.show_hidden:
+            conditions.append(GoodEntity.show_in_catalog == True)
+        return conditions
+
+    def _facet_filters(self, data: GetGoodsSchema) -> tp.Dict[str, list]:
+        """
+        Условия фильтров каталога, сгруппированные по фасетам.
+
+        vat_rate - условие на товар, остальные - на вариацию.
+        """
+        filters = {
+            "price": [],
+            "in_stock": [],
+            "weight": [],
+            "dimensions": [],
+            "vat_rate": [],
+        }
+        if data.price_min is not None:
+            filters["price"].append(GoodVariationEntity.latest_price >= data.price_min)
+        if data.price_max is not None:
+            filters["price"].append(GoodVariationEntity.latest_price <= data.price_max)
+        if data.in_stock is not None:
+            remaining = func.coalesce(GoodVariationEntity.remaining_stock, 0)
+            filters["in_stock"].append(remaining > 0 if data.in_stock else remaining <= 0)
+        if data.weight is not None:
+            filters["weight"].append(self._weight_condition(data.weight))
+        if data.dimensions is not None:
+            filters["dimensions"].append(self._dimensions_condition(data.dimensions))
+        if data.vat_rate is not None:
+            filters["vat_rate"].append(GoodEntity.vat_rate == data.vat_rate)
+        return filters
+
+    def _goods_query(self, data: GetGoodsSchema, *columns):
+        """
+        Запрос каталога с фильтрами и сортировкой по колонкам `columns`.
+
+        :return: (запрос, выражение ключа сортировки, сортировка по убыванию)
+        """
+        filters = self._facet_filters(data)
+        stmt = select(*columns).where(
+            *self._good_conditions(data), *filters.pop("vat_rate")
+        )
+
+        variation_conditions = [
+            condition for conditions in filters.values() for condition in conditions
+        ]
+        sort_by_price = data.sort in (GoodsSort.PRICE_ASC, GoodsSort.PRICE_DESC)
+        if variation_conditions or sort_by_price:
+            # Подходящие вариации и минимальная цена среди них - одним агрегатом.
+            # Без цен min_price - NULL: такие товары идут в конце в обе стороны
+            matched = (
+                select(
+                    GoodVariationEntity.good_id,
+                    func.min(GoodVariationEntity.latest_price).label("min_price"),
                 )
+                .where(*variation_conditions)
+                .group_by(GoodVariationEntity.good_id)
+                .subquery()
             )
+            stmt = stmt.join(matched, matched.c.good_id == GoodEntity.id)
+
+        if sort_by_price:
+            sort_key = matched.c.min_price
+        else:
+            sort_key = GoodEntity.created_at
+        descending = data.sort in (GoodsSort.NEWEST, GoodsSort.PRICE_DESC)
+
+        order = sort_key.desc() if descending else sort_key.asc()
+        if sort_by_price:
+            order = order.nulls_last()
+        if descending:
+            stmt = stmt.order_by(order, GoodEntity.id.desc())
+        else:
+            stmt = stmt.order_by(order, GoodEntity.id)
+        return stmt, sort_key, descending
+
+    @staticmethod
+    def parse_fields(fields: tp.Optional[str]) -> CatalogFieldSet:
+        """
+        Разбирает sparse fieldset вида "id,title,variations.latest_price".
+
+        "variations" без подполей - все поля вариаций и их фото,
+        "variations.photos" - все поля фото.
+        """
+        if not fields:
+            return ALL_CATALOG_FIELDS
+
+        good, variation, photo = set(), None, None
+        for name in filter(None, (part.strip() for part in fields.split(","))):
+            path = name.split(".")
+            if path == ["variations"]:
+                variation, photo = set(VARIATION_FIELDS), set(PHOTO_FIELDS)
+            elif path[:2] == ["variations", "photos"] and len(path) <= 3:
+                variation = variation if variation is not None else set()
+                if len(path) == 2:
+                    photo = set(PHOTO_FIELDS)
+                elif path[2] in PHOTO_FIELDS:
+                    photo = (photo or set()) | {path[2]}
+                else:
+                    raise InvalidFieldsError(f"Unknown field: {name}")
+            elif path[0] == "variations" and path[1:] and path[1] in VARIATION_FIELDS:
+                if len(path) > 2:
+                    raise InvalidFieldsError(f"Unknown field: {name}")
+                variation = (variation or set()) | {path[1]}
+            elif len(path) == 1 and path[0] in GOOD_FIELDS:
+                good.add(path[0])
+            else:
+                raise InvalidFieldsError(f"Unknown field: {name}")
+
+        return CatalogFieldSet(
+            frozenset(good),
+            frozenset(variation) if variation is not None else None,
+            frozenset(photo) if photo is not None else None,
         )
-        if data.id:
-            stmt = stmt.where(GoodEntity.id == data.id)
 
-        if not data.show_hidden:
-            stmt = stmt.where(GoodEntity.show_in_catalog == True)
+    @staticmethod
+    def _good_columns(field_set: CatalogFieldSet) -> list:
+        names = field_set.good | {"id"}
+        return [getattr(GoodEntity, name).label(name) for name in sorted(names)]
+
+    async def _build_catalog_goods(
+        self, good_rows: tp.Sequence, field_set: CatalogFieldSet
+    ) -> tp.List[CatalogGoodSchema]:
+        """
+        Собирает ответ каталога из строк колонок, без ORM-объектов.
+
+        Вариации и фото загружаются отдельными запросами по списку id и только
+        если запрошены; в словари попадают только запрошенные поля.
+        """
+        photos_by_variation: tp.Dict[str, list] = {}
+        variations_by_good: tp.Dict[str, list] = {}
+
+        good_ids = [row.id for row in good_rows]
+        if field_set.variation is not None and good_ids:
+            names = field_set.variation | {"id", "good_id"}
+            result = await self.db.execute(
+                select(
+                    *(
+                        getattr(GoodVariationEntity, name).label(name)
+                        for name in sorted(names)
+                    )
+                ).where(GoodVariationEntity.good_id.in_(good_ids))
+            )
+            variation_rows = result.all()
+
+            if field_set.photo is not None and variation_rows:
+                names = field_set.photo | {"variation_id"}
+                result = await self.db.execute(
+                    select(
+                        *(
+                            getattr(GoodVariationPhotoEntity, name).label(name)
+                            for name in sorted(names)
+                        )
+                    ).where(
+                        GoodVariationPhotoEntity.variation_id.in_(
+                            [row.id for row in variation_rows]
+                        )
+                    )
+                )
+                for row in result.all():
+                    values = row._mapping
+                    photos_by_variation.setdefault(row.variation_id, []).append(
+                        {name: values[name] for name in field_set.photo}
+                    )
+
+            for row in variation_rows:
+                values = row._mapping
+                variation = {name: values[name] for name in field_set.variation}
+                if field_set.photo is not None:
+                    variation["photos"] = photos_by_variation.get(row.id, [])
+                variations_by_good.setdefault(row.good_id, []).append(variation)
+
+        goods = []
+        for row in good_rows:
+            values = row._mapping
+            good = {name: values[name] for name in field_set.good}
+            if field_set.variation is not None:
+                good["variations"] = variations_by_good.get(row.id, [])
+            goods.append(good)
+        return goods
+
+    async def load_catalog_goods(
+        self,
+        ids: tp.Sequence[str],
+        field_set: CatalogFieldSet = ALL_CATALOG_FIELDS,
+    ) -> tp.List[CatalogGoodSchema]:
+        """Схемы каталога для товаров `ids` в том же порядке"""
+        result = await self.db.execute(
+            select(*self._good_columns(field_set)).where(GoodEntity.id.in_(ids))
+        )
+        rows = {row.id: row for row in result.all()}
+        return await self._build_catalog_goods(
+            [rows[_id] for _id in ids if _id in rows], field_set
+        )
 
+    @staticmethod
+    async def load_catalog(
+        data: GetGoodsSchema,
+    ) -> tp.Union[tp.List[CatalogGoodSchema], CatalogPageSchema]:
+        """
+        get_catalog в собственной сессии - загрузчик снимка каталога.
+
+        Снимок может достраиваться в фоне после ответа или для чужого запроса,
+        когда сессия запроса уже закрыта.
+        """
+        async with AsyncSessionLocal() as db:
+            return await GoodsService(db).get_catalog(data)
+
+    async def get_catalog(
+        self, data: GetGoodsSchema
+    ) -> tp.Union[tp.List[CatalogGoodSchema], CatalogPageSchema]:
+        """
+        Каталог для GET /goods/.
+
+        Без cursor и facets - список товаров (режим page/size), иначе
+        {"data": товары, "next_cursor": ..., "facets": ...}.
+        """
+        field_set = self.parse_fields(data.fields)
+
+        content: CatalogPageSchema = {}
+        if data.cursor is not None:
+            content["data"], content["next_cursor"] = await self.get_goods_by_cursor(
+                data, field_set
+            )
+        else:
+            content["data"] = await self.get_goods(data, field_set)
+            if not data.facets:
+                return content["data"]
+
+        if data.facets:
+            content["facets"] = await self.get_facets(data)
+        return content
+
+    async def get_goods(
+        self, data: GetGoodsSchema, field_set: CatalogFieldSet = ALL_CATALOG_FIELDS
+    ) -> tp.List[CatalogGoodSchema]:
+        stmt, _, _ = self._goods_query(data, *self._good_columns(field_set))
+        stmt = stmt.offset((data.page - 1) * data.size).limit(data.size)
         result = await self.db.execute(stmt)
-        return result.scalars().all()
+        return await self._build_catalog_goods(result.all(), field_set)
+
+    @staticmethod
+    def encode_cursor(sort: GoodsSort, value: tp.Any, good_id: str) -> str:
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        raw = json.dumps([sort.value, value, good_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(sort: GoodsSort, cursor: str) -> tp.Tuple[tp.Any, str]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            cursor_sort, value, good_id = json.loads(base64.urlsafe_b64decode(padded))
+            if cursor_sort != sort.value:
+                raise ValueError("Cursor was issued for another sort")
+            if sort in (GoodsSort.PRICE_ASC, GoodsSort.PRICE_DESC):
+                # None - курсор в хвосте товаров без цены
+                return (float(value) if value is not None else None), str(good_id)
+            return datetime.datetime.fromisoformat(value), str(good_id)
+        except (ValueError, TypeError) as e:
+            raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+    async def get_goods_by_cursor(
+        self, data: GetGoodsSchema, field_set: CatalogFieldSet = ALL_CATALOG_FIELDS
+    ) -> tp.Tuple[tp.List[CatalogGoodSchema], tp.Optional[str]]:
+        """
+        Страница каталога после курсора (keyset по ключу сортировки и id).
+
+        :return: (товары, курсор следующей страницы или None)
+        """
+        stmt, sort_key, descending = self._goods_query(
+            data, *self._good_columns(field_set)
+        )
+        if data.cursor:
+            value, good_id = self.decode_cursor(data.sort, data.cursor)
+            if value is None:
+                # Товары без цены (NULLS LAST) - только по id
+                stmt = stmt.where(
+                    sort_key.is_(None),
+                    GoodEntity.id < good_id if descending else GoodEntity.id > good_id,
+                )
+            else:
+                position = tuple_(sort_key, GoodEntity.id)
+                after = tuple_(value, good_id)
+                condition = position < after if descending else position > after
+                if data.sort in (GoodsSort.PRICE_ASC, GoodsSort.PRICE_DESC):
+                    condition = or_(condition, sort_key.is_(None))
+                stmt = stmt.where(condition)
+
+        stmt = stmt.add_columns(sort_key.label("sort_key")).limit(data.size + 1)
+        rows = (await self.db.execute(stmt)).all()
+
+        next_cursor = None
+        if len(rows) > data.size:
+            rows = rows[: data.size]
+            last = rows[-1]
+            next_cursor = self.encode_cursor(data.sort, last.sort_key, last.id)
+
+        return await self._build_catalog_goods(rows, field_set), next_cursor
+
+    async def get_facets(self, data: GetGoodsSchema) -> dict:
+        """
+        Счетчики фасетов по отфильтрованному каталогу одним агрегирующим запросом.
+
+        Считаются товары, у которых есть хотя бы одна подходящая вариация.
+        Фасет считается без собственного фильтра (FILTER по остальным), иначе
+        при выбранном weight=light все прочие значения веса были бы нулями.
+        """
+        filters = self._facet_filters(data)
+
+        def matching(*conditions, excluding: tp.Optional[str] = None):
+            """Условие FILTER: все фильтры, кроме фасета excluding, и conditions"""
+            return and_(
+                true(),
+                *(
+                    condition
+                    for name, facet_conditions in filters.items()
+                    if name != excluding
+                    for condition in facet_conditions
+                ),
+                *conditions,
+            )
+
+        goods_count = func.count(func.distinct(GoodEntity.id))
+        columns = {
+            "total": goods_count.filter(matching()),
+            "price_min": func.min(GoodVariationEntity.latest_price).filter(
+                matching(excluding="price")
+            ),
+            "price_max": func.max(GoodVariationEntity.latest_price).filter(
+                matching(excluding="price")
+            ),
+            "in_stock": goods_count.filter(
+                matching(GoodVariationEntity.remaining_stock > 0, excluding="in_stock")
+            ),
+        }
+        for bucket in WeightBucket:
+            columns[f"weight_{bucket.value}"] = goods_count.filter(
+                matching(self._weight_condition(bucket), excluding="weight")
+            )
+        for bucket in DimensionsBucket:
+            columns[f"dimensions_{bucket.value}"] = goods_count.filter(
+                matching(self._dimensions_condition(bucket), excluding="dimensions")
+            )
+        for rate in VATRate:
+            columns[f"vat_rate_{rate.name}"] = goods_count.filter(
+                matching(GoodEntity.vat_rate == rate, excluding="vat_rate")
+            )
+
+        stmt = (
+            select(*(column.label(name) for name, column in columns.items()))
+            .select_from(GoodEntity)
+            .join(GoodVariationEntity, GoodVariationEntity.good_id == GoodEntity.id)
+            .where(*self._good_conditions(data))
+        )
+        row = (await self.db.execute(stmt)).one()._mapping
+
+        return {
+            "total": row["total"],
+            "price": {"min": row["price_min"], "max": row["price_max"]},
+            "in_stock": row["in_stock"],
+            "weight": {b.value: row[f"weight_{b.value}"] for b in WeightBucket},
+            "dimensions": {
+                b.value: row[f"dimensions_{b.value}"] for b in DimensionsBucket
+            },
+            "vat_rate": {r.name: row[f"vat_rate_{r.name}"] for r in VATRate},
+        }
+
+    @staticmethod
+    def build_prefix_tsquery(q: str) -> tp.Optional[str]:
+        """Запрос "по мере ввода": каждое слово ищется как префикс (`слово:*`)"""
+        words = re.findall(r"[^\W_]+", q.lower())
+        if not words:
+            return None
+        return " & ".join(f"{word}:*" for word in words)
+
+    async def search(self, data: SearchGoodsSchema) -> tp.List[CatalogGoodSchema]:
+        """
+        Поиск товаров по названию и описанию товара и названиям вариаций.
+
+        Совпадения ищутся по tsvector (russian, префиксы слов) и
+        ранжируются ts_rank по search_vector товара (название весомее
+        описания). Сначала ищется только по названиям товаров
+        (ix_goods_title_tsvector); описания и вариации просматриваются, если
+        названий не хватило на страницу, а опечатки (pg_trgm) - если не
+        нашлось ничего. Так на частых префиксах ("пл") не ранжируются тысячи
+        совпадений по описаниям.
+        """
+        q = data.q.strip()
+        tsquery_text = self.build_prefix_tsquery(q)
+        if not tsquery_text:
+            return []
+
+        tsquery = func.to_tsquery("russian", tsquery_text)
+        rank = func.ts_rank(GoodEntity.search_vector, tsquery)
+
+        def ranked(*conditions):
+            stmt = (
+                select(GoodEntity.id)
+                .where(*conditions)
+                .order_by(rank.desc(), GoodEntity.id)
+                .limit(data.size)
+            )
+            if not data.show_hidden:
+                stmt = stmt.where(GoodEntity.show_in_catalog == True)
+            return stmt
+
+        # regconfig - константа, иначе выражение не совпадет с индексом
+        title_vector = func.to_tsvector(
+            literal_column("'russian'::regconfig"), GoodEntity.title
+        )
+        good_ids = (
+            await self.db.execute(ranked(title_vector.op("@@")(tsquery)))
+        ).scalars().all()
+
+        if len(good_ids) < data.size:
+            # id = ANY(ARRAY(...)) вместо IN (...): подзапрос вычисляется один
+            # раз, и goods читается через BitmapOr индексов, а не целиком
+            variation_good_ids = func.array(
+                select(GoodVariationEntity.good_id)
+                .where(GoodVariationEntity.search_vector.op("@@")(tsquery))
+                .scalar_subquery(),
+                type_=ARRAY(String),
+            )
+            good_ids = (
+                await self.db.execute(
+                    ranked(
+                        or_(
+                            GoodEntity.search_vector.op("@@")(tsquery),
+                            GoodEntity.id == any_(variation_good_ids),
+                        )
+                    )
+                )
+            ).scalars().all()
+
+        if not good_ids and len(q) >= 3:
+            # Порог оператора `<%` задается только настройкой (до конца транзакции)
+            await self.db.execute(
+                select(
+                    func.set_config(
+                        "pg_trgm.word_similarity_threshold",
+                        str(SEARCH_TYPO_THRESHOLD),
+                        True,
+                    )
+                )
+            )
+            # Опечатка в частом слове дает тысячи кандидатов по ~10 мкс на
+            # word_similarity: ранжируются только первые SEARCH_TYPO_CANDIDATES.
+            # MATERIALIZED - чтобы из-за LIMIT планировщик не заменил
+            # ix_goods_title_trgm на seq scan (стоимость `<%` он занижает)
+            matches = select(GoodEntity.id, GoodEntity.title).where(
+                literal(q).op("<%")(GoodEntity.title)
+            )
+            if not data.show_hidden:
+                matches = matches.where(GoodEntity.show_in_catalog == True)
+            matches = matches.cte("typo_matches").prefix_with("MATERIALIZED")
+            candidates = (
+                select(matches.c.id, matches.c.title)
+                .limit(SEARCH_TYPO_CANDIDATES)
+                .subquery()
+            )
+            stmt = (
+                select(candidates.c.id)
+                .order_by(
+                    func.word_similarity(q, candidates.c.title).desc(),
+                    candidates.c.id,
+                )
+                .limit(data.size)
+            )
+            good_ids = (await self.db.execute(stmt)).scalars().all()
+
+        return await self.load_catalog_goods(good_ids)
 
     async def create(self, data: CreateGoodSchema):
         async with self.db.begin():
@@ -132,7 +690,7 @@ class GoodsService:
             result = await self.db.execute(stmt)
             variation = result.scalars().one_or_none()
             if variation is None:
-                raise ValueError("Variation not found")
+                raise VariationNotFoundError("Variation not found")
             await self.db.delete(variation)
 
     async def update_variation(self, variation_id: str, data: CreateVariationSchema):
@@ -143,7 +701,7 @@ class GoodsService:
             result = await self.db.execute(stmt)
             variation = result.scalars().one_or_none()
             if variation is None:
-                raise ValueError("Variation not found")
+                raise VariationNotFoundError("Variation not found")
 
             variation.title = data.title
             variation.description = data.description
@@ -168,15 +726,58 @@ class GoodsService:
             result = await self.db.execute(stmt)
             variation = result.scalars().one_or_none()
             if variation is None:
-                raise ValueError("Variation not found")
+                raise VariationNotFoundError("Variation not found")
 
             photo = GoodVariationPhotoEntity(url=f"{url}", is_main=False)
             variation.photos.append(photo)
 
             self.db.add(variation)
 
+        # Уменьшенные копии и srcset строятся в пуле процессов после ответа
+        image_pipeline.schedule(photo.id, photo.url)
         return variation
 
+    async def upload_photo_file(
+        self,
+        variation_id: str,
+        stream: tp.AsyncIterable[bytes],
+        content_type: str,
+        content_length: tp.Optional[int] = None,
+    ) -> GoodVariationEntity:
+        """
+        Принимает фото из тела multipart/form-data (поле file) потоком и
+        сохраняет в хранилище под именем из хэша содержимого: повторная
+        загрузка того же файла не создает копию, а URL можно кэшировать
+        как immutable.
+        """
+        async with self.db.begin():
+            if not await self._variation_exists(variation_id):
+                raise VariationNotFoundError("Variation not found")
+
+        async with receive_file(
+            stream,
+            content_type,
+            directory=media_storage.upload_dir,
+            max_size=settings.MEDIA_MAX_UPLOAD_SIZE,
+            allowed_types=PHOTO_EXTENSIONS,
+            content_length=content_length,
+        ) as received:
+            key = (
+                f"photos/{received.sha256[:2]}/{received.sha256[:32]}"
+                f"{PHOTO_EXTENSIONS[received.content_type]}"
+            )
+            url = await media_storage.save_file(
+                key, received.path, received.content_type, move=True
+            )
+
+        return await self.upload_photos(variation_id, url)
+
+    async def _variation_exists(self, variation_id: str) -> bool:
+        stmt = select(GoodVariationEntity.id).where(
+            GoodVariationEntity.id == variation_id
+        )
+        return (await self.db.execute(stmt)).scalar_one_or_none() is not None
+
     async def delete_photo(self, variation_id: str, id: str) -> GoodVariationEntity:
         async with self.db.begin():
             stmt = (
@@ -187,35 +788,87 @@ class GoodsService:
             result = await self.db.execute(stmt)
             variation = result.scalars().one_or_none()
             if variation is None:
-                raise ValueError("Variation not found")
+                raise VariationNotFoundError("Variation not found")
 
             photo = next((p for p in variation.photos if p.id == id), None)
             if photo is None:
                 raise ValueError("Photo not found")
 
-            # delete file
-            try:
-                os.remove(f".{photo.url}")
-            except FileNotFoundError:
-                pass
-
+            # Одинаковые файлы хранятся под одним ключом: удаляется только
+            # файл, на который больше не ссылается ни одно фото
+            shared = await self.db.scalar(
+                select(func.count()).where(
+                    GoodVariationPhotoEntity.url == photo.url,
+                    GoodVariationPhotoEntity.id != photo.id,
+                )
+            )
+            photo_key = None if shared else media_storage.key_for_url(photo.url)
             await self.db.delete(photo)
 
+        # Файл удаляется после коммита и в фоне. Варианты не трогаются: они
+        # адресуются хэшем содержимого и могут принадлежать другим фото
+        if photo_key is not None:
+            media_storage.schedule_delete([photo_key])
         return variation
 
+    async def create_photo_upload(
+        self, variation_id: str, data: CreatePhotoUploadSchema
+    ) -> PhotoUploadSchema:
+        """Presigned-форма для загрузки фото вариации напрямую в хранилище"""
+        if not await self._variation_exists(variation_id):
+            raise VariationNotFoundError("Variation not found")
+
+        key = (
+            f"photos/{variation_id}/{uuid.uuid4().hex}"
+            f"{PHOTO_EXTENSIONS[data.content_type]}"
+        )
+        upload = media_storage.presign_upload(
+            key,
+            data.content_type,
+            max_size=settings.MEDIA_MAX_UPLOAD_SIZE,
+            expires_in=settings.MEDIA_PRESIGN_EXPIRES,
+        )
+        return PhotoUploadSchema(
+            url=upload.url,
+            fields=upload.fields,
+            photo_url=media_storage.url(key),
+            expires_in=upload.expires_in,
+        )
+
     async def set_remaining_stock(
         self, data: SetRemainingStockSchema
     ) -> GoodVariationEntity:
+        """
+        Задает фактический остаток вариации на складе.
+
+        remaining_stock в БД - доступный остаток: резервы неоплаченных заказов
+        уже вычтены из него и вернутся при истечении. Поэтому сохраняется
+        фактический остаток минус ACTIVE резервы (может быть меньше нуля, если
+        на складе меньше, чем зарезервировано).
+        """
         async with self.db.begin():
-            stmt = select(GoodVariationEntity).where(
-                GoodVariationEntity.id == data.variation_id
+            # Блокировка строки вариации: резервирование списывает остаток
+            # UPDATE той же строки, поэтому новый резерв не появится между
+            # подсчетом резервов и записью остатка
+            stmt = (
+                select(GoodVariationEntity)
+                .where(GoodVariationEntity.id == data.variation_id)
+                .with_for_update()
             )
             result = await self.db.execute(stmt)
             variation = result.scalars().one_or_none()
             if variation is None:
-                raise ValueError("Variation not found")
-
-            variation.remaining_stock = data.remaining_stock
+                raise VariationNotFoundError("Variation not found")
+
+            reserved = await self.db.scalar(
+                select(
+                    func.coalesce(func.sum(StockReservationEntity.quantity), 0)
+                ).where(
+                    StockReservationEntity.variation_id == variation.id,
+                    StockReservationEntity.status == ReservationStatuses.ACTIVE,
+                )
+            )
+            variation.remaining_stock = data.remaining_stock - reserved
             variation.remaining_stock_date = datetime.datetime.now()
 
             self.db.add(variation)
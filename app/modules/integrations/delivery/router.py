@@ -0,0 +1,46 @@
+import hmac
+import json
+import typing as tp
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app.core.config import settings
+from app.modules.delivery.status_service import (
+    DeliveryStatusService,
+    UnknownDeliveryOrder,
+)
+
+router = APIRouter()
+
+
+@router.post("/integration/cdek_status")
+async def cdek_status(
+    request: Request,
+    token: tp.Optional[str] = None,
+    service: DeliveryStatusService = Depends(),
+):
+    """Вебхук CDEK ORDER_STATUS (без настроенного CDEK_WEBHOOK_TOKEN отклоняется)"""
+    if not settings.CDEK_WEBHOOK_TOKEN or not hmac.compare_digest(
+        (token or "").encode(), settings.CDEK_WEBHOOK_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid webhook token")
+
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+    if payload.get("type") != "ORDER_STATUS":
+        return {"status": "ignored"}
+
+    try:
+        status = await service.apply_cdek_webhook(payload)
+    except UnknownDeliveryOrder:
+        # Заказ не наш (или еще не сохранен) - CDEK не должен повторять запрос
+        return {"status": "ignored"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"status": "success", "delivery_status": status}
@@ -1,23 +1,29 @@
-import json
-from webbrowser import Error
+import logging
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 
-from app.modules.integrations.payments.service import PaymentIntegrationService
+from app.modules.integrations.payments.service import (
+    InvalidNotificationSignature,
+    PaymentIntegrationService,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.post("/integration/payment_success")
 async def payment_success(method: str, request: Request, service: PaymentIntegrationService = Depends()):
+    """Уведомление об оплате: сохраняется в журнал и обрабатывается в фоне"""
+    body = await request.body()
     try:
-        body = await request.body()
-        data = json.loads(body)
-        await service.process_payment(method, data)
-
-        return {
-            "code": 0
-        }
+        await service.receive_notification(method, body, request.headers)
+    except InvalidNotificationSignature as e:
+        raise HTTPException(status_code=401, detail=str(e))
     except ValueError as e:
-        print(f"Ошибка получения оплаты: {e}")
-        raise e
\ No newline at end of file
+        logger.warning("Payment notification rejected: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "code": 0
+    }
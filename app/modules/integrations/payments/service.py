@@ -1,57 +1,249 @@
-from fastapi import Depends, Body
-from sqlalchemy import select
+import asyncio
+import datetime
+import logging
+import typing as tp
+
+from fastapi import Depends
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.core.db.session import get_session
-from app.modules.orders.entities import OrderEntity, OrderDetailsEntity
-from app.modules.payments.entities import PaymentEntity
+from app.core.config import settings
+from app.core.db.session import AsyncSessionLocal, get_session
+from app.core.outbox import get_retry_delay, outbox_worker
+from app.modules.delivery.outbox import enqueue_cdek_order
+from app.modules.orders.entities import OrderEntity
+from app.modules.orders.reservations import StockReservationService
+from app.modules.payments.entities import PaymentEntity, PaymentEventEntity
 from app.modules.payments.enums.payment_methods import PaymentMethods
 from app.modules.payments.enums.payment_statuses import PaymentStatuses
 from app.modules.payments.service import PaymentService
-from app.modules.delivery.methods.cdek import CDEKDeliveryMethod
-from app.modules.users.entities import UserEntity
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidNotificationSignature(ValueError):
+    pass
 
 
 class PaymentIntegrationService:
-    def __init__(self, payments_service: PaymentService = Depends(), db: AsyncSession = Depends(get_session), cdek_service: CDEKDeliveryMethod = Depends()):
-        self.payments_service = payments_service
-        self.cdek_service = cdek_service
+    def __init__(self, db: AsyncSession = Depends(get_session), reservation_service: StockReservationService = Depends()):
+        self.reservation_service = reservation_service
         self.db = db
 
-    async def process_payment(self, method: str, body):
-        payment_method_service = self.payments_service.get_payment_method(PaymentMethods(method))
-        print('jopa')
-        payment_id = await payment_method_service.process_payment(body)
-        print('konec jopi')
-
-        stmt = (select(PaymentEntity)
-                .where(PaymentEntity.id == payment_id)
-                .options(selectinload(PaymentEntity.order)
-                ,selectinload(PaymentEntity.order)
-                         .selectinload(OrderEntity.user)
-                ,selectinload(PaymentEntity.order)
-                         .selectinload(OrderEntity.details)
-                ,selectinload(PaymentEntity.order)
-                         .selectinload(OrderEntity.details)
-                         .selectinload(OrderDetailsEntity.variation)))
-
-        result = await self.db.execute(stmt)
-        payment = result.scalars().first()
-        if payment is None:
-            print(f"Payment not found with id: {payment_id}")
-            raise ValueError(f"Payment not found with id: {payment_id}")
+    async def receive_notification(
+        self, method: str, body: bytes, headers: tp.Mapping[str, str]
+    ) -> str:
+        """
+        Проверяет подпись уведомления и сохраняет его в payment_events.
 
-        payment.status = PaymentStatuses.SUCCESS
+        Сама оплата обрабатывается PaymentEventConsumer: вебхук отвечает
+        сразу после коммита одной строки.
+        :return: id события
+        """
+        payment_method = PaymentMethods(method)
+        payment_method_service = PaymentService.get_payment_method(payment_method)
+        if not payment_method_service.verify_notification(body, headers):
+            raise InvalidNotificationSignature("Invalid notification signature")
+
+        payload = payment_method_service.parse_notification(
+            body, headers.get("content-type", "")
+        )
+        try:
+            payment_id = await payment_method_service.process_payment(payload)
+        except KeyError as e:
+            raise ValueError(f"Payment id not found in notification: {e}")
 
+        now = datetime.datetime.now(datetime.UTC)
+        event_id = await self.db.scalar(
+            insert(PaymentEventEntity)
+            .values(
+                method=payment_method,
+                payment_id=str(payment_id),
+                payload=payload,
+                attempts=0,
+                received_at=now,
+                next_attempt_at=now,
+            )
+            .returning(PaymentEventEntity.id)
+        )
+        await self.db.commit()
+        payment_event_consumer.notify()
+        return event_id
 
+    async def process_events(self, batch: int) -> int:
+        """
+        Обрабатывает пачку готовых к обработке уведомлений (не больше batch).
 
+        Уведомления группируются по InvoiceId: повторы и уже оплаченные
+        платежи не обрабатываются второй раз. События захватываются через
+        SKIP LOCKED, платежи блокируются, поэтому несколько обработчиков
+        не проводят одну оплату дважды.
 
-        order: OrderEntity = payment.order
+        processed_at ставится только событиям проведенных и уже оплаченных
+        платежей. События с ошибкой (в том числе с неизвестным InvoiceId)
+        остаются в очереди и повторяются с backoff, после
+        PAYMENT_EVENTS_MAX_ATTEMPTS попыток получают dead_at.
+        :return: количество захваченных событий
+        """
+        now = datetime.datetime.now(datetime.UTC)
+        result = await self.db.execute(
+            select(
+                PaymentEventEntity.id,
+                PaymentEventEntity.payment_id,
+                PaymentEventEntity.attempts,
+            )
+            .where(
+                PaymentEventEntity.processed_at.is_(None),
+                PaymentEventEntity.dead_at.is_(None),
+                PaymentEventEntity.next_attempt_at <= now,
+            )
+            .order_by(PaymentEventEntity.next_attempt_at)
+            .limit(batch)
+            .with_for_update(skip_locked=True)
+        )
+        events = result.all()
+        if not events:
+            return 0
 
-        current_user: UserEntity = order.user
+        payment_ids = sorted({event.payment_id for event in events})
+        result = await self.db.execute(
+            select(PaymentEntity)
+            .where(PaymentEntity.id.in_(payment_ids))
+            .order_by(PaymentEntity.id)
+            .with_for_update()
+        )
+        payments = {payment.id: payment for payment in result.scalars().all()}
 
-        await self.cdek_service.prepare_cdek_data(order, order.id, current_user)
+        errors: tp.Dict[str, str] = {}
+        paid = 0
+        for payment_id in payment_ids:
+            payment = payments.get(payment_id)
+            if payment is None:
+                errors[payment_id] = f"Payment not found with id: {payment_id}"
+                continue
+            if payment.status == PaymentStatuses.SUCCESS:
+                continue
 
-        self.db.add(payment)
+            try:
+                async with self.db.begin_nested():
+                    await self._apply_payment(payment)
+                paid += 1
+            except Exception as e:
+                logger.warning("Payment %s processing failed: %s", payment_id, e)
+                errors[payment_id] = str(e)
+
+        processed = [event.id for event in events if event.payment_id not in errors]
+        if processed:
+            await self.db.execute(
+                update(PaymentEventEntity)
+                .where(PaymentEventEntity.id.in_(processed))
+                .values(processed_at=now, error=None)
+                .execution_options(synchronize_session=False)
+            )
+        failed = [event for event in events if event.payment_id in errors]
+        if failed:
+            await self.db.execute(
+                update(PaymentEventEntity),
+                [self._failure(event, errors[event.payment_id], now) for event in failed],
+            )
         await self.db.commit()
+
+        if paid:
+            outbox_worker.notify()
+        return len(events)
+
+    @staticmethod
+    def _failure(event, error: str, now: datetime.datetime) -> dict:
+        """Значения события после неудачной попытки: повтор или dead_at"""
+        attempts = event.attempts + 1
+        values = {
+            "id": event.id,
+            "attempts": attempts,
+            "error": error[:1000],
+            "next_attempt_at": now,
+            "dead_at": None,
+        }
+        if attempts >= settings.PAYMENT_EVENTS_MAX_ATTEMPTS:
+            logger.error(
+                "Payment event %s (%s) moved to dead letters after %s attempts: %s",
+                event.id,
+                event.payment_id,
+                attempts,
+                error,
+            )
+            values["dead_at"] = now
+        else:
+            values["next_attempt_at"] = now + datetime.timedelta(
+                seconds=get_retry_delay(attempts)
+            )
+        return values
+
+    async def _apply_payment(self, payment: PaymentEntity):
+        # Деньги получены в любом случае: повторная оплата заказа не нужна
+        payment.status = PaymentStatuses.SUCCESS
+
+        if not await self.reservation_service.confirm(payment.order_id):
+            # Резерв истек, а остаток уже продан: заказ не отправляется,
+            # а помечается для возврата или дозаказа
+            logger.error(
+                "Order %s was paid (payment %s) but its stock is sold out, "
+                "manual handling required",
+                payment.order_id,
+                payment.id,
+            )
+            await self.db.execute(
+                update(OrderEntity)
+                .where(OrderEntity.id == payment.order_id)
+                .values(stock_shortage_at=datetime.datetime.now(datetime.UTC))
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.flush()
+            return
+
+        # Заказ в CDEK создается воркером outbox: обработка оплаты не ждет CDEK
+        await enqueue_cdek_order(self.db, payment.order_id)
+        await self.db.flush()
+
+
+class PaymentEventConsumer:
+    """Фоновый обработчик журнала уведомлений об оплате"""
+
+    def __init__(self):
+        self.batch_size = settings.PAYMENT_EVENTS_BATCH
+        self._wakeup = asyncio.Event()
+
+    def notify(self):
+        """Разбудить обработчик этого процесса, не дожидаясь интервала опроса"""
+        self._wakeup.set()
+
+    async def consume(self) -> int:
+        async with AsyncSessionLocal() as db:
+            service = PaymentIntegrationService(db, StockReservationService(db))
+            return await service.process_events(self.batch_size)
+
+    async def run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.consume()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Payment events processing failed: %s", e)
+                processed = 0
+
+            # Полная пачка - в журнале есть еще события, продолжаем без паузы
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), settings.PAYMENT_EVENTS_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+
+payment_event_consumer = PaymentEventConsumer()
+
+
+async def run_payment_event_consumer_loop():
+    await payment_event_consumer.run()
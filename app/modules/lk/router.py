@@ -37,7 +37,10 @@ async def get_order_tracking_lk(
             )
 
         order_schema = order.to_schema()
-        tracking_info = await delivery_service.get_tracking_info(order_schema)
+        # Только сохраненный статус: CDEK опрашивает фоновый воркер
+        tracking_info = await delivery_service.get_tracking_info(
+            order_schema, await order_service.get_stored_order_data(order.id) or {}
+        )
 
         if not tracking_info:
             raise HTTPException(
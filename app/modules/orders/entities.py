@@ -3,11 +3,12 @@ import datetime
 import uuid
 from typing import List
 
-from sqlalchemy import String, ForeignKey, DateTime, Integer, Enum
+from sqlalchemy import String, ForeignKey, DateTime, Integer, Enum, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db.session import Base
 from app.modules.goods.entities import GoodVariationEntity
+from app.modules.orders.enums.reservation_statuses import ReservationStatuses
 from app.modules.orders.schemas.order_schema import OrderDetailsSchema, OrderSchema
 from app.modules.payments.enums.currencies import Currencies
 from app.modules.users.entities import UserEntity
@@ -42,7 +43,14 @@ class OrderEntity(Base):
         default=lambda: datetime.datetime.now(datetime.UTC),
     )
 
-    cdek_order_uuid: Mapped[str] = mapped_column(String, nullable=True, default=None)
+    cdek_order_uuid: Mapped[str] = mapped_column(
+        String, nullable=True, default=None, index=True
+    )
+    # Оплачен после истечения резерва, а остатка на повторное списание не
+    # хватило: в CDEK не отправляется, нужен возврат или дозаказ вручную
+    stock_shortage_at: Mapped[tp.Optional[datetime.datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, default=None
+    )
 
     @property
     def amount(self) -> float:
@@ -70,6 +78,7 @@ class OrderEntity(Base):
             details=[detail.to_schema() for detail in self.details],
             amount=self.amount,
             track_number=self.cdek_order_uuid,
+            stock_shortage=self.stock_shortage_at is not None,
             delivery_info=None,
             tracking_info=None,
             delivery_point_info=None,
@@ -104,3 +113,41 @@ class OrderDetailsEntity(Base):
             quantity=self.quantity,
             price=self.price,
         )
+
+
+class StockReservationEntity(Base):
+    """Списанный под заказ остаток вариации, который возвращается, если заказ не оплачен"""
+
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        # Очередь sweeper'а: только активные резервы в порядке истечения
+        Index(
+            "ix_stock_reservations_active_expires_at",
+            "expires_at",
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    order_id: Mapped[str] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    variation_id: Mapped[str] = mapped_column(
+        ForeignKey("goods_variations.id"), nullable=False
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[ReservationStatuses] = mapped_column(
+        Enum(ReservationStatuses, name="reservation_status_enum", native_enum=False),
+        nullable=False,
+        default=ReservationStatuses.ACTIVE,
+    )
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC),
+    )
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
@@ -0,0 +1,10 @@
+import enum
+
+
+class ReservationStatuses(str, enum.Enum):
+    # Остаток списан, заказ ждет оплаты до expires_at
+    ACTIVE = "ACTIVE"
+    # Заказ оплачен, списание окончательное
+    CONFIRMED = "CONFIRMED"
+    # Оплата не пришла вовремя, остаток возвращен
+    RELEASED = "RELEASED"
@@ -0,0 +1,296 @@
+import asyncio
+import datetime
+import logging
+import typing as tp
+import uuid
+
+from fastapi import Depends
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    String,
+    column,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db.session import AsyncSessionLocal, get_session
+from app.modules.goods.catalog import catalog_snapshot
+from app.modules.goods.entities import GoodVariationEntity
+from app.modules.orders.entities import StockReservationEntity
+from app.modules.orders.enums.reservation_statuses import ReservationStatuses
+
+logger = logging.getLogger(__name__)
+
+
+class OutOfStockError(ValueError):
+    def __init__(self, variation_ids: tp.Sequence[str]):
+        self.variation_ids = list(variation_ids)
+        super().__init__(f"Not enough stock for variations: {', '.join(variation_ids)}")
+
+
+class Reservation(tp.NamedTuple):
+    expires_at: datetime.datetime
+    # Вариации, остаток которых этим резервом обнулился
+    sold_out: tp.List[str]
+
+
+def merge_quantities(lines: tp.Iterable[tp.Tuple[str, int]]) -> tp.Dict[str, int]:
+    """Суммирует количества по вариациям; ключи отсортированы"""
+    quantities: tp.Dict[str, int] = {}
+    for variation_id, quantity in lines:
+        quantities[variation_id] = quantities.get(variation_id, 0) + quantity
+    return dict(sorted(quantities.items()))
+
+
+def _quantities_table(quantities: tp.Dict[str, int]):
+    """
+    Строки (variation_id, quantity) как unnest двух массивов.
+
+    В отличие от VALUES текст запроса не зависит от числа строк: SQLAlchemy
+    кэширует скомпилированный запрос, а asyncpg - подготовленный statement.
+    """
+    return (
+        func.unnest(
+            literal(list(quantities), ARRAY(String)),
+            literal(list(quantities.values()), ARRAY(Integer)),
+        )
+        .table_valued(column("variation_id", String), column("quantity", Integer))
+        .render_derived(name="req")
+    )
+
+
+class StockReservationService:
+    """
+    Резервирование остатков под заказы.
+
+    Остаток списывается одним условным UPDATE по всем строкам заказа сразу:
+    без предварительного SELECT ... FOR UPDATE, блокировки строк держатся
+    только до коммита транзакции заказа. Резерв живет STOCK_RESERVATION_TTL
+    секунд; если оплата не пришла, sweeper возвращает остаток.
+
+    Методы не коммитят: резерв - часть транзакции вызывающего кода.
+    """
+
+    def __init__(self, db: AsyncSession = Depends(get_session)):
+        self.db = db
+
+    async def take_stock(self, quantities: tp.Dict[str, int]) -> tp.Dict[str, int]:
+        """
+        Списывает остатки всех вариаций одним запросом.
+
+        Если хотя бы одной вариации не хватает, бросает OutOfStockError;
+        остальные строки к этому моменту уже списаны, поэтому транзакцию
+        (или savepoint) нужно откатить.
+
+        :return: новые остатки по вариациям
+        """
+        if not quantities:
+            return {}
+
+        if len(quantities) == 1:
+            # Частый случай (и "горячая" вариация на распродаже): без join
+            # с unnest блокировка строки держится меньше
+            [(variation_id, quantity)] = quantities.items()
+        else:
+            req = _quantities_table(quantities)
+            variation_id, quantity = req.c.variation_id, req.c.quantity
+
+        stmt = (
+            update(GoodVariationEntity)
+            .where(
+                GoodVariationEntity.id == variation_id,
+                GoodVariationEntity.remaining_stock >= quantity,
+            )
+            .values(remaining_stock=GoodVariationEntity.remaining_stock - quantity)
+            .returning(GoodVariationEntity.id, GoodVariationEntity.remaining_stock)
+            .execution_options(synchronize_session=False)
+        )
+        remaining = dict((await self.db.execute(stmt)).tuples().all())
+        missing = [
+            variation_id for variation_id in quantities if variation_id not in remaining
+        ]
+        if missing:
+            raise OutOfStockError(missing)
+        return remaining
+
+    async def return_stock(self, quantities: tp.Dict[str, int]):
+        if not quantities:
+            return
+
+        req = _quantities_table(quantities)
+        await self.db.execute(
+            update(GoodVariationEntity)
+            .where(GoodVariationEntity.id == req.c.variation_id)
+            .values(
+                remaining_stock=func.coalesce(GoodVariationEntity.remaining_stock, 0)
+                + req.c.quantity
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def reserve(
+        self,
+        order_id: str,
+        lines: tp.Iterable[tp.Tuple[str, int]],
+        ttl: tp.Optional[float] = None,
+    ) -> Reservation:
+        """
+        Списывает остатки под заказ и создает резервы.
+
+        :param lines: пары (variation_id, quantity)
+        """
+        quantities = merge_quantities(lines)
+        remaining = await self.take_stock(quantities)
+
+        now = datetime.datetime.now(datetime.UTC)
+        expires_at = now + datetime.timedelta(
+            seconds=settings.STOCK_RESERVATION_TTL if ttl is None else ttl
+        )
+        await self.db.execute(
+            insert(StockReservationEntity),
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "order_id": order_id,
+                    "variation_id": variation_id,
+                    "quantity": quantity,
+                    "status": ReservationStatuses.ACTIVE,
+                    "created_at": now,
+                    "expires_at": expires_at,
+                }
+                for variation_id, quantity in quantities.items()
+            ],
+        )
+        return Reservation(
+            expires_at=expires_at,
+            sold_out=[
+                variation_id for variation_id, stock in remaining.items() if stock == 0
+            ],
+        )
+
+    async def confirm(self, order_id: str) -> bool:
+        """
+        Делает списание под оплаченный заказ окончательным.
+
+        Если резерв уже истек и остаток вернулся, он списывается повторно.
+        :return: False, если остатка на повторное списание не хватило
+        """
+        await self.db.execute(
+            update(StockReservationEntity)
+            .where(
+                StockReservationEntity.order_id == order_id,
+                StockReservationEntity.status == ReservationStatuses.ACTIVE,
+            )
+            .values(status=ReservationStatuses.CONFIRMED)
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self.db.execute(
+            select(
+                StockReservationEntity.id,
+                StockReservationEntity.variation_id,
+                StockReservationEntity.quantity,
+            )
+            .where(
+                StockReservationEntity.order_id == order_id,
+                StockReservationEntity.status == ReservationStatuses.RELEASED,
+            )
+            .with_for_update()
+        )
+        released = result.all()
+        if not released:
+            return True
+
+        quantities = merge_quantities((row.variation_id, row.quantity) for row in released)
+        try:
+            async with self.db.begin_nested():
+                await self.take_stock(quantities)
+        except OutOfStockError as e:
+            logger.warning(
+                "Order %s was paid after its reservation expired: %s", order_id, e
+            )
+            return False
+
+        await self.db.execute(
+            update(StockReservationEntity)
+            .where(StockReservationEntity.id.in_([row.id for row in released]))
+            .values(status=ReservationStatuses.CONFIRMED)
+            .execution_options(synchronize_session=False)
+        )
+        return True
+
+    async def release_expired(self, batch: int) -> int:
+        """
+        Возвращает остатки по истекшим резервам (не больше batch за вызов).
+
+        Строки захватываются через SKIP LOCKED, поэтому несколько воркеров
+        и параллельное подтверждение оплаты не обрабатывают один резерв дважды.
+        """
+        expired = (
+            select(StockReservationEntity.id)
+            .where(
+                StockReservationEntity.status == ReservationStatuses.ACTIVE,
+                StockReservationEntity.expires_at <= func.now(),
+            )
+            .order_by(StockReservationEntity.expires_at)
+            .limit(batch)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            update(StockReservationEntity)
+            .where(
+                StockReservationEntity.id.in_(expired),
+                StockReservationEntity.status == ReservationStatuses.ACTIVE,
+            )
+            .values(status=ReservationStatuses.RELEASED)
+            .returning(
+                StockReservationEntity.variation_id, StockReservationEntity.quantity
+            )
+            .execution_options(synchronize_session=False)
+        )
+        released = result.all()
+        await self.return_stock(
+            merge_quantities((row.variation_id, row.quantity) for row in released)
+        )
+        return len(released)
+
+
+class StockReservationSweeper:
+    """Фоновый воркер, возвращающий остатки по неоплаченным заказам"""
+
+    def __init__(self):
+        self.batch_size = settings.STOCK_RESERVATION_SWEEP_BATCH
+
+    async def sweep(self) -> int:
+        async with AsyncSessionLocal() as db:
+            service = StockReservationService(db)
+            released = await service.release_expired(self.batch_size)
+            await db.commit()
+
+        if released:
+            catalog_snapshot.invalidate()
+        return released
+
+    async def run(self):
+        while True:
+            try:
+                released = await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Stock reservation sweep failed: %s", e)
+                released = 0
+
+            # Полная пачка - истекших резервов больше, продолжаем без паузы
+            if released < self.batch_size:
+                await asyncio.sleep(settings.STOCK_RESERVATION_SWEEP_INTERVAL)
+
+
+async def run_reservation_sweeper_loop():
+    await StockReservationSweeper().run()
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+import typing as tp
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from app.core.dependencies.get_current_user import get_current_user
+from app.core.idempotency import IdempotencyGuard, get_idempotency_key
 from app.modules.delivery.service import DeliveryService
 from app.modules.delivery.enums.delivery_methods import DeliveryMethods
+from app.modules.orders.reservations import OutOfStockError
 from app.modules.orders.service import OrderCreationError, UndefinedOrder
 from app.modules.orders.schemas.create import CreateOrderSchema
 from app.modules.orders.schemas.order_schema import OrderSchema
@@ -15,16 +19,31 @@ router = APIRouter()
 @router.post("/create")
 async def create_goods(
     goods: CreateOrderSchema,
+    request: Request,
     current_user: UserEntity = Depends(get_current_user),
     service: OrderService = Depends(),
+    idempotency_key: tp.Optional[str] = Depends(get_idempotency_key),
 ):
     try:
-        order_data = await service.create_order(goods, current_user)
-        return {
-            "status": "success",
-            "order": order_data["order"],
-            # "cdek_data": order_data["cdek_data"],
-        }
+        async with IdempotencyGuard(
+            f"orders.create:{current_user.id}", idempotency_key, request
+        ) as guard:
+            if guard.replay is not None:
+                return guard.replay
+
+            order_data = await service.create_order(goods, current_user)
+            return guard.save(
+                {
+                    "status": "success",
+                    "order": order_data["order"],
+                    # "cdek_data": order_data["cdek_data"],
+                }
+            )
+    except OutOfStockError as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Not enough stock", "variation_ids": e.variation_ids},
+        )
     except OrderCreationError as e:
         raise HTTPException(status_code=403, detail=str(e))
 
@@ -34,7 +53,6 @@ async def get_order(
     id: str,
     current_user: UserEntity = Depends(get_current_user),
     service: OrderService = Depends(),
-    delivery_service: DeliveryService = Depends(),
     include_delivery_info: bool = True,
 ):
     try:
@@ -45,10 +63,7 @@ async def get_order(
             )
 
         order_schema = order.to_schema()
-
-        # Если запрошена расширенная информация о доставке
-        if include_delivery_info:
-            order_schema = await delivery_service.fill_order_delivery_info(order_schema)
+        await service.enrich_orders([order_schema], include_delivery_info)
 
         return order_schema
 
@@ -72,7 +87,10 @@ async def get_order_tracking(
             )
 
         order_schema = order.to_schema()
-        tracking_info = await delivery_service.get_tracking_info(order_schema)
+        # Только сохраненный статус: CDEK опрашивает фоновый воркер
+        tracking_info = await delivery_service.get_tracking_info(
+            order_schema, await service.get_stored_order_data(order.id) or {}
+        )
 
         if not tracking_info:
             raise HTTPException(
@@ -101,7 +119,9 @@ async def get_order_delivery_info(
             )
 
         order_schema = order.to_schema()
-        delivery_info = await delivery_service.get_delivery_info(order_schema)
+        delivery_info = await delivery_service.get_delivery_info(
+            order_schema, await service.get_stored_order_data(order.id) or {}
+        )
 
         if not delivery_info:
             raise HTTPException(
@@ -25,6 +25,8 @@ class OrderSchema(BaseModel):
     details: tp.List[OrderDetailsSchema] = []
     amount: float
     track_number: tp.Optional[str] = None
+    # Оплачен, но остатка не хватило: ждет возврата или дозаказа
+    stock_shortage: bool = False
 
     # Новые поля для расширенной информации о доставке
     delivery_info: tp.Optional[DeliveryInfo] = None
@@ -1,21 +1,29 @@
+import asyncio
+import datetime
 import uuid
 import typing as tp
 
 import httpx
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy.testing.pickleable import Order
 
 from app.core.config import settings
 from app.core.db.session import get_session
+from app.modules.delivery.enums.delivery_methods import DeliveryMethods
 from app.modules.delivery.enums.delivery_statuses import DeliveryStatusesEnum
+from app.modules.delivery.entities import OrderDeliveryStatusEntity
 from app.modules.delivery.service import DeliveryService
+from app.modules.delivery.status_service import DeliveryStatusService
+from app.modules.goods.catalog import catalog_snapshot
 from app.modules.goods.entities import GoodVariationEntity
 from app.modules.orders.entities import OrderEntity, OrderDetailsEntity
+from app.modules.orders.reservations import StockReservationService
 from app.modules.orders.schemas.order_schema import OrderSchema
 from app.modules.orders.schemas.create import CreateOrderSchema
+from app.modules.payments.enums.currencies import Currencies
 from app.modules.users.entities import UserEntity
 from app.modules.cart.service import CartService
 
@@ -34,58 +42,88 @@ class OrderService:
         db: AsyncSession = Depends(get_session),
         delivery_service: DeliveryService = Depends(),
         cart_service: CartService = Depends(),
+        delivery_status_service: DeliveryStatusService = Depends(),
+        reservation_service: StockReservationService = Depends(),
     ):
         self.db = db
         self.delivery_service = delivery_service
         self.cart_service = cart_service
+        self.delivery_status_service = delivery_status_service
+        self.reservation_service = reservation_service
 
     async def create_order(
         self, order_data: CreateOrderSchema, current_user: UserEntity
     ):
-
+        """
+        Создает заказ одной транзакцией с постоянным числом запросов к БД
+        независимо от размера корзины: заказ, детали одним executemany,
+        резерв остатков и очистка корзины.
+        """
         variation_ids = [detail.variation_id for detail in order_data.details]
 
-        stmt = select(GoodVariationEntity).where(
+        stmt = select(GoodVariationEntity.id, GoodVariationEntity.latest_price).where(
             GoodVariationEntity.id.in_(variation_ids)
         )
         result = await self.db.execute(stmt)
-        found_variations = result.scalars().all()
+        prices = dict(result.tuples().all())
 
-        variation_map = {v.id: v.__dict__ for v in found_variations}
         for detail in order_data.details:
-            if variation_map.get(detail.variation_id, None) is None:
+            if detail.variation_id not in prices:
                 raise OrderCreationError("Goods variations not found")
 
-            variation = variation_map[detail.variation_id]
-            if variation["latest_price"] is None:
+            if prices[detail.variation_id] is None:
                 raise OrderCreationError(
-                    f"Variation {variation['id']} has no latest price set"
+                    f"Variation {detail.variation_id} has no latest price set"
                 )
 
+        # Все столбцы заданы явно: после коммита объект не нужно перечитывать
         order = OrderEntity(
+            id=str(uuid.uuid4()),
             user_id=current_user.id,
+            currency=Currencies.RUB,
             delivery_point=order_data.delivery_point,
             delivery_method=order_data.delivery_method,
+            created_at=datetime.datetime.now(datetime.UTC),
+            cdek_order_uuid=None,
+            stock_shortage_at=None,
         )
         self.db.add(order)
 
-        for detail in order_data.details:
-            variation = variation_map[detail.variation_id]
-            order_detail = OrderDetailsEntity(
-                order=order,
-                variation_id=variation["id"],
-                quantity=detail.quantity,
-                price=variation["latest_price"],
+        try:
+            await self.db.flush()
+            # id деталей генерируются здесь, поэтому RETURNING не нужен.
+            # executemany: один кэшируемый запрос, asyncpg отправляет строки пачкой
+            await self.db.execute(
+                insert(OrderDetailsEntity),
+                [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "order_id": order.id,
+                        "variation_id": detail.variation_id,
+                        "quantity": detail.quantity,
+                        "price": prices[detail.variation_id],
+                    }
+                    for detail in order_data.details
+                ],
             )
-            self.db.add(order_detail)
 
-        await self.db.flush()
+            # Остатки списываются последними: блокировки строк вариаций держатся
+            # только до коммита, а не на время вставки заказа
+            reservation = await self.reservation_service.reserve(
+                order.id,
+                ((detail.variation_id, detail.quantity) for detail in order_data.details),
+            )
+            await self.cart_service.clear_cart(current_user, commit=False)
 
-        # cdek_data = await self.delivery_service.prepare_cdek_data(order_data, variation_map, order.id, current_user)
-        await self.db.commit()
-        await self.db.refresh(order)
+            # cdek_data = await self.delivery_service.prepare_cdek_data(order_data, variation_map, order.id, current_user)
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            raise
 
-        await self.cart_service.clear_cart(current_user)
+        # Обнулившийся остаток меняет фильтр in_stock и фасеты каталога
+        if reservation.sold_out:
+            catalog_snapshot.invalidate()
 
         result = {
             "order": order
@@ -121,8 +159,12 @@ class OrderService:
         return order
 
     async def get_status(self, order: OrderEntity) -> tp.Optional[DeliveryStatusesEnum]:
-        status = await self.delivery_service.get_order_status(order)
-        return status if status else None
+        if not order.cdek_order_uuid:
+            return DeliveryStatusesEnum.WAITING_FOR_PAYMENT
+
+        statuses = await self.delivery_status_service.get_statuses([order.id])
+        status = statuses.get(order.id)
+        return status.status if status else None
 
     async def get_orders_by_user(
         self, user: UserEntity, include_delivery_info: bool = True
@@ -143,16 +185,93 @@ class OrderService:
         orders = result.scalars().all()
 
         schemas = [o.to_schema() for o in orders]
-        for order_schema in schemas:
-            # Получаем статус доставки
-            order_schema.status = await self.delivery_service.get_order_status(
-                order_schema
+        await self.enrich_orders(schemas, include_delivery_info)
+        return schemas
+
+    async def enrich_orders(
+        self, schemas: tp.List[OrderSchema], include_delivery_info: bool = True
+    ):
+        """Заполнить статусы (и при необходимости данные доставки) заказов"""
+        stored_statuses = await self.delivery_status_service.get_statuses(
+            schema.id for schema in schemas
+        )
+        semaphore = asyncio.Semaphore(settings.ORDERS_ENRICHMENT_CONCURRENCY)
+
+        if include_delivery_info:
+            # Заказы с одним и тем же ПВЗ запрашивают его один раз
+            delivery_points = {
+                (DeliveryMethods(schema.delivery_method), schema.delivery_point)
+                for schema in schemas
+            }
+            await asyncio.gather(
+                *(
+                    self._prefetch_delivery_point(method, code, semaphore)
+                    for method, code in delivery_points
+                )
             )
 
-            # Если запрошена расширенная информация о доставке, заполняем её
-            if include_delivery_info:
-                order_schema = await self.delivery_service.fill_order_delivery_info(
-                    order_schema
+        await asyncio.gather(
+            *(
+                self._enrich_order(
+                    schema,
+                    include_delivery_info,
+                    semaphore,
+                    stored_statuses.get(schema.id),
                 )
+                for schema in schemas
+            )
+        )
 
-        return schemas
+    async def get_stored_order_data(self, order_id: str) -> tp.Optional[dict]:
+        """Данные заказа в службе доставки, сохраненные фоновым воркером"""
+        statuses = await self.delivery_status_service.get_statuses([order_id])
+        status = statuses.get(order_id)
+        return status.to_order_data() if status else None
+
+    async def _prefetch_delivery_point(
+        self, method: DeliveryMethods, code: str, semaphore: asyncio.Semaphore
+    ):
+        async with semaphore:
+            try:
+                await asyncio.wait_for(
+                    self.delivery_service.get_delivery_point_info(method, code),
+                    timeout=settings.ORDERS_ENRICHMENT_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _enrich_order(
+        self,
+        order_schema: OrderSchema,
+        include_delivery_info: bool,
+        semaphore: asyncio.Semaphore,
+        stored_status: tp.Optional[OrderDeliveryStatusEntity] = None,
+    ):
+        """
+        Заполнить статус и информацию о доставке с ограничением по времени.
+
+        Статус берется только из order_delivery_status, заказ в службе доставки
+        не запрашивается: статусы обновляет фоновый DeliveryStatusRefresher.
+        """
+        # Пустые данные - заказ в службе доставки не запрашивать
+        order_data = {}
+        if stored_status is not None:
+            order_schema.status = stored_status.status
+            order_data = stored_status.to_order_data()
+        elif not order_schema.track_number:
+            order_schema.status = DeliveryStatusesEnum.WAITING_FOR_PAYMENT
+
+        if not include_delivery_info:
+            return
+
+        async with semaphore:
+            try:
+                await asyncio.wait_for(
+                    self.delivery_service.fill_order_delivery_info(
+                        order_schema, order_data
+                    ),
+                    timeout=settings.ORDERS_ENRICHMENT_TIMEOUT,
+                )
+            except Exception:
+                # Заказ отдается без данных доставки, чтобы не блокировать ЛК
+                pass
@@ -1,7 +1,9 @@
+import datetime
 import uuid
 
 from pydantic import BaseModel
-from sqlalchemy import String, ForeignKey, Enum
+from sqlalchemy import String, ForeignKey, Enum, DateTime, Index, Integer, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db.session import Base
@@ -26,3 +28,52 @@ class PaymentEntity(Base):
                                         default=PaymentStatuses.CREATED)
 
     order: Mapped[OrderEntity] = relationship(back_populates="payments")
+
+
+class PaymentEventEntity(Base):
+    """
+    Журнал уведомлений платежных систем (только добавление).
+
+    Каждое принятое уведомление сохраняется как есть, в том числе повторы.
+    processed_at проставляется, только когда оплата проведена (или платеж
+    уже был оплачен); после ошибки событие ждет повтора до next_attempt_at,
+    а после PAYMENT_EVENTS_MAX_ATTEMPTS попыток получает dead_at.
+    """
+
+    __tablename__ = "payment_events"
+    __table_args__ = (
+        # Очередь обработчика: только ожидающие события в порядке готовности
+        Index(
+            "ix_payment_events_pending_next_attempt_at",
+            "next_attempt_at",
+            postgresql_where=text("processed_at IS NULL AND dead_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    method: Mapped[PaymentMethods] = mapped_column(
+        Enum(PaymentMethods, name="payment_types_enum", native_enum=False),
+        nullable=False,
+    )
+    # InvoiceId уведомления - ключ дедупликации при обработке
+    payment_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    received_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.datetime.now(datetime.UTC),
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    processed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # Попытки исчерпаны, нужен ручной разбор
+    dead_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    error: Mapped[str] = mapped_column(String, nullable=True)
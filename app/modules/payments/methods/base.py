@@ -1,3 +1,4 @@
+import json
 from abc import abstractmethod
 
 from app.modules.orders.entities import OrderEntity
@@ -10,4 +11,20 @@ class BasePaymentMethod:
 
     @abstractmethod
     async def process_payment(self, body: tp.Any) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def verify_notification(self, body: bytes, headers: tp.Mapping[str, str]) -> bool:
+        """Проверяет подпись уведомления платежной системы по сырому телу запроса"""
+        pass
+
+    def parse_notification(self, body: bytes, content_type: str) -> dict:
+        return self.parse_json_object(body)
+
+    @staticmethod
+    def parse_json_object(body: bytes) -> dict:
+        """Тело уведомления в JSON; не объект (список, строка, число) - ValueError"""
+        payload = json.loads(body)
+        if not isinstance(payload, dict):
+            raise ValueError("Notification body must be a JSON object")
+        return payload
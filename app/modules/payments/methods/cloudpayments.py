@@ -1,6 +1,10 @@
+import base64
+import hashlib
+import hmac
 import uuid
 import httpx
 import typing as tp
+from urllib.parse import parse_qsl, unquote_plus
 
 from app.core.config import settings
 from app.modules.orders.entities import OrderEntity
@@ -15,6 +19,34 @@ class CloudPaymentsPaymentMethod(BasePaymentMethod):
     async def process_payment(self, body: tp.Any) -> str:
         return body["InvoiceId"]
 
+    @staticmethod
+    def _sign(message: bytes) -> str:
+        digest = hmac.new(
+            settings.CLOUDPAYMENTS.API_SECRET.encode(), message, hashlib.sha256
+        ).digest()
+        return base64.b64encode(digest).decode()
+
+    def verify_notification(self, body: bytes, headers: tp.Mapping[str, str]) -> bool:
+        """
+        Content-HMAC - подпись сырого тела, X-Content-HMAC - подпись тела
+        после URL-декодирования (оба заголовка: base64 HMAC-SHA256 по API Secret)
+        """
+        signature = headers.get("content-hmac")
+        if signature:
+            return hmac.compare_digest(self._sign(body), signature.strip())
+
+        signature = headers.get("x-content-hmac")
+        if signature:
+            decoded = unquote_plus(body.decode("utf-8", "replace")).encode()
+            return hmac.compare_digest(self._sign(decoded), signature.strip())
+        return False
+
+    def parse_notification(self, body: bytes, content_type: str) -> dict:
+        # По умолчанию CloudPayments шлет form-urlencoded, JSON - если включен в ЛК
+        if content_type.startswith("application/json"):
+            return self.parse_json_object(body)
+        return dict(parse_qsl(body.decode(), keep_blank_values=True))
+
     async def get_payment_link(self, order: OrderEntity, payment_id: str = None) -> str:
         items = [
             {
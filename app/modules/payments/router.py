@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends
+import typing as tp
+
+from fastapi import APIRouter, Depends, Request
 
 from app.core.dependencies.get_current_user import get_current_user
+from app.core.idempotency import IdempotencyGuard, get_idempotency_key
 from app.modules.orders.entities import OrderEntity
 from app.modules.payments.schemas.generate_payment_link import GeneratePaymentLinkSchema
 from app.modules.payments.service import PaymentService, PaymentLinkGenerationError
@@ -16,17 +19,24 @@ async def get_methods(service: PaymentService = Depends()):
     ]
 
 @router.post("/generate_payment_link")
-async def generate_payment_link(body: GeneratePaymentLinkSchema, service: PaymentService = Depends(), current_user:UserEntity = Depends(get_current_user)):
-    try:
-        link = await service.generate_payment_link(body, current_user)
-        return {
+async def generate_payment_link(body: GeneratePaymentLinkSchema, request: Request, service: PaymentService = Depends(), current_user:UserEntity = Depends(get_current_user),
+                                idempotency_key: tp.Optional[str] = Depends(get_idempotency_key)):
+    async with IdempotencyGuard(f"payments.link:{current_user.id}", idempotency_key, request) as guard:
+        if guard.replay is not None:
+            return guard.replay
+
+        try:
+            link = await service.generate_payment_link(body, current_user)
+        except PaymentLinkGenerationError as e:
+            # Ошибка не сохраняется: повтор с тем же ключом попробует снова
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+
+        return guard.save({
             "status": "success",
             "data": {
                 "link": link
             }
-        }
-    except PaymentLinkGenerationError as e:
-        return {
-            "status": "error",
-            "message": str(e)
-        }
+        })
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+import typing as tp
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+K = tp.TypeVar("K")
+V = tp.TypeVar("V")
+
+
+class TTLCache(tp.Generic[K, V]):
+    """
+    In-process LRU кэш с TTL и режимом stale-while-revalidate.
+
+    Запись считается свежей `ttl` секунд, после этого еще `stale_ttl` секунд
+    она отдается как устаревшая, пока в фоне идет обновление.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[K, tp.Tuple[V, float]]" = OrderedDict()
+        self._loading: tp.Dict[K, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> tp.Tuple[bool, tp.Optional[V], bool]:
+        """
+        :return: (найдено, значение, свежее ли значение)
+        """
+        item = self._data.get(key)
+        if item is None:
+            return False, None, False
+
+        value, stored_at = item
+        age = time.monotonic() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            del self._data[key]
+            return False, None, False
+
+        self._data.move_to_end(key)
+        return True, value, age <= self.ttl
+
+    def set(self, key: K, value: V):
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: K):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def _load(
+        self,
+        key: K,
+        loader: tp.Callable[[], tp.Awaitable[V]],
+        background: bool = False,
+    ) -> asyncio.Future:
+        # Один загрузчик на ключ: параллельные промахи ждут один и тот же запрос
+        future = self._loading.get(key)
+        if future is None:
+
+            async def run():
+                try:
+                    value = await loader()
+                    self.set(key, value)
+                    return value
+                finally:
+                    self._loading.pop(key, None)
+
+            future = asyncio.ensure_future(run())
+            self._loading[key] = future
+            # Ошибку фонового обновления никто не ждет - она логируется один
+            # раз, сколько бы устаревших чтений ни пришлось на это обновление
+            if background:
+                future.add_done_callback(self._log_background_error)
+        return future
+
+    async def get_or_load(self, key: K, loader: tp.Callable[[], tp.Awaitable[V]]) -> V:
+        found, value, fresh = self.get(key)
+        if found and fresh:
+            return value
+
+        if found:
+            self._load(key, loader, background=True)
+            return value
+
+        return await asyncio.shield(self._load(key, loader))
+
+    @staticmethod
+    def _log_background_error(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Background cache refresh failed: %s", future.exception())
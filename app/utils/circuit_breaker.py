@@ -0,0 +1,124 @@
+import enum
+import time
+import typing as tp
+
+T = tp.TypeVar("T")
+
+
+class CircuitState(str, enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Автомат closed -> open -> half-open вокруг вызовов внешнего сервиса.
+
+    Ошибкой считается исключение, результат, для которого `is_failure`
+    вернул True, или вызов дольше `slow_call_threshold` секунд. После
+    `failure_threshold` ошибок подряд цепь размыкается, и вызовы сразу
+    получают CircuitOpenError. Через `reset_timeout` секунд пропускается
+    `half_open_max_calls` пробных вызовов: успех замыкает цепь, ошибка
+    снова размыкает.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_threshold: float = 3.0,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def allows_request(self) -> bool:
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN:
+            return self._half_open_calls < self.half_open_max_calls
+        return False
+
+    def _before_call(self):
+        if not self.allows_request():
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+        if self._state == CircuitState.HALF_OPEN:
+            self._half_open_calls += 1
+
+    def record_success(self):
+        self._failures = 0
+        self._state = CircuitState.CLOSED
+
+    def record_failure(self):
+        self._failures += 1
+        if (
+            self._state == CircuitState.HALF_OPEN
+            or self._failures >= self.failure_threshold
+        ):
+            if self._state != CircuitState.OPEN:
+                self.opened += 1
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    async def call(
+        self,
+        func: tp.Callable[[], tp.Awaitable[T]],
+        is_failure: tp.Optional[tp.Callable[[T], bool]] = None,
+    ) -> T:
+        self._before_call()
+
+        started = time.monotonic()
+        try:
+            result = await func()
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Отмененный вызов не дает результата: пробный слот освобождается
+            if self._state == CircuitState.HALF_OPEN:
+                self._half_open_calls -= 1
+            raise
+
+        slow = time.monotonic() - started > self.slow_call_threshold
+        if slow or (is_failure is not None and is_failure(result)):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
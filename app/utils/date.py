@@ -1,4 +1,15 @@
+import typing as tp
 from datetime import datetime
 
 def format_date(d: datetime) -> str:
-    return d.strftime("%d.%m.%Y %H:%M:%S")
\ No newline at end of file
+    return d.strftime("%d.%m.%Y %H:%M:%S")
+
+
+def parse_datetime(value: tp.Optional[str]) -> tp.Optional[datetime]:
+    """Разобрать дату в формате ISO 8601 (в т.ч. со смещением вида +0700)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
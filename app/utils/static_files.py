@@ -0,0 +1,191 @@
+import gzip
+import os
+import re
+import shutil
+import sys
+import typing as tp
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, PathLike, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+# Имя содержит хэш содержимого (например, 626f9291b0fc3526-320.webp)
+CONTENT_HASH_RE = re.compile(r"(?:^|[-_.])([0-9a-f]{16,64})(?=[-_.])")
+
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+}
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def is_compressible(media_type: str) -> bool:
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+class MediaFileResponse(FileResponse):
+    """
+    FileResponse с zero-copy отдачей через ASGI-расширение http.response.pathsend.
+
+    Если сервер его поддерживает (Granian, Hypercorn), файл отправляет сам
+    сервер (sendfile); иначе - обычное чтение чанками.
+    """
+
+    def __init__(self, *args, pathsend: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pathsend = pathsend
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            self.pathsend
+            and "http.response.pathsend" in scope.get("extensions", {})
+            and scope["method"].upper() != "HEAD"
+            and "range" not in Headers(scope=scope)
+        ):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            if self.background is not None:
+                await self.background()
+            return
+
+        await super().__call__(scope, receive, send)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles с заголовками кэширования для медиа и статики.
+
+    - файлы с хэшем содержимого в имени: Cache-Control immutable на год и
+      сильный ETag из хэша;
+    - остальные: no-cache, клиент перепроверяет их по ETag/Last-Modified и
+      получает 304;
+    - для текстовых типов отдаются заранее сжатые соседи .br/.gz
+      (см. precompress), если клиент их принимает;
+    - Range-запросы обрабатывает FileResponse.
+    """
+
+    def __init__(
+        self,
+        *args,
+        immutable_max_age: int = 365 * 24 * 60 * 60,
+        pathsend: bool = True,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.immutable_max_age = immutable_max_age
+        self.pathsend = pathsend
+
+    @staticmethod
+    def _precompressed(
+        full_path: PathLike, request_headers: Headers
+    ) -> tp.Optional[tp.Tuple[str, str, os.stat_result]]:
+        accept_encoding = request_headers.get("accept-encoding", "")
+        for encoding, extension in PRECOMPRESSED:
+            if encoding not in accept_encoding:
+                continue
+            path = f"{full_path}{extension}"
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            return encoding, path, stat_result
+        return None
+
+    def file_response(
+        self,
+        full_path: PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+        headers = {}
+
+        path, encoding = full_path, None
+        if is_compressible(media_type):
+            headers["Vary"] = "Accept-Encoding"
+            precompressed = self._precompressed(full_path, request_headers)
+            if precompressed is not None:
+                encoding, path, stat_result = precompressed
+                headers["Content-Encoding"] = encoding
+
+        content_hash = CONTENT_HASH_RE.search(os.path.basename(str(full_path)))
+        if content_hash is not None:
+            headers["Cache-Control"] = (
+                f"public, max-age={self.immutable_max_age}, immutable"
+            )
+            suffix = f"-{encoding}" if encoding else ""
+            headers["ETag"] = f'"{content_hash.group(1)}{suffix}"'
+        else:
+            headers["Cache-Control"] = "no-cache"
+
+        response = MediaFileResponse(
+            path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+            pathsend=self.pathsend,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress(directory: str, min_size: int = 1024) -> int:
+    """
+    Создает рядом с текстовыми файлами сжатые копии .gz (и .br, если
+    установлен brotli). Пропускает файлы, копии которых уже свежее оригинала.
+
+    :return: число записанных файлов
+    """
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith((".gz", ".br")) or os.path.getsize(path) < min_size:
+                continue
+            media_type = guess_type(path)[0] or ""
+            if not is_compressible(media_type):
+                continue
+
+            mtime = os.path.getmtime(path)
+            with open(path, "rb") as f:
+                content = f.read()
+
+            gz_path = f"{path}.gz"
+            if not os.path.exists(gz_path) or os.path.getmtime(gz_path) < mtime:
+                with open(path, "rb") as src, gzip.open(gz_path, "wb", 9) as dst:
+                    shutil.copyfileobj(src, dst)
+                written += 1
+
+            br_path = f"{path}.br"
+            if brotli is not None and (
+                not os.path.exists(br_path) or os.path.getmtime(br_path) < mtime
+            ):
+                with open(br_path, "wb") as dst:
+                    dst.write(brotli.compress(content))
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    # Сжатие статики при деплое: python -m app.utils.static_files static media
+    for directory in sys.argv[1:] or ["static"]:
+        print(f"{directory}: {precompress(directory)} files written")
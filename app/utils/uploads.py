@@ -0,0 +1,160 @@
+import contextlib
+import hashlib
+import os
+import typing as tp
+import uuid
+
+import aiofiles
+import aiofiles.os
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Запас на заголовки частей multipart сверх размера самого файла
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class InvalidUploadError(ValueError):
+    pass
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class ReceivedFile(tp.NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    content_type: str
+    filename: tp.Optional[str]
+
+
+class _FilePartReader:
+    """
+    Колбэки MultipartParser: данные нужного поля складываются в pending,
+    остальные части формы отбрасываются.
+    """
+
+    def __init__(self, field: str, allowed_types: tp.Collection[str]):
+        self.field = field
+        self.allowed_types = allowed_types
+        self.pending: tp.List[bytes] = []
+        self.content_type: tp.Optional[str] = None
+        self.filename: tp.Optional[str] = None
+        self.finished = False
+
+        self._headers: tp.Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        if name != self.field or self.finished or self.content_type is not None:
+            return
+
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1").strip()
+        if content_type not in self.allowed_types:
+            raise InvalidUploadError(f"Unsupported content type {content_type or None}")
+
+        self.content_type = content_type
+        filename = options.get(b"filename")
+        self.filename = filename.decode("utf-8", "replace") if filename else None
+        self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self.finished = True
+
+
+@contextlib.asynccontextmanager
+async def receive_file(
+    stream: tp.AsyncIterable[bytes],
+    content_type_header: str,
+    directory: str,
+    max_size: int,
+    allowed_types: tp.Collection[str],
+    field: str = "file",
+    content_length: tp.Optional[int] = None,
+) -> tp.AsyncIterator[ReceivedFile]:
+    """
+    Потоково принимает файл из тела multipart/form-data во временный файл
+    в directory, считая sha256 и размер по ходу чтения.
+
+    В памяти держится только текущий чанк тела запроса. Превышение max_size
+    обрывает прием (по Content-Length - еще до чтения тела). Временный файл
+    удаляется при выходе, если его не перенесли в хранилище.
+    """
+    if content_length is not None and content_length > max_size + MULTIPART_OVERHEAD:
+        raise UploadTooLargeError(f"File is larger than {max_size} bytes")
+
+    media_type, options = parse_options_header(content_type_header)
+    boundary = options.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected multipart/form-data body")
+
+    reader = _FilePartReader(field, allowed_types)
+    parser = MultipartParser(boundary, reader.callbacks())
+
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.upload")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(path, "wb") as f:
+            async for chunk in stream:
+                parser.write(chunk)
+                for piece in reader.pending:
+                    size += len(piece)
+                    if size > max_size:
+                        raise UploadTooLargeError(f"File is larger than {max_size} bytes")
+                    digest.update(piece)
+                    await f.write(piece)
+                reader.pending.clear()
+            parser.finalize()
+
+        if not reader.finished:
+            raise InvalidUploadError(f"Field {field} with a file is required")
+        if size == 0:
+            raise InvalidUploadError("File is empty")
+
+        yield ReceivedFile(
+            path=path,
+            sha256=digest.hexdigest(),
+            size=size,
+            content_type=reader.content_type,
+            filename=reader.filename,
+        )
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            await aiofiles.os.remove(path)
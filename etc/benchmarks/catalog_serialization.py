@@ -0,0 +1,165 @@
+"""
+Бенчмарк сериализации каталога: ORM-граф через jsonable_encoder (как было)
+против проекций CatalogGoodSchema из строк колонок через pydantic-core
+(как сейчас).
+
+БД не нужна: строки и ORM-объекты собираются в памяти.
+
+    python -m etc.benchmarks.catalog_serialization --sizes 1000 10000 100000
+
+Для каждого размера (число вариаций; 5 вариаций и 10 фото на товар) печатает
+время сериализации и пик выделенной памяти (tracemalloc).
+"""
+
+import argparse
+import datetime
+import json
+import time
+import tracemalloc
+import typing as tp
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.modules.goods.catalog import CatalogSnapshot
+from app.modules.goods.entities import (
+    GoodEntity,
+    GoodVariationEntity,
+    GoodVariationPhotoEntity,
+)
+from app.modules.goods.enums.vat_rates import VATRate
+
+VARIATIONS_PER_GOOD = 5
+PHOTOS_PER_VARIATION = 2
+
+
+def make_rows(variations: int) -> tp.Tuple[list, list, list]:
+    now = datetime.datetime.now(datetime.UTC)
+    goods, variation_rows, photos = [], [], []
+    for g in range(variations // VARIATIONS_PER_GOOD):
+        good_id = f"good-{g}"
+        goods.append(
+            {
+                "id": good_id,
+                "title": f"Товар {g}",
+                "description": "Описание товара " * 5,
+                "vat_rate": VATRate.VAT_5,
+                "show_in_catalog": True,
+                "created_at": now,
+            }
+        )
+        for v in range(VARIATIONS_PER_GOOD):
+            variation_id = f"{good_id}-{v}"
+            variation_rows.append(
+                {
+                    "id": variation_id,
+                    "good_id": good_id,
+                    "title": f"Вариация {v}",
+                    "description": "Описание вариации",
+                    "latest_price": 1990.0,
+                    "latest_price_date": now,
+                    "weight": 0.4,
+                    "length": 30.0,
+                    "width": 20.0,
+                    "height": 5.0,
+                    "remaining_stock": 10,
+                    "remaining_stock_date": now,
+                }
+            )
+            for p in range(PHOTOS_PER_VARIATION):
+                photos.append(
+                    {
+                        "id": f"{variation_id}-{p}",
+                        "variation_id": variation_id,
+                        "url": f"/media/{variation_id}-{p}.jpg",
+                        "is_main": p == 0,
+                    }
+                )
+    return goods, variation_rows, photos
+
+
+def build_orm(goods: list, variations: list, photos: list) -> list:
+    """ORM-граф в том виде, в каком его оставляет selectinload"""
+    photos_by_variation: tp.Dict[str, list] = {}
+    for row in photos:
+        photos_by_variation.setdefault(row["variation_id"], []).append(
+            GoodVariationPhotoEntity(**row)
+        )
+    variations_by_good: tp.Dict[str, list] = {}
+    for row in variations:
+        variation = GoodVariationEntity(**row)
+        set_committed_value(variation, "photos", photos_by_variation[row["id"]])
+        variations_by_good.setdefault(row["good_id"], []).append(variation)
+
+    result = []
+    for row in goods:
+        good = GoodEntity(**row)
+        set_committed_value(good, "variations", variations_by_good[row["id"]])
+        result.append(good)
+    return result
+
+
+def serialize_orm(goods: list) -> bytes:
+    return json.dumps(
+        jsonable_encoder(goods),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def serialize_projection(goods: list, variations: list, photos: list) -> bytes:
+    # Та же сборка, что в GoodsService._build_catalog_goods
+    photos_by_variation: tp.Dict[str, list] = {}
+    for row in photos:
+        photos_by_variation.setdefault(row["variation_id"], []).append(dict(row))
+    variations_by_good: tp.Dict[str, list] = {}
+    for row in variations:
+        variations_by_good.setdefault(row["good_id"], []).append(
+            {**row, "photos": photos_by_variation.get(row["id"], [])}
+        )
+    content = [
+        {**row, "variations": variations_by_good.get(row["id"], [])} for row in goods
+    ]
+    return CatalogSnapshot.encode(content).body
+
+
+def measure(func: tp.Callable[[], bytes]) -> tp.Tuple[float, float, int]:
+    started = time.perf_counter()
+    body = func()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / 1024 / 1024, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(
+        f"{'variations':>10} {'mode':<11} {'time, ms':>10} "
+        f"{'peak, MiB':>10} {'body, KiB':>10}"
+    )
+    for size in args.sizes:
+        goods, variations, photos = make_rows(size)
+        orm_goods = build_orm(goods, variations, photos)
+
+        for mode, func in (
+            ("orm", lambda: serialize_orm(orm_goods)),
+            ("projection", lambda: serialize_projection(goods, variations, photos)),
+        ):
+            elapsed_ms, peak_mib, body_size = measure(func)
+            print(
+                f"{size:>10} {mode:<11} {elapsed_ms:>10.1f} "
+                f"{peak_mib:>10.1f} {body_size / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
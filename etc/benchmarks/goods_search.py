@@ -0,0 +1,142 @@
+"""
+Бенчмарк GET /api/v1/goods/search на синтетическом каталоге.
+
+Запуск (из корня проекта, БД с примененными миграциями):
+
+    python -m etc.benchmarks.goods_search --goods 20000 --variations 5
+
+Создает товары с id "bench-...", прогоняет запросы "по мере ввода" через
+GoodsService.search и печатает p50/p95/max. По умолчанию синтетические
+данные удаляются после прогона (--keep оставляет их). Код выхода 1, если
+p95 какого-либо запроса превышает бюджет --budget-ms.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, insert, text
+
+import main as _app_models  # noqa: F401 - регистрирует все модели, как alembic/env.py
+from app.core.db.session import AsyncSessionLocal
+from app.modules.goods.entities import GoodEntity, GoodVariationEntity
+from app.modules.goods.schemas.get_schemas import SearchGoodsSchema
+from app.modules.goods.service import GoodsService
+
+BENCH_PREFIX = "bench-"
+
+NOUNS = [
+    "платье", "футболка", "худи", "свитшот", "кроссовки", "джинсы", "куртка",
+    "рубашка", "юбка", "шорты", "пальто", "кепка", "шарф", "носки", "сумка",
+]
+ADJECTIVES = [
+    "черный", "белый", "красный", "синий", "зеленый", "бежевый", "серый",
+    "оверсайз", "хлопковый", "льняной", "теплый", "летний", "базовый",
+]
+SIZES = ["XS", "S", "M", "L", "XL", "XXL"]
+
+QUERIES = [
+    "пл", "пла", "плат", "платье", "платье кр", "платье красное",
+    "фут", "футболка бел", "худи чер", "кросс", "джинсы син",
+    "плотье", "футбалка",
+]
+
+
+async def seed(goods_count: int, variations_per_good: int, batch: int = 2000):
+    rnd = random.Random(42)
+    async with AsyncSessionLocal() as db:
+        for start in range(0, goods_count, batch):
+            goods, variations = [], []
+            for _ in range(min(batch, goods_count - start)):
+                good_id = f"{BENCH_PREFIX}{uuid.uuid4()}"
+                title = f"{rnd.choice(NOUNS).capitalize()} {rnd.choice(ADJECTIVES)}"
+                goods.append(
+                    {
+                        "id": good_id,
+                        "title": title,
+                        "description": " ".join(rnd.choices(ADJECTIVES + NOUNS, k=12)),
+                        "show_in_catalog": True,
+                    }
+                )
+                for size in rnd.sample(SIZES, k=min(variations_per_good, len(SIZES))):
+                    variations.append(
+                        {
+                            "id": f"{BENCH_PREFIX}{uuid.uuid4()}",
+                            "good_id": good_id,
+                            "title": f"{title} {rnd.choice(ADJECTIVES)} {size}",
+                            "description": "",
+                        }
+                    )
+            await db.execute(insert(GoodEntity), goods)
+            await db.execute(insert(GoodVariationEntity), variations)
+            await db.commit()
+
+        await db.execute(text("ANALYZE goods"))
+        await db.execute(text("ANALYZE goods_variations"))
+        await db.commit()
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            delete(GoodVariationEntity).where(
+                GoodVariationEntity.good_id.startswith(BENCH_PREFIX)
+            )
+        )
+        await db.execute(delete(GoodEntity).where(GoodEntity.id.startswith(BENCH_PREFIX)))
+        await db.commit()
+
+
+async def measure(repeats: int, budget_ms: float) -> bool:
+    ok = True
+    print(f"{'query':<20} {'p50, ms':>8} {'p95, ms':>8} {'max, ms':>8} {'found':>6}")
+    async with AsyncSessionLocal() as db:
+        service = GoodsService(db)
+        for q in QUERIES:
+            data = SearchGoodsSchema(q=q, size=20, show_hidden=False)
+            await service.search(data)  # прогрев
+
+            timings = []
+            found = 0
+            for _ in range(repeats):
+                started = time.perf_counter()
+                found = len(await service.search(data))
+                timings.append((time.perf_counter() - started) * 1000)
+                db.expunge_all()
+
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            ok = ok and p95 <= budget_ms
+            print(
+                f"{q:<20} {statistics.median(timings):>8.2f} {p95:>8.2f} "
+                f"{max(timings):>8.2f} {found:>6}"
+            )
+    return ok
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--goods", type=int, default=20000)
+    parser.add_argument("--variations", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=20.0)
+    parser.add_argument("--keep", action="store_true")
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        await seed(args.goods, args.variations)
+    try:
+        ok = await measure(args.repeats, args.budget_ms)
+    finally:
+        if not args.keep:
+            await cleanup()
+
+    print("OK" if ok else f"FAIL: p95 > {args.budget_ms} ms")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
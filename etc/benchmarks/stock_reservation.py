@@ -0,0 +1,218 @@
+"""
+Нагрузочный тест списания остатков на одной "горячей" вариации.
+
+Запуск (из корня проекта, БД с примененными миграциями):
+
+    python -m etc.benchmarks.stock_reservation --stock 1000 --checkouts 3000 --workers 50
+
+Создает вариацию с id "bench-..." и остатком --stock, затем --workers
+параллельных покупателей делают --checkouts попыток купить --quantity
+штук. Каждая попытка - отдельная транзакция. Режимы:
+
+    batched      - StockReservationService.take_stock (условный UPDATE ... RETURNING)
+    naive        - SELECT ... FOR UPDATE, проверка в Python, затем UPDATE
+    create_order - OrderService.create_order целиком: цены, заказ, детали,
+                   резерв и очистка корзины в одной транзакции
+
+Печатает пропускную способность, p50/p95 задержки и проверяет, что
+продано ровно min(stock, checkouts * quantity) и остаток не ушел в минус.
+Код выхода 1 при overselling. Число одновременных транзакций ограничено
+также пулом соединений engine.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+import main as _app_models  # noqa: F401 - регистрирует все модели, как alembic/env.py
+from app.core.db.session import AsyncSessionLocal
+from app.modules.cart.service import CartService
+from app.modules.delivery.enums.delivery_methods import DeliveryMethods
+from app.modules.goods.entities import GoodEntity, GoodVariationEntity
+from app.modules.orders.entities import OrderDetailsEntity, OrderEntity
+from app.modules.orders.reservations import OutOfStockError, StockReservationService
+from app.modules.orders.schemas.create import CreateOrderSchema, OrderDetailSchema
+from app.modules.orders.service import OrderService
+from app.modules.users.entities import UserEntity
+
+BENCH_PREFIX = "bench-"
+BENCH_USER_ID = f"{BENCH_PREFIX}user"
+
+
+async def seed(stock: int) -> str:
+    good_id = f"{BENCH_PREFIX}{uuid.uuid4()}"
+    variation_id = f"{BENCH_PREFIX}{uuid.uuid4()}"
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(GoodEntity),
+            [{"id": good_id, "title": "Bench drop", "description": ""}],
+        )
+        await db.execute(
+            insert(GoodVariationEntity),
+            [
+                {
+                    "id": variation_id,
+                    "good_id": good_id,
+                    "title": "Bench drop",
+                    "description": "",
+                    "remaining_stock": stock,
+                    "latest_price": 100,
+                }
+            ],
+        )
+        # Пользователь мог остаться после запуска с --keep
+        await db.execute(
+            pg_insert(UserEntity)
+            .values(id=BENCH_USER_ID, telegram_id=-1)
+            .on_conflict_do_nothing()
+        )
+        await db.commit()
+    return variation_id
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        bench_orders = select(OrderEntity.id).where(OrderEntity.user_id == BENCH_USER_ID)
+        await db.execute(
+            delete(OrderDetailsEntity).where(OrderDetailsEntity.order_id.in_(bench_orders))
+        )
+        # Резервы удаляются каскадом
+        await db.execute(delete(OrderEntity).where(OrderEntity.user_id == BENCH_USER_ID))
+        await db.execute(delete(UserEntity).where(UserEntity.id == BENCH_USER_ID))
+        await db.execute(
+            delete(GoodVariationEntity).where(
+                GoodVariationEntity.good_id.startswith(BENCH_PREFIX)
+            )
+        )
+        await db.execute(delete(GoodEntity).where(GoodEntity.id.startswith(BENCH_PREFIX)))
+        await db.commit()
+
+
+async def checkout_batched(variation_id: str, quantity: int) -> bool:
+    async with AsyncSessionLocal() as db:
+        try:
+            await StockReservationService(db).take_stock({variation_id: quantity})
+        except OutOfStockError:
+            await db.rollback()
+            return False
+        await db.commit()
+        return True
+
+
+async def checkout_naive(variation_id: str, quantity: int) -> bool:
+    async with AsyncSessionLocal() as db:
+        stock = await db.scalar(
+            select(GoodVariationEntity.remaining_stock)
+            .where(GoodVariationEntity.id == variation_id)
+            .with_for_update()
+        )
+        if (stock or 0) < quantity:
+            await db.rollback()
+            return False
+        await db.execute(
+            update(GoodVariationEntity)
+            .where(GoodVariationEntity.id == variation_id)
+            .values(remaining_stock=stock - quantity)
+        )
+        await db.commit()
+        return True
+
+
+async def checkout_create_order(variation_id: str, quantity: int) -> bool:
+    order_data = CreateOrderSchema(
+        delivery_method=DeliveryMethods.CDEK,
+        delivery_point="bench",
+        details=[OrderDetailSchema(variation_id=variation_id, quantity=quantity)],
+    )
+    async with AsyncSessionLocal() as db:
+        user = await db.get(UserEntity, BENCH_USER_ID)
+        # Доставка в create_order не используется
+        service = OrderService(
+            db,
+            delivery_service=None,
+            cart_service=CartService(db),
+            delivery_status_service=None,
+            reservation_service=StockReservationService(db),
+        )
+        try:
+            await service.create_order(order_data, user)
+        except OutOfStockError:
+            return False
+        return True
+
+
+CHECKOUTS = {
+    "batched": checkout_batched,
+    "create_order": checkout_create_order,
+    "naive": checkout_naive,
+}
+
+
+async def run(mode: str, variation_id: str, checkouts: int, workers: int, quantity: int):
+    checkout = CHECKOUTS[mode]
+    semaphore = asyncio.Semaphore(workers)
+    timings = []
+
+    async def attempt() -> bool:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                return await checkout(variation_id, quantity)
+            finally:
+                timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(attempt() for _ in range(checkouts)))
+    elapsed = time.perf_counter() - started
+    return sum(results), elapsed, timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=sorted(CHECKOUTS), default="batched")
+    parser.add_argument("--stock", type=int, default=1000)
+    parser.add_argument("--checkouts", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--quantity", type=int, default=1)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    variation_id = await seed(args.stock)
+    try:
+        sold, elapsed, timings = await run(
+            args.mode, variation_id, args.checkouts, args.workers, args.quantity
+        )
+        async with AsyncSessionLocal() as db:
+            remaining = await db.scalar(
+                select(GoodVariationEntity.remaining_stock).where(
+                    GoodVariationEntity.id == variation_id
+                )
+            )
+    finally:
+        if not args.keep:
+            await cleanup()
+
+    expected = min(args.stock // args.quantity, args.checkouts)
+    ok = (
+        sold == expected
+        and remaining >= 0
+        and remaining == args.stock - sold * args.quantity
+    )
+
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(f"mode:        {args.mode}")
+    print(f"checkouts:   {args.checkouts} ({args.workers} concurrent)")
+    print(f"throughput:  {args.checkouts / elapsed:.0f} checkouts/s")
+    print(f"latency:     p50 {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms")
+    print(f"sold:        {sold} (expected {expected}), remaining {remaining}")
+    print("OK" if ok else "FAIL: oversell or lost updates")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi_login import LoginManager
 from sqladmin import Admin, ModelView, expose, BaseView
@@ -5,18 +7,32 @@ from sqlalchemy import select
 from starlette.responses import RedirectResponse
 from starlette.templating import Jinja2Templates
 
-from starlette.staticfiles import StaticFiles
 from starlette.requests import Request
 
 from app.core.config import settings
 from app.core.db.session import Base, engine, get_session, AsyncSessionLocal
+from app.core.idempotency import IdempotencyKeyEntity, run_idempotency_purge_loop
+from app.core.outbox import OutboxMessageEntity, run_outbox_worker_loop
+from app.core.storage import media_storage
 from app.modules.cart.entities import GoodsInCart
+from app.modules.delivery.entities import (
+    DeliveryCacheEntity,
+    CDEKCityEntity,
+    CDEKDeliveryPointEntity,
+    OrderDeliveryStatusEntity,
+    OrderDeliveryStatusHistoryEntity,
+)
 from app.modules.goods.entities import (
     GoodEntity,
     GoodVariationEntity,
     GoodVariationPhotoEntity,
 )
-from app.modules.orders.entities import OrderEntity, OrderDetailsEntity
+from app.modules.orders.entities import (
+    OrderEntity,
+    OrderDetailsEntity,
+    StockReservationEntity,
+)
+from app.modules.payments.entities import PaymentEntity, PaymentEventEntity
 from app.modules.prices.entities import GoodVariationPriceEntity
 
 from app.modules.users import router as users
@@ -28,8 +44,16 @@ from app.modules.orders import router as orders
 from app.modules.delivery import router as delivery
 from app.modules.payments import router as payments
 from app.modules.integrations.payments import router as integrations_payments
+from app.modules.integrations.delivery import router as integrations_delivery
 from app.modules.admin_handlers import router as admin_handlers
 from app.modules.lk import router as lk
+from app.modules.delivery.methods.cdek_http import cdek_http_client
+from app.modules.delivery.directory import run_directory_sync_loop
+from app.modules.delivery.status_service import run_status_refresher_loop
+from app.modules.orders.reservations import run_reservation_sweeper_loop
+from app.modules.integrations.payments.service import run_payment_event_consumer_loop
+from app.modules.goods.images import image_pipeline
+from app.utils.static_files import CachedStaticFiles
 
 from app.modules.users.entities import UserEntity
 
@@ -44,6 +68,16 @@ _ = [
     GoodsInCart,
     OrderEntity,
     OrderDetailsEntity,
+    StockReservationEntity,
+    IdempotencyKeyEntity,
+    OutboxMessageEntity,
+    PaymentEntity,
+    PaymentEventEntity,
+    DeliveryCacheEntity,
+    CDEKCityEntity,
+    CDEKDeliveryPointEntity,
+    OrderDeliveryStatusEntity,
+    OrderDeliveryStatusHistoryEntity,
 ]
 
 app = FastAPI(
@@ -61,8 +95,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/api/static", StaticFiles(directory="static"), name="static")
-app.mount("/media", StaticFiles(directory="media"), name="media")
+app.mount(
+    "/api/static",
+    CachedStaticFiles(directory="static", pathsend=settings.MEDIA_PATHSEND),
+    name="static",
+)
+if settings.MEDIA_STORAGE == "local":
+    app.mount(
+        "/media",
+        CachedStaticFiles(
+            directory=settings.MEDIA_ROOT,
+            immutable_max_age=settings.MEDIA_IMMUTABLE_MAX_AGE,
+            pathsend=settings.MEDIA_PATHSEND,
+            check_dir=False,
+        ),
+        name="media",
+    )
 
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
@@ -75,12 +123,18 @@ app.include_router(payments.router, prefix="/api/v1/payments", tags=["Payments"]
 app.include_router(
     integrations_payments.router, prefix="/api/v1", tags=["Integrations"]
 )
+app.include_router(
+    integrations_delivery.router, prefix="/api/v1", tags=["Integrations"]
+)
 app.include_router(
     admin_handlers.router, prefix="/api/v1/admin_routers", tags=["admin_routers"]
 )
 app.include_router(lk.router, prefix="/api/v1/lk", tags=["lk"])
 
 
+background_tasks: list[asyncio.Task] = []
+
+
 async def init_db():
     async with engine.begin() as connection:
         await connection.run_sync(Base.metadata.create_all)
@@ -89,7 +143,28 @@ async def init_db():
 @app.on_event("startup")
 async def startup():
     # await init_db()
-    pass
+    await cdek_http_client.start()
+
+    background_tasks.append(asyncio.create_task(run_status_refresher_loop()))
+    background_tasks.append(asyncio.create_task(run_reservation_sweeper_loop()))
+    background_tasks.append(asyncio.create_task(run_outbox_worker_loop()))
+    background_tasks.append(asyncio.create_task(run_payment_event_consumer_loop()))
+    if settings.IDEMPOTENCY_DB_TIER:
+        background_tasks.append(asyncio.create_task(run_idempotency_purge_loop()))
+    if settings.CDEK_DIRECTORY_SOURCE == "local":
+        background_tasks.append(asyncio.create_task(run_directory_sync_loop()))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+
+    await cdek_http_client.close()
+    await media_storage.close()
+    image_pipeline.shutdown()
 
 
 class UserAdmin(ModelView, model=UserEntity):
@@ -133,7 +208,11 @@ class GoodsAdmin(ModelView, model=GoodEntity):
     column_searchable_list = [GoodEntity.title]
     column_sortable_list = [GoodEntity.title]
 
-    form_excluded_columns = [GoodEntity.vat_rate]
+    form_excluded_columns = [
+        GoodEntity.vat_rate,
+        GoodEntity.created_at,
+        GoodEntity.search_vector,
+    ]
     # column_exclude_list = [GoodEntity.vat_rate]
 
 
@@ -147,6 +226,7 @@ class GoodsVariationAdmin(ModelView, model=GoodVariationEntity):
         GoodVariationEntity.latest_price,
     ]
     column_sortable_list = [GoodVariationEntity.title, GoodVariationEntity.latest_price]
+    form_excluded_columns = [GoodVariationEntity.search_vector]
 
 
 class GoodVariationPhotoEntityAdmin(ModelView, model=GoodVariationPhotoEntity):
@@ -0,0 +1,30 @@
+import asyncio
+import logging
+
+from app.utils.cache import TTLCache
+
+
+def test_failed_refresh_is_logged_once(caplog):
+    async def scenario():
+        cache: TTLCache[str, int] = TTLCache(ttl=0.0, stale_ttl=60.0)
+        cache.set("key", 1)
+        refresh = asyncio.Event()
+
+        async def loader():
+            await refresh.wait()
+            raise RuntimeError("backend down")
+
+        # Все устаревшие чтения приходятся на одно фоновое обновление
+        values = [await cache.get_or_load("key", loader) for _ in range(5)]
+        refresh.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return values
+
+    with caplog.at_level(logging.WARNING, logger="app.utils.cache"):
+        values = asyncio.run(scenario())
+
+    assert values == [1] * 5
+    assert [r.getMessage() for r in caplog.records] == [
+        "Background cache refresh failed: backend down"
+    ]
@@ -0,0 +1,42 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.modules.goods.catalog import catalog_snapshot
+from app.modules.goods.enums.vat_rates import VATRate
+from app.modules.goods.router import router
+from app.modules.goods.service import GoodsService
+
+app = FastAPI()
+app.include_router(router, prefix="/goods")
+client = TestClient(app)
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Параметры, с которыми каталог загружался из БД"""
+    calls = []
+
+    async def load_catalog(data):
+        calls.append(data)
+        return []
+
+    monkeypatch.setattr(GoodsService, "load_catalog", staticmethod(load_catalog))
+    catalog_snapshot.invalidate()
+    return calls
+
+
+@pytest.mark.parametrize("value", ["3", "VAT_20"])
+def test_vat_rate_by_value_or_name(loaded, value):
+    response = client.get(f"/goods/?vat_rate={value}")
+
+    assert response.status_code == 200
+    assert loaded[0].vat_rate is VATRate.VAT_20
+
+
+@pytest.mark.parametrize("value", ["9", "VAT_99", "vat_20", "-1"])
+def test_unknown_vat_rate(loaded, value):
+    response = client.get(f"/goods/?vat_rate={value}")
+
+    assert response.status_code == 422
+    assert not loaded
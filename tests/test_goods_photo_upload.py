@@ -0,0 +1,50 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.storage import StorageError
+from app.modules.goods.router import router
+from app.modules.goods.service import GoodsService, VariationNotFoundError
+
+app = FastAPI()
+app.include_router(router, prefix="/goods")
+client = TestClient(app)
+
+URL = "/goods/variation/v1/upload-photo"
+MULTIPART = {"content-type": "multipart/form-data; boundary=x"}
+
+
+def fail_with(monkeypatch, error: Exception):
+    async def upload_photo_file(self, *args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(GoodsService, "upload_photo_file", upload_photo_file)
+
+
+def test_storage_error_is_bad_gateway(monkeypatch):
+    fail_with(monkeypatch, StorageError("S3 PUT photos/x failed: 503"))
+
+    response = client.post(URL, content=b"--x--", headers=MULTIPART)
+
+    assert response.status_code == 502
+
+
+def test_unknown_variation_is_not_found(monkeypatch):
+    fail_with(monkeypatch, VariationNotFoundError("Variation not found"))
+
+    response = client.post(URL, content=b"--x--", headers=MULTIPART)
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("content_length", ["abc", "1.5"])
+def test_malformed_content_length(monkeypatch, content_length):
+    fail_with(monkeypatch, AssertionError("upload must not start"))
+
+    response = client.post(
+        URL,
+        content=b"--x--",
+        headers={**MULTIPART, "content-length": content_length},
+    )
+
+    assert response.status_code == 400